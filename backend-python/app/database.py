@@ -1,12 +1,117 @@
-from sqlalchemy import create_engine
+import itertools
+import time
+from typing import Optional
+from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.config import settings
+from app.utils.db_pool import create_pooled_engine, create_pooled_async_engine
+from app.utils.cache import cache_backend, CacheUnavailable
+from app.utils import request_metrics, sql_trace
 
-engine = create_engine(settings.DATABASE_URL)
+# asyncio drivers for the sync URLs DATABASE_URL usually holds
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Swap the driver of a sync database URL for its asyncio counterpart"""
+    scheme, _, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+def replica_urls() -> list[str]:
+    """DATABASE_REPLICA_URLS as a list"""
+    return [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+
+engine = create_pooled_engine("primary", settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+replica_engines = [
+    create_pooled_engine(f"replica_{i}", url) for i, url in enumerate(replica_urls(), 1)
+]
 Base = declarative_base()
 
+# Async engine for DATABASE_MODE=async. Instances are not expired on commit
+# because attribute refreshes would need implicit I/O outside an await.
+async_engine = None
+AsyncSessionLocal = None
+async_replica_engines = []
+if settings.DATABASE_MODE == "async":
+    async_engine = create_pooled_async_engine(
+        "primary_async", settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    async_replica_engines = [
+        create_pooled_async_engine(f"replica_{i}_async", async_database_url(url))
+        for i, url in enumerate(replica_urls(), 1)
+    ]
+
+# Per-request statement counts and timings (see app/utils/request_metrics.py)
+# and the slow-query log and SQL traces (app/utils/sql_trace.py)
+for instrumented in (engine, *replica_engines, async_engine, *async_replica_engines):
+    if instrumented is None:
+        continue
+    instrumented = getattr(instrumented, "sync_engine", instrumented)
+    if settings.METRICS_ENABLED:
+        request_metrics.attach(instrumented)
+    if sql_trace.enabled():
+        sql_trace.attach(instrumented)
+
+# ==================== Read replicas ====================
+# Read-only endpoints take a session on a replica (round robin). Writers
+# call mark_write(scope) after committing; reads of that scope then stay on
+# the primary for REPLICA_STICKY_SECONDS so users see their own changes.
+# Marks live in the cache backend, so they reach every worker with redis.
+
+_replica_turn = itertools.count()
+
+
+def _sticky_key(scope: str) -> str:
+    return f"db:wrote:{scope}"
+
+
+def mark_write(scope: str) -> None:
+    """Pin reads of `scope` (e.g. "user:42", "menu") to the primary for a while"""
+    if replica_engines or async_replica_engines:
+        try:
+            cache_backend.store(_sticky_key(scope), time.time(), settings.REPLICA_STICKY_SECONDS)
+        except CacheUnavailable:
+            # The write is committed, and _is_sticky sends reads of the scope
+            # to the primary for as long as the backend stays unreachable
+            pass
+
+
+async def mark_write_async(scope: str) -> None:
+    """mark_write() for the event loop; the cache write runs on the threadpool"""
+    if replica_engines or async_replica_engines:
+        await run_in_threadpool(mark_write, scope)
+
+
+def _is_sticky(scope: str) -> bool:
+    try:
+        return cache_backend.fetch(_sticky_key(scope)) is not None
+    except CacheUnavailable:
+        # A recent write can't be ruled out
+        return True
+
+
+def _read_bind(primary, replicas: list, scope: Optional[str]):
+    if not replicas or (scope and _is_sticky(scope)):
+        return primary
+    return replicas[next(_replica_turn) % len(replicas)]
+
+
+def read_engine(scope: Optional[str] = None) -> Engine:
+    """Engine for a read of `scope`: a replica unless the scope was just written"""
+    return _read_bind(engine, replica_engines, scope)
+
 
 def get_db():
     """Dependency to get database session"""
@@ -15,3 +120,54 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def read_session(db: Session, scope: Optional[str] = None):
+    """Session for read-only work on `scope` (see read_engine). Reads that
+    stay on the primary reuse the request's session `db`, so a request never
+    holds two connections to the same pool."""
+    bind = read_engine(scope)
+    if bind is engine:
+        yield db
+        return
+    replica_db = SessionLocal(bind=bind)
+    try:
+        yield replica_db
+    finally:
+        replica_db.close()
+
+
+def get_read_db(db: Session = Depends(get_db)):
+    """Dependency to get a read-only session on a replica"""
+    yield from read_session(db)
+
+
+def get_menu_read_db(db: Session = Depends(get_db)):
+    """Dependency to get a read-only session for menu data"""
+    yield from read_session(db, "menu")
+
+
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def async_read_session(db: AsyncSession, scope: Optional[str] = None):
+    """Async counterpart of read_session"""
+    if async_replica_engines and scope:
+        # The sticky-write lookup is a cache round trip; keep it off the event loop
+        bind = await run_in_threadpool(_read_bind, async_engine, async_replica_engines, scope)
+    else:
+        bind = _read_bind(async_engine, async_replica_engines, scope)
+    if bind is async_engine:
+        yield db
+        return
+    async with AsyncSessionLocal(bind=bind) as replica_db:
+        yield replica_db
+
+
+async def get_async_menu_read_db(db: AsyncSession = Depends(get_async_db)):
+    """Dependency to get a read-only async session for menu data"""
+    async for read_db in async_read_session(db, "menu"):
+        yield read_db
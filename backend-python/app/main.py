@@ -1,11 +1,34 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from app.config import settings
-from app.database import engine, Base
-from app.routers import auth, users, foods, orders, admin
+from app.utils.headers import NEXT_CURSOR_HEADER
+from app.utils.passwords import password_pool
+from app.utils.admission import PoolAdmissionMiddleware, admission_limit
+from app.utils.request_metrics import RequestMetricsMiddleware, request_metrics
+from app.utils import sql_trace
+from app.utils.profiler import ProfilerMiddleware
+from app.utils.startup import LazyRouterMiddleware, RouterLoader, is_lean, warm_up, warm_up_in_background
+from app.utils.cache import cache_backend
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# The schema is managed by Alembic (alembic upgrade head), never at startup.
+# Routers, and with them SQLAlchemy and the database, are imported below or,
+# with STARTUP_MODE=lean, on first use (see app/utils/startup.py).
+
+# Claims mode trusts a token until a change to its user is recorded in the
+# cache backend; with a per-worker backend only one worker would see it
+if settings.AUTH_MODE == "claims" and not cache_backend.shared:
+    raise RuntimeError(
+        f"AUTH_MODE=claims requires a shared cache backend, not CACHE_BACKEND={settings.CACHE_BACKEND}"
+    )
+
+# Replica reads stay on the primary after a write only while a stickiness
+# mark in the cache backend says so; a per-worker backend would let the next
+# request, on another worker, read a replica that lags behind
+if settings.DATABASE_REPLICA_URLS.strip() and not cache_backend.shared:
+    raise RuntimeError(
+        f"DATABASE_REPLICA_URLS requires a shared cache backend, not CACHE_BACKEND={settings.CACHE_BACKEND}"
+    )
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -13,9 +36,31 @@ app = FastAPI(
     description="TastyBites Food Delivery API - Python FastAPI Backend",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    # Model listings encode themselves (see app/utils/serialization.py);
+    # everything else is encoded with orjson rather than json.dumps
+    default_response_class=ORJSONResponse
 )
 
+# Include routers
+router_loader = RouterLoader(app)
+if is_lean():
+    app.add_middleware(LazyRouterMiddleware, loader=router_loader)
+else:
+    router_loader.load_all()
+
+# Marks requests sampled by an admin-started profiling session (see profiler)
+app.add_middleware(ProfilerMiddleware)
+
+# Queue requests beyond what the connection pool can serve (see admission)
+if admission_limit() > 0:
+    app.add_middleware(
+        PoolAdmissionMiddleware,
+        limit=admission_limit(),
+        max_waiting=settings.DB_ADMISSION_MAX_WAITING,
+        timeout_seconds=settings.DB_ADMISSION_TIMEOUT_SECONDS
+    )
+
 # CORS middleware - allow frontend to connect
 app.add_middleware(
     CORSMiddleware,
@@ -29,14 +74,43 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
-# Include routers
-app.include_router(auth.router)
-app.include_router(users.router)
-app.include_router(foods.router)
-app.include_router(orders.router)
-app.include_router(admin.router)
+# Ties statements to their endpoint for the slow-query log (see sql_trace)
+if sql_trace.enabled():
+    app.add_middleware(sql_trace.SqlTraceMiddleware, sample_percent=settings.SQL_TRACE_SAMPLE_PERCENT)
+
+# Outermost, so latency includes admission queueing (see request_metrics)
+if settings.METRICS_ENABLED:
+    app.add_middleware(
+        RequestMetricsMiddleware, metrics=request_metrics, add_server_timing=settings.SERVER_TIMING_ENABLED
+    )
+
+
+@app.on_event("startup")
+def build_autocomplete_index():
+    """Load the menu autocomplete index before serving requests, or in a
+    lean start, begin warming up in the background"""
+    if not is_lean():
+        from app.utils import autocomplete
+        autocomplete.rebuild()
+    elif settings.STARTUP_WARMUP:
+        warm_up_in_background(router_loader)
+
+
+@app.on_event("shutdown")
+def shutdown_password_pool():
+    """Stop the bcrypt worker processes"""
+    password_pool.shutdown()
+
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    """Close pooled async connections while the event loop is still running"""
+    from app.database import async_engine
+    if async_engine is not None:
+        await async_engine.dispose()
 
 
 @app.get("/")
@@ -54,3 +128,15 @@ def root():
 def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "tastybites-api"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Request metrics in the Prometheus text format"""
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/warmup")
+def warmup():
+    """Load everything a lean start deferred; safe to call repeatedly"""
+    return {"status": "warm", "timings_ms": warm_up(router_loader)}
@@ -1,5 +1,10 @@
 from app.models.user import User, UserRole
 from app.models.food import Food, Category
 from app.models.order import Order, OrderItem, OrderStatus
+from app.models.rollup import (
+    StatCounter, DailyOrderStats, FoodSales, Granularity, OrderSalesBucket, FoodSalesBucket, CategorySalesBucket
+)
 
-__all__ = ["User", "UserRole", "Food", "Category", "Order", "OrderItem", "OrderStatus"]
+__all__ = ["User", "UserRole", "Food", "Category", "Order", "OrderItem", "OrderStatus",
+           "StatCounter", "DailyOrderStats", "FoodSales",
+           "Granularity", "OrderSalesBucket", "FoodSalesBucket", "CategorySalesBucket"]
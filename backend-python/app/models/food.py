@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, DDL, Index, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -37,3 +37,46 @@ class Food(Base):
     # Relationships
     category = relationship("Category", back_populates="foods")
     order_items = relationship("OrderItem", back_populates="food")
+
+    # A name is unique within its category, which is also the key bulk
+    # imports upsert on. The public menu only lists available foods, in id
+    # order (keyset pagination); partial indexes keep unavailable ones out
+    # of its scans
+    __table_args__ = (
+        Index("uq_foods_category_id_name", "category_id", "name", unique=True),
+        Index("ix_foods_available_id", "id",
+              postgresql_where=is_available == True, sqlite_where=is_available == True),
+        Index("ix_foods_available_category_id_id", "category_id", "id",
+              postgresql_where=is_available == True, sqlite_where=is_available == True),
+        Index("ix_foods_available_is_special_id", "is_special", "id",
+              postgresql_where=is_available == True, sqlite_where=is_available == True),
+    )
+
+
+# PostgreSQL menu search (app/utils/search.py): a generated tsvector over name
+# (weight A) and description (weight B) and a trigram index on name for typo
+# tolerance. The column is maintained by the database and not mapped, so
+# food queries never load it. Migration 0006 creates them from the
+# definitions below; the after_create hooks build the same objects for
+# create_all on throwaway databases (benchmarks).
+FOOD_SEARCH_CONFIG = "english"
+FOOD_SEARCH_VECTOR_TYPE = (
+    "tsvector GENERATED ALWAYS AS ("
+    f"setweight(to_tsvector('{FOOD_SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+    f"setweight(to_tsvector('{FOOD_SEARCH_CONFIG}', coalesce(description, '')), 'B')) STORED"
+)
+# GIN indexes: name -> (column, operator class)
+FOOD_SEARCH_INDEXES = {
+    "ix_foods_search_vector": ("search_vector", None),
+    "ix_foods_name_trgm": ("name", "gin_trgm_ops"),
+}
+
+for statement in (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"ALTER TABLE foods ADD COLUMN IF NOT EXISTS search_vector {FOOD_SEARCH_VECTOR_TYPE}",
+    *(
+        f"CREATE INDEX IF NOT EXISTS {name} ON foods USING gin ({column}{f' {ops}' if ops else ''})"
+        for name, (column, ops) in FOOD_SEARCH_INDEXES.items()
+    ),
+):
+    event.listen(Food.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
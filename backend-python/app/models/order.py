@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -55,6 +55,13 @@ class Order(Base):
     user = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
 
+    # Keyset pagination indexes: (created_at, id) matches the cursor sort key
+    __table_args__ = (
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+    )
+
 
 class OrderItem(Base):
     __tablename__ = "order_items"
@@ -68,3 +75,15 @@ class OrderItem(Base):
     # Relationships
     order = relationship("Order", back_populates="items")
     food = relationship("Food", back_populates="order_items")
+
+    @property
+    def food_name(self):
+        """Name of the ordered food, for OrderItemResponse"""
+        return self.food.name if self.food else None
+
+    # Loading an order's items (and refreshing its sales buckets) without
+    # scanning the table; food_id for per-food lookups and food deletes
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id"),
+        Index("ix_order_items_food_id", "food_id"),
+    )
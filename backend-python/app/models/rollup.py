@@ -0,0 +1,84 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Enum, Index
+from app.database import Base
+from app.models.order import OrderStatus
+import enum
+
+
+class Granularity(str, enum.Enum):
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+
+
+class StatCounter(Base):
+    """Lifetime totals: "users", "orders", "revenue" and "orders:<status>" """
+    __tablename__ = "stat_counters"
+
+    name = Column(String(50), primary_key=True)
+    value = Column(Float, nullable=False, default=0)
+
+
+class DailyOrderStats(Base):
+    """Orders and revenue per creation day and current status"""
+    __tablename__ = "daily_order_stats"
+
+    day = Column(Date, primary_key=True)
+    status = Column(Enum(OrderStatus), primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+
+class FoodSales(Base):
+    """Units sold per food over all orders"""
+    __tablename__ = "food_sales"
+
+    food_id = Column(Integer, primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_food_sales_quantity", "quantity"),
+    )
+
+
+class OrderSalesBucket(Base):
+    """Orders, units and order-total revenue per time bucket of order
+    creation; cancelled orders are left out"""
+    __tablename__ = "order_sales_buckets"
+
+    granularity = Column(String(8), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+
+class FoodSalesBucket(Base):
+    """Orders containing the food, units and line revenue per time bucket"""
+    __tablename__ = "food_sales_buckets"
+
+    granularity = Column(String(8), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    food_id = Column(Integer, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_food_sales_buckets_food", "granularity", "food_id", "bucket_start"),
+    )
+
+
+class CategorySalesBucket(Base):
+    """Like FoodSalesBucket per category, so an order with two foods of one
+    category counts once. Sales are keyed by the food's current category:
+    after a food moves, its earlier sales stay under the old category, while
+    cancelling one of them subtracts from the new one. rebuild() regroups
+    all sales under the current categories."""
+    __tablename__ = "category_sales_buckets"
+
+    granularity = Column(String(8), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    category_id = Column(Integer, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -41,3 +41,9 @@ class Role(Base):
 
     # Relationships
     user = relationship("User", back_populates="roles")
+
+    # Roles are loaded with every authenticated request (AUTH_MODE=database)
+    # and checked by has_role
+    __table_args__ = (
+        Index("ix_user_roles_user_id_role", "user_id", "role"),
+    )
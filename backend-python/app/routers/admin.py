@@ -1,64 +1,70 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from typing import Optional
-from datetime import datetime
-from app.database import get_db
+from datetime import datetime, timedelta
+from app.config import settings
+from app.database import get_db, get_read_db, mark_write
 from app.models.user import User, Role, UserRole
 from app.models.food import Food, Category
 from app.models.order import Order, OrderItem, OrderStatus
-from app.schemas.user import UserResponse
-from app.schemas.food import FoodCreate, FoodUpdate, FoodResponse, CategoryCreate, CategoryResponse
-from app.schemas.order import OrderResponse, OrderUpdate, OrderItemResponse
-from app.utils.security import require_admin
+from app.models.rollup import Granularity
+from app.schemas.user import UserResponse, CurrentUser
+from app.schemas.food import (
+    FoodCreate, FoodUpdate, FoodResponse, CategoryCreate, CategoryResponse,
+    FoodFileFormat, FoodImportMode, FoodImportReport
+)
+from app.schemas.order import OrderResponse, OrderUpdate, OrderExportFormat
+from app.schemas.analytics import SalesBucketResponse, FoodSalesBucketResponse, CategorySalesBucketResponse
+from app.utils.security import require_admin, invalidate_user_auth, user_scope
+from app.utils.queries import foods_query, orders_query, users_query, order_status_update
+from app.utils.pagination import paginate
+from app.utils.cache import menu_cache, CacheUnavailable
+from app.utils.serialization import to_json, json_response
+from app.utils import rollups, analytics, autocomplete, food_import, order_export, exports
+from app.utils.db_pool import pool_stats
+from app.utils import sql_trace, profiler
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
 
+def invalidate_menu():
+    """Drop cached menu responses after a committed menu change. Menu reads
+    go to the primary for a while so the cache isn't refilled from a
+    replica that hasn't applied the change yet."""
+    try:
+        menu_cache.invalidate()
+    except CacheUnavailable:
+        raise HTTPException(
+            status_code=503,
+            detail="Change saved, but cached menu responses could not be invalidated; "
+                   "they expire within MENU_CACHE_TTL_SECONDS"
+        )
+    mark_write("menu")
+
+
 # ==================== Dashboard Stats ====================
 
 @router.get("/dashboard")
 def get_dashboard_stats(
-    admin: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    admin: CurrentUser = Depends(require_admin),
+    db: Session = Depends(get_read_db)
 ):
-    """Get dashboard statistics"""
-    # Total users
-    total_users = db.query(func.count(User.id)).scalar()
-    
-    # Total orders
-    total_orders = db.query(func.count(Order.id)).scalar()
-    
-    # Total revenue
-    total_revenue = db.query(func.sum(Order.total)).filter(
-        Order.status != OrderStatus.CANCELLED
-    ).scalar() or 0
-    
-    # Orders by status
-    orders_by_status = dict(
-        db.query(Order.status, func.count(Order.id))
-        .group_by(Order.status)
-        .all()
-    )
+    """Get dashboard statistics from the incrementally maintained rollups"""
+    totals = rollups.dashboard_totals(db)
     
-    # Recent orders
+    # Recent orders (index scan on created_at)
     recent_orders = db.query(Order).order_by(
         Order.created_at.desc()
     ).limit(5).all()
     
-    # Top selling foods
-    top_foods = db.query(
-        Food.name,
-        func.sum(OrderItem.quantity).label("total_sold")
-    ).join(OrderItem).group_by(Food.id).order_by(
-        func.sum(OrderItem.quantity).desc()
-    ).limit(5).all()
-    
     return {
-        "total_users": total_users,
-        "total_orders": total_orders,
-        "total_revenue": round(total_revenue, 2),
-        "orders_by_status": {str(k.value): v for k, v in orders_by_status.items()},
+        "total_users": totals["total_users"],
+        "total_orders": totals["total_orders"],
+        "total_revenue": round(totals["total_revenue"], 2),
+        "orders_by_status": totals["orders_by_status"],
         "recent_orders": [
             {
                 "id": o.id,
@@ -71,23 +77,151 @@ def get_dashboard_stats(
         ],
         "top_selling_foods": [
             {"name": name, "total_sold": int(total)} 
-            for name, total in top_foods
-        ]
+            for name, total in totals["top_selling_foods"]
+        ],
+        "daily": totals["daily"]
     }
 
 
+@router.get("/cache/stats")
+def get_cache_stats(admin: CurrentUser = Depends(require_admin)):
+    """Get menu cache hit/miss counters"""
+    return {"menu": menu_cache.stats()}
+
+
+@router.get("/db/pool")
+def get_db_pool_stats(admin: CurrentUser = Depends(require_admin)):
+    """Get connection pool gauges, checkout counters and wait histogram"""
+    return pool_stats()
+
+
+@router.get("/debug/slow-queries")
+def get_slow_queries(admin: CurrentUser = Depends(require_admin)):
+    """Get the latest statements over the slow-query threshold, newest first"""
+    return {
+        "threshold_ms": settings.SLOW_QUERY_THRESHOLD_MS,
+        "capacity": settings.SLOW_QUERY_LOG_SIZE,
+        "recorded": sql_trace.slow_queries.recorded,
+        "queries": sql_trace.slow_queries.snapshot(),
+    }
+
+
+@router.delete("/debug/slow-queries")
+def clear_slow_queries(admin: CurrentUser = Depends(require_admin)):
+    """Empty this worker's slow-query log"""
+    sql_trace.slow_queries.clear()
+    return {"message": "Slow-query log cleared"}
+
+
+@router.get("/debug/sql-traces")
+def get_sql_traces(admin: CurrentUser = Depends(require_admin)):
+    """Get the latest sampled request SQL traces, newest first"""
+    return {
+        "sample_percent": settings.SQL_TRACE_SAMPLE_PERCENT,
+        "capacity": settings.SQL_TRACE_LOG_SIZE,
+        "recorded": sql_trace.sql_traces.recorded,
+        "traces": sql_trace.sql_traces.snapshot(),
+    }
+
+
+@router.post("/debug/profile")
+def start_profile(
+    seconds: float = Query(60, gt=0, le=settings.PROFILER_MAX_SECONDS),
+    route: Optional[str] = Query(None, description="Only profile paths matching this regex"),
+    sample_percent: float = Query(100, gt=0, le=100, description="Share of matching requests to sample"),
+    interval_ms: float = Query(settings.PROFILER_INTERVAL_MS, ge=1, le=1000),
+    admin: CurrentUser = Depends(require_admin)
+):
+    """Start sampling this worker's requests, replacing any running session"""
+    try:
+        session = profiler.start(seconds, route, sample_percent, interval_ms)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return session.summary()
+
+
+@router.get("/debug/profile")
+def get_profile(
+    profile_format: str = Query("json", alias="format", pattern="^(json|folded)$"),
+    top: int = Query(30, ge=1, le=500),
+    admin: CurrentUser = Depends(require_admin)
+):
+    """Get the current or last session: a summary, or folded stacks for a flamegraph"""
+    if profiler.session is None:
+        raise HTTPException(status_code=404, detail="No profiling session has run")
+    if profile_format == "folded":
+        return PlainTextResponse(profiler.session.folded())
+    return profiler.session.summary(top)
+
+
+@router.delete("/debug/profile")
+def stop_profile(admin: CurrentUser = Depends(require_admin)):
+    """Stop the running session; its results stay readable"""
+    if profiler.session is None:
+        raise HTTPException(status_code=404, detail="No profiling session has run")
+    profiler.session.stop()
+    return profiler.session.summary()
+
+
+# ==================== Sales Analytics ====================
+
+def analytics_range(
+    granularity: Granularity = Query(Granularity.DAY, description="hour, day or week"),
+    start: Optional[datetime] = Query(None, description="Defaults to 7 days before end"),
+    end: Optional[datetime] = Query(None, description="Exclusive, defaults to now")
+) -> tuple[Granularity, datetime, datetime]:
+    """Granularity and [start, end) range shared by the analytics endpoints"""
+    end = end or datetime.utcnow()
+    return granularity, start or end - timedelta(days=7), end
+
+
+@router.get("/analytics/sales", response_model=list[SalesBucketResponse])
+def get_sales_analytics(
+    bucket_range: tuple = Depends(analytics_range),
+    admin: CurrentUser = Depends(require_admin),
+    db: Session = Depends(get_read_db)
+):
+    """Get orders, units sold and revenue per time bucket"""
+    return analytics.sales_series(db, *bucket_range)
+
+
+@router.get("/analytics/foods", response_model=list[FoodSalesBucketResponse])
+def get_food_sales_analytics(
+    bucket_range: tuple = Depends(analytics_range),
+    food_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    admin: CurrentUser = Depends(require_admin),
+    db: Session = Depends(get_read_db)
+):
+    """Get orders, units sold and line revenue per food and time bucket"""
+    return analytics.food_series(db, *bucket_range, food_id=food_id, category_id=category_id)
+
+
+@router.get("/analytics/categories", response_model=list[CategorySalesBucketResponse])
+def get_category_sales_analytics(
+    bucket_range: tuple = Depends(analytics_range),
+    category_id: Optional[int] = None,
+    admin: CurrentUser = Depends(require_admin),
+    db: Session = Depends(get_read_db)
+):
+    """Get orders, units sold and line revenue per category and time bucket"""
+    return analytics.category_series(db, *bucket_range, category_id=category_id)
+
+
 # ==================== Users Management ====================
 
 @router.get("/users", response_model=list[UserResponse])
 def get_all_users(
+    response: Response,
     search: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    admin: User = Depends(require_admin),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    admin: CurrentUser = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get all users (admin only)"""
-    query = db.query(User)
+    query = users_query(db)
     
     if search:
         search_term = f"%{search.lower()}%"
@@ -97,7 +231,7 @@ def get_all_users(
             (User.last_name.ilike(search_term))
         )
     
-    users = query.offset(skip).limit(limit).all()
+    users = paginate(query, response, (User.id,), cursor, skip, limit)
     
     return [
         UserResponse(
@@ -120,7 +254,7 @@ def get_all_users(
 @router.put("/users/{user_id}/toggle-active")
 def toggle_user_active(
     user_id: int,
-    admin: User = Depends(require_admin),
+    admin: CurrentUser = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Toggle user active status"""
@@ -129,7 +263,11 @@ def toggle_user_active(
         raise HTTPException(status_code=404, detail="User not found")
     
     user.is_active = not user.is_active
+    # Recorded before the commit, so a cache outage aborts the change instead
+    # of leaving earlier tokens trusted, and after it for tokens issued meanwhile
+    invalidate_user_auth(user_id)
     db.commit()
+    invalidate_user_auth(user_id)
     
     return {"message": f"User {'activated' if user.is_active else 'deactivated'}"}
 
@@ -137,7 +275,7 @@ def toggle_user_active(
 @router.post("/users/{user_id}/make-admin")
 def make_user_admin(
     user_id: int,
-    admin: User = Depends(require_admin),
+    admin: CurrentUser = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Grant admin role to a user"""
@@ -156,7 +294,9 @@ def make_user_admin(
     
     new_role = Role(user_id=user_id, role=UserRole.ADMIN)
     db.add(new_role)
+    invalidate_user_auth(user_id)
     db.commit()
+    invalidate_user_auth(user_id)
     
     return {"message": "Admin role granted"}
 
@@ -166,7 +306,7 @@ def make_user_admin(
 @router.post("/categories", response_model=CategoryResponse, status_code=201)
 def create_category(
     category_data: CategoryCreate,
-    admin: User = Depends(require_admin),
+    admin: CurrentUser = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Create a new category"""
@@ -178,6 +318,7 @@ def create_category(
     db.add(category)
     db.commit()
     db.refresh(category)
+    invalidate_menu()
     
     return category
 
@@ -185,7 +326,7 @@ def create_category(
 @router.delete("/categories/{category_id}")
 def delete_category(
     category_id: int,
-    admin: User = Depends(require_admin),
+    admin: CurrentUser = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Delete a category"""
@@ -203,58 +344,89 @@ def delete_category(
     
     db.delete(category)
     db.commit()
+    invalidate_menu()
     
     return {"message": "Category deleted"}
 
 
 # ==================== Foods Management ====================
 
+def commit_food(db: Session):
+    """Commit a created or updated food; names are unique per category"""
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="A food with this name already exists in the category")
+
+
 @router.get("/foods", response_model=list[FoodResponse])
 def get_all_foods_admin(
+    response: Response,
     include_unavailable: bool = Query(True),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
-    admin: User = Depends(require_admin),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    admin: CurrentUser = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get all foods including unavailable ones"""
-    query = db.query(Food)
+    query = foods_query(db)
     
     if not include_unavailable:
         query = query.filter(Food.is_available == True)
     
-    foods = query.offset(skip).limit(limit).all()
+    foods = paginate(query, response, (Food.id,), cursor, skip, limit)
     
-    return [
-        FoodResponse(
-            id=food.id,
-            name=food.name,
-            description=food.description,
-            price=food.price,
-            original_price=food.original_price,
-            image=food.image,
-            category_id=food.category_id,
-            prep_time=food.prep_time,
-            is_special=food.is_special,
-            is_available=food.is_available,
-            rating=food.rating,
-            reviews_count=food.reviews_count,
-            created_at=food.created_at,
-            category=CategoryResponse(
-                id=food.category.id,
-                name=food.category.name,
-                description=food.category.description,
-                created_at=food.category.created_at
-            ) if food.category else None
+    return json_response(to_json(list[FoodResponse], foods), response)
+
+
+@router.post("/foods/import", response_model=FoodImportReport)
+async def import_foods(
+    request: Request,
+    file_format: Optional[FoodFileFormat] = Query(
+        None, alias="format", description="Defaults to the format named by the Content-Type header"
+    ),
+    mode: FoodImportMode = Query(FoodImportMode.UPSERT),
+    batch_size: int = Query(settings.FOOD_BULK_BATCH_SIZE, ge=1, le=10000),
+    admin: CurrentUser = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Import foods from a CSV (text/csv) or JSON Lines (application/x-ndjson)
+    upload, streamed and committed in batches; returns a report per batch"""
+    file_format = file_format or food_import.format_of(request.headers.get("content-type"))
+    if file_format is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=csv|jsonl"
         )
-        for food in foods
-    ]
+    try:
+        return await food_import.import_foods(db, request.stream(), file_format, mode, batch_size)
+    except UnicodeDecodeError:
+        # Batches before the bad bytes are already committed
+        raise HTTPException(status_code=400, detail="File is not valid UTF-8")
+    finally:
+        invalidate_menu()
+
+
+@router.get("/foods/export")
+def export_foods(
+    file_format: FoodFileFormat = Query(FoodFileFormat.CSV, alias="format"),
+    admin: CurrentUser = Depends(require_admin)
+):
+    """Export every food as CSV or JSON Lines, streamed in batches; the
+    file can be imported again as is"""
+    return StreamingResponse(
+        food_import.export_chunks(file_format, settings.FOOD_BULK_BATCH_SIZE),
+        media_type=exports.MEDIA_TYPES[file_format.value],
+        headers=exports.content_disposition("foods", file_format.value)
+    )
 
 
 @router.post("/foods", response_model=FoodResponse, status_code=201)
 def create_food(
     food_data: FoodCreate,
-    admin: User = Depends(require_admin),
+    admin: CurrentUser = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Create a new food item"""
@@ -265,37 +437,19 @@ def create_food(
     
     food = Food(**food_data.model_dump())
     db.add(food)
-    db.commit()
+    commit_food(db)
     db.refresh(food)
+    invalidate_menu()
+    autocomplete.food_changed(db, food.id)
     
-    return FoodResponse(
-        id=food.id,
-        name=food.name,
-        description=food.description,
-        price=food.price,
-        original_price=food.original_price,
-        image=food.image,
-        category_id=food.category_id,
-        prep_time=food.prep_time,
-        is_special=food.is_special,
-        is_available=food.is_available,
-        rating=food.rating,
-        reviews_count=food.reviews_count,
-        created_at=food.created_at,
-        category=CategoryResponse(
-            id=category.id,
-            name=category.name,
-            description=category.description,
-            created_at=category.created_at
-        )
-    )
+    return json_response(to_json(FoodResponse, food), status_code=201)
 
 
 @router.put("/foods/{food_id}", response_model=FoodResponse)
 def update_food(
     food_id: int,
     food_data: FoodUpdate,
-    admin: User = Depends(require_admin),
+    admin: CurrentUser = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Update a food item"""
@@ -313,36 +467,18 @@ def update_food(
     for field, value in update_data.items():
         setattr(food, field, value)
     
-    db.commit()
+    commit_food(db)
     db.refresh(food)
+    invalidate_menu()
+    autocomplete.food_changed(db, food.id)
     
-    return FoodResponse(
-        id=food.id,
-        name=food.name,
-        description=food.description,
-        price=food.price,
-        original_price=food.original_price,
-        image=food.image,
-        category_id=food.category_id,
-        prep_time=food.prep_time,
-        is_special=food.is_special,
-        is_available=food.is_available,
-        rating=food.rating,
-        reviews_count=food.reviews_count,
-        created_at=food.created_at,
-        category=CategoryResponse(
-            id=food.category.id,
-            name=food.category.name,
-            description=food.category.description,
-            created_at=food.category.created_at
-        ) if food.category else None
-    )
+    return json_response(to_json(FoodResponse, food))
 
 
 @router.delete("/foods/{food_id}")
 def delete_food(
     food_id: int,
-    admin: User = Depends(require_admin),
+    admin: CurrentUser = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Delete a food item"""
@@ -352,6 +488,8 @@ def delete_food(
     
     db.delete(food)
     db.commit()
+    invalidate_menu()
+    autocomplete.food_changed(db, food_id)
     
     return {"message": "Food deleted"}
 
@@ -360,59 +498,53 @@ def delete_food(
 
 @router.get("/orders", response_model=list[OrderResponse])
 def get_all_orders(
+    response: Response,
     status: Optional[OrderStatus] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
-    admin: User = Depends(require_admin),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    admin: CurrentUser = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get all orders (admin only)"""
-    query = db.query(Order)
+    query = orders_query(db)
     
     if status:
         query = query.filter(Order.status == status)
     
-    orders = query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
+    orders = paginate(
+        query, response, (Order.created_at, Order.id), cursor, skip, limit, descending=True
+    )
     
-    return [
-        OrderResponse(
-            id=order.id,
-            order_number=order.order_number,
-            user_id=order.user_id,
-            delivery_address=order.delivery_address,
-            delivery_city=order.delivery_city,
-            delivery_zip=order.delivery_zip,
-            delivery_phone=order.delivery_phone,
-            subtotal=order.subtotal,
-            delivery_fee=order.delivery_fee,
-            tax=order.tax,
-            total=order.total,
-            payment_method=order.payment_method,
-            notes=order.notes,
-            status=order.status,
-            created_at=order.created_at,
-            updated_at=order.updated_at,
-            delivered_at=order.delivered_at,
-            items=[
-                OrderItemResponse(
-                    id=item.id,
-                    food_id=item.food_id,
-                    quantity=item.quantity,
-                    price=item.price,
-                    food_name=item.food.name if item.food else None
-                )
-                for item in order.items
-            ]
-        )
-        for order in orders
-    ]
+    return json_response(to_json(list[OrderResponse], orders), response)
+
+
+@router.get("/orders/export")
+def export_orders(
+    file_format: OrderExportFormat = Query(OrderExportFormat.CSV, alias="format"),
+    start: Optional[datetime] = Query(None, description="Orders created at or after this moment"),
+    end: Optional[datetime] = Query(None, description="Exclusive"),
+    status: Optional[OrderStatus] = Query(None),
+    admin: CurrentUser = Depends(require_admin)
+):
+    """Export orders and their line items for a date range as CSV, JSON Lines
+    or Parquet, streamed from a server-side cursor"""
+    if start and end and analytics.naive_utc(start) >= analytics.naive_utc(end):
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if file_format == OrderExportFormat.PARQUET and not exports.parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet exports require the 'pyarrow' package")
+    return StreamingResponse(
+        order_export.export_chunks(file_format, start, end, status, settings.ORDER_EXPORT_BATCH_SIZE),
+        media_type=exports.MEDIA_TYPES[file_format.value],
+        headers=exports.content_disposition("orders", file_format.value)
+    )
 
 
 @router.put("/orders/{order_id}/status")
 def update_order_status(
     order_id: int,
     order_update: OrderUpdate,
-    admin: User = Depends(require_admin),
+    admin: CurrentUser = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Update order status"""
@@ -420,14 +552,17 @@ def update_order_status(
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    if order_update.status:
-        order.status = order_update.status
-        if order_update.status == OrderStatus.DELIVERED:
-            order.delivered_at = datetime.utcnow()
+    old_status = order.status
+    if order_update.status and order_update.status != old_status:
+        values = {"delivered_at": datetime.utcnow()} if order_update.status == OrderStatus.DELIVERED else {}
+        if db.execute(order_status_update(order, order_update.status, **values)).rowcount != 1:
+            raise HTTPException(status_code=409, detail="Order status changed, try again")
     
     if order_update.notes is not None:
         order.notes = order_update.notes
     
+    rollups.apply(db, rollups.order_status_changed(db, order, old_status))
     db.commit()
+    mark_write(user_scope(order.user_id))
     
     return {"message": f"Order status updated to {order.status.value}"}
@@ -1,14 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from datetime import timedelta
+from sqlalchemy.orm import Session, selectinload
 from app.database import get_db
 from app.models.user import User, Role, UserRole
 from app.schemas.user import UserCreate, UserResponse, Token, UserLogin
+from app.utils import rollups
 from app.utils.security import (
-    get_password_hash, verify_password, create_access_token
+    get_password_hash, verify_and_update_password, create_user_token
 )
-from app.config import settings
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
@@ -23,6 +22,8 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
+    # Release the pooled connection while bcrypt runs
+    db.rollback()
     
     # Create new user
     hashed_password = get_password_hash(user_data.password)
@@ -38,6 +39,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
+    rollups.apply(db, rollups.user_created(db))
     db.commit()
     db.refresh(new_user)
     
@@ -64,33 +66,51 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
 
 
-@router.post("/login", response_model=Token)
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
-    """Login and get access token"""
-    user = db.query(User).filter(User.email == user_data.email).first()
+def authenticate_user(db: Session, email: str, password: str) -> User:
+    """
+    Check credentials and return the user with roles loaded.
+
+    The user is detached and the read transaction ended before bcrypt runs,
+    so the pooled connection is not held while waiting on the password pool.
+    """
+    user = db.query(User).options(selectinload(User.roles)).filter(User.email == email).first()
+    if user:
+        db.expunge(user)
+    db.rollback()
     
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    verified, new_hash = (
+        verify_and_update_password(password, user.hashed_password)
+        if user else (False, None)
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Rehash when bcrypt cost settings changed since the password was stored
+    if new_hash:
+        db.query(User).filter(User.id == user.id).update({"hashed_password": new_hash})
+        db.commit()
+        user.hashed_password = new_hash
+    
+    return user
+
+
+@router.post("/login", response_model=Token)
+def login(user_data: UserLogin, db: Session = Depends(get_db)):
+    """Login and get access token"""
+    user = authenticate_user(db, user_data.email, user_data.password)
+    
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user account"
         )
     
-    # Get user roles
-    roles = [r.role.value for r in user.roles]
-    
     # Create access token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.id, "email": user.email, "roles": roles},
-        expires_delta=access_token_expires
-    )
+    access_token = create_user_token(user)
     
     return Token(access_token=access_token)
 
@@ -101,20 +121,8 @@ def login_form(
     db: Session = Depends(get_db)
 ):
     """Login using OAuth2 form (for Swagger UI)"""
-    user = db.query(User).filter(User.email == form_data.username).first()
-    
-    if not user or not verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    user = authenticate_user(db, form_data.username, form_data.password)
     
-    roles = [r.role.value for r in user.roles]
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.id, "email": user.email, "roles": roles},
-        expires_delta=access_token_expires
-    )
+    access_token = create_user_token(user)
     
     return Token(access_token=access_token)
@@ -0,0 +1,114 @@
+"""
+Authentication endpoints on the async engine, used when DATABASE_MODE=async.
+
+Same paths and responses as app.routers.auth. bcrypt still runs in the
+password pool, which is awaited rather than waited on from a thread.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.database import get_async_db
+from app.models.user import User, Role, UserRole
+from app.schemas.user import UserCreate, UserResponse, Token, UserLogin
+from app.routers.users import profile_response
+from app.utils import rollups
+from app.utils.security import (
+    get_password_hash_async, verify_and_update_password_async, create_user_token
+)
+
+router = APIRouter(prefix="/api/auth", tags=["Authentication"])
+
+
+@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """Register a new user"""
+    # Check if email already exists
+    result = await db.execute(select(User.id).where(User.email == user_data.email))
+    if result.first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    # Release the pooled connection while bcrypt runs
+    await db.rollback()
+    
+    # Create the user with the default role
+    new_user = User(
+        email=user_data.email,
+        hashed_password=await get_password_hash_async(user_data.password),
+        first_name=user_data.first_name,
+        last_name=user_data.last_name,
+        phone=user_data.phone,
+        address=user_data.address,
+        city=user_data.city,
+        zip_code=user_data.zip_code,
+        roles=[Role(role=UserRole.USER)]
+    )
+    
+    db.add(new_user)
+    await rollups.apply_async(db, rollups.user_created(db))
+    await db.commit()
+    
+    # Server defaults (created_at) can't be lazy-loaded, so load them with the roles
+    result = await db.execute(
+        select(User)
+        .options(selectinload(User.roles))
+        .where(User.id == new_user.id)
+        .execution_options(populate_existing=True)
+    )
+    return profile_response(result.scalar_one())
+
+
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> User:
+    """authenticate_user of app.routers.auth on the async engine"""
+    result = await db.execute(select(User).options(selectinload(User.roles)).where(User.email == email))
+    user = result.scalars().first()
+    # Detached with its roles first, as rollback would expire them
+    db.expunge_all()
+    await db.rollback()
+    
+    verified, new_hash = (
+        await verify_and_update_password_async(password, user.hashed_password)
+        if user else (False, None)
+    )
+    if not verified:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    # Rehash when bcrypt cost settings changed since the password was stored
+    if new_hash:
+        await db.execute(update(User).where(User.id == user.id).values(hashed_password=new_hash))
+        await db.commit()
+        user.hashed_password = new_hash
+    
+    return user
+
+
+@router.post("/login", response_model=Token)
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    """Login and get access token"""
+    user = await authenticate_user(db, user_data.email, user_data.password)
+    
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user account"
+        )
+    
+    return Token(access_token=create_user_token(user))
+
+
+@router.post("/login/form", response_model=Token)
+async def login_form(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Login using OAuth2 form (for Swagger UI)"""
+    user = await authenticate_user(db, form_data.username, form_data.password)
+    
+    return Token(access_token=create_user_token(user))
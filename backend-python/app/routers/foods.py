@@ -1,77 +1,126 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import Optional
-from app.database import get_db
+from app.database import get_menu_read_db
 from app.models.food import Food, Category
-from app.schemas.food import FoodResponse, CategoryResponse
+from app.schemas.food import FoodResponse, FoodSort, FoodSuggestion, CategoryResponse
+from app.utils.queries import foods_query
+from app.utils.pagination import paginate, NEXT_CURSOR_HEADER
+from app.utils.cache import menu_cache
+from app.utils.serialization import to_json, json_response
+from app.utils import search as menu_search
+from app.utils import autocomplete
 
 router = APIRouter(prefix="/api/foods", tags=["Foods"])
 
 
+def filter_foods(
+    db,
+    query,
+    category: Optional[str],
+    search: Optional[str],
+    is_special: Optional[bool],
+    sort: FoodSort = FoodSort.ID
+):
+    """Apply the public menu filters to a Query or select() of foods. With
+    sort=relevance, search results are ordered best match first."""
+    query = query.filter(Food.is_available == True)
+    
+    if category and category != "All":
+        query = query.join(Category).filter(Category.name == category)
+    
+    if search:
+        condition, relevance = menu_search.match(db, search)
+        query = query.filter(condition)
+        if sort == FoodSort.RELEVANCE:
+            query = query.order_by(relevance.desc())
+    
+    if is_special is not None:
+        query = query.filter(Food.is_special == is_special)
+    
+    return query
+
+
+def relevance_page(query, cursor: Optional[str], skip: int, limit: int):
+    """One page of a relevance-ordered search; relevance isn't a stable
+    key, so these pages use skip rather than cursors"""
+    if cursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor pagination is not available with sort=relevance, use skip"
+        )
+    return query.order_by(Food.id).offset(skip).limit(limit)
+
+
 @router.get("/", response_model=list[FoodResponse])
 def get_foods(
+    response: Response,
     category: Optional[str] = Query(None, description="Filter by category name"),
     search: Optional[str] = Query(None, description="Search by name or description"),
     is_special: Optional[bool] = Query(None, description="Filter special items"),
+    sort: FoodSort = Query(FoodSort.ID, description="id, or relevance to order search results by best match"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    db: Session = Depends(get_menu_read_db)
 ):
     """Get all foods with optional filters"""
-    query = db.query(Food).filter(Food.is_available == True)
-    
-    if category and category != "All":
-        query = query.join(Category).filter(Category.name == category)
+    # Menu responses are cached as encoded JSON
+    cache_key = ("foods.json", category, search, is_special, sort, skip, limit, cursor)
+    version = menu_cache.version()
+    cached = menu_cache.get(cache_key)
+    if cached is not None:
+        content, next_cursor = cached
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return json_response(content, response)
     
     if search:
-        search_term = f"%{search.lower()}%"
-        query = query.filter(
-            (Food.name.ilike(search_term)) | 
-            (Food.description.ilike(search_term))
-        )
-    
-    if is_special is not None:
-        query = query.filter(Food.is_special == is_special)
+        menu_search.refresh(db)
+    query = filter_foods(db, foods_query(db), category, search, is_special, sort)
+    if search and sort == FoodSort.RELEVANCE:
+        foods = relevance_page(query, cursor, skip, limit).all()
+    else:
+        foods = paginate(query, response, (Food.id,), cursor, skip, limit)
     
-    foods = query.offset(skip).limit(limit).all()
+    content = to_json(list[FoodResponse], foods)
+    menu_cache.set(cache_key, (content, response.headers.get(NEXT_CURSOR_HEADER)), version)
     
-    return [
-        FoodResponse(
-            id=food.id,
-            name=food.name,
-            description=food.description,
-            price=food.price,
-            original_price=food.original_price,
-            image=food.image,
-            category_id=food.category_id,
-            prep_time=food.prep_time,
-            is_special=food.is_special,
-            is_available=food.is_available,
-            rating=food.rating,
-            reviews_count=food.reviews_count,
-            created_at=food.created_at,
-            category=CategoryResponse(
-                id=food.category.id,
-                name=food.category.name,
-                description=food.category.description,
-                created_at=food.category.created_at
-            ) if food.category else None
-        )
-        for food in foods
-    ]
+    return json_response(content, response)
+
+
+@router.get("/autocomplete", response_model=list[FoodSuggestion])
+def autocomplete_foods(
+    q: str = Query(..., min_length=1, description="What has been typed so far"),
+    limit: int = Query(8, ge=1, le=autocomplete.MAX_SUGGESTIONS)
+):
+    """Suggest foods for a search box from the in-memory index"""
+    autocomplete.ensure_current()
+    return autocomplete.autocomplete_index.suggest(q, limit)
 
 
 @router.get("/categories", response_model=list[CategoryResponse])
-def get_categories(db: Session = Depends(get_db)):
+def get_categories(db: Session = Depends(get_menu_read_db)):
     """Get all food categories"""
-    categories = db.query(Category).all()
-    return categories
+    version = menu_cache.version()
+    cached = menu_cache.get(("categories.json",))
+    if cached is not None:
+        return json_response(cached)
+    
+    content = to_json(list[CategoryResponse], db.query(Category).all())
+    menu_cache.set(("categories.json",), content, version)
+    return json_response(content)
 
 
 @router.get("/{food_id}", response_model=FoodResponse)
-def get_food(food_id: int, db: Session = Depends(get_db)):
+def get_food(food_id: int, db: Session = Depends(get_menu_read_db)):
     """Get a specific food by ID"""
-    food = db.query(Food).filter(Food.id == food_id).first()
+    version = menu_cache.version()
+    cached = menu_cache.get(("food.json", food_id))
+    if cached is not None:
+        return json_response(cached)
+    
+    food = foods_query(db).filter(Food.id == food_id).first()
     
     if not food:
         raise HTTPException(
@@ -79,24 +128,7 @@ def get_food(food_id: int, db: Session = Depends(get_db)):
             detail="Food not found"
         )
     
-    return FoodResponse(
-        id=food.id,
-        name=food.name,
-        description=food.description,
-        price=food.price,
-        original_price=food.original_price,
-        image=food.image,
-        category_id=food.category_id,
-        prep_time=food.prep_time,
-        is_special=food.is_special,
-        is_available=food.is_available,
-        rating=food.rating,
-        reviews_count=food.reviews_count,
-        created_at=food.created_at,
-        category=CategoryResponse(
-            id=food.category.id,
-            name=food.category.name,
-            description=food.category.description,
-            created_at=food.category.created_at
-        ) if food.category else None
-    )
+    content = to_json(FoodResponse, food)
+    menu_cache.set(("food.json", food_id), content, version)
+    
+    return json_response(content)
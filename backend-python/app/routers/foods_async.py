@@ -0,0 +1,104 @@
+"""
+Menu endpoints on the async engine, used when DATABASE_MODE=async.
+
+Same paths, filters, cache keys and responses as app.routers.foods; only the
+database access differs.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.database import get_async_menu_read_db
+from app.models.food import Food, Category
+from app.schemas.food import FoodResponse, FoodSort, FoodSuggestion, CategoryResponse
+from app.routers.foods import autocomplete_foods, filter_foods, relevance_page
+from app.utils.queries import food_options
+from app.utils.pagination import page_query, set_next_cursor, NEXT_CURSOR_HEADER
+from app.utils.cache import menu_cache
+from app.utils.serialization import to_json, json_response
+from app.utils import search as menu_search
+
+router = APIRouter(prefix="/api/foods", tags=["Foods"])
+
+
+@router.get("/", response_model=list[FoodResponse])
+async def get_foods(
+    response: Response,
+    category: Optional[str] = Query(None, description="Filter by category name"),
+    search: Optional[str] = Query(None, description="Search by name or description"),
+    is_special: Optional[bool] = Query(None, description="Filter special items"),
+    sort: FoodSort = Query(FoodSort.ID, description="id, or relevance to order search results by best match"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    db: AsyncSession = Depends(get_async_menu_read_db)
+):
+    """Get all foods with optional filters"""
+    cache_key = ("foods.json", category, search, is_special, sort, skip, limit, cursor)
+    version = await menu_cache.version_async()
+    cached = await menu_cache.get_async(cache_key)
+    if cached is not None:
+        content, next_cursor = cached
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return json_response(content, response)
+    
+    if search:
+        await menu_search.refresh_async(db)
+    query = filter_foods(db, select(Food).options(*food_options()), category, search, is_special, sort)
+    if search and sort == FoodSort.RELEVANCE:
+        result = await db.execute(relevance_page(query, cursor, skip, limit))
+        foods = result.scalars().all()
+    else:
+        result = await db.execute(page_query(query, (Food.id,), cursor, skip, limit))
+        foods = result.scalars().all()
+        set_next_cursor(response, foods, (Food.id,), limit)
+    
+    content = to_json(list[FoodResponse], foods)
+    await menu_cache.set_async(cache_key, (content, response.headers.get(NEXT_CURSOR_HEADER)), version)
+    
+    return json_response(content, response)
+
+
+# Served from memory; the same sync endpoint, whose rare rebuilds run on
+# the threadpool rather than the event loop
+router.get("/autocomplete", response_model=list[FoodSuggestion])(autocomplete_foods)
+
+
+@router.get("/categories", response_model=list[CategoryResponse])
+async def get_categories(db: AsyncSession = Depends(get_async_menu_read_db)):
+    """Get all food categories"""
+    version = await menu_cache.version_async()
+    cached = await menu_cache.get_async(("categories.json",))
+    if cached is not None:
+        return json_response(cached)
+    
+    result = await db.execute(select(Category))
+    content = to_json(list[CategoryResponse], result.scalars().all())
+    await menu_cache.set_async(("categories.json",), content, version)
+    return json_response(content)
+
+
+@router.get("/{food_id}", response_model=FoodResponse)
+async def get_food(food_id: int, db: AsyncSession = Depends(get_async_menu_read_db)):
+    """Get a specific food by ID"""
+    version = await menu_cache.version_async()
+    cached = await menu_cache.get_async(("food.json", food_id))
+    if cached is not None:
+        return json_response(cached)
+    
+    result = await db.execute(
+        select(Food).options(*food_options()).where(Food.id == food_id)
+    )
+    food = result.scalars().first()
+    
+    if not food:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Food not found"
+        )
+    
+    content = to_json(FoodResponse, food)
+    await menu_cache.set_async(("food.json", food_id), content, version)
+    
+    return json_response(content)
@@ -1,36 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import Optional
-from app.database import get_db
-from app.models.user import User
+from app.database import get_db, mark_write
 from app.models.food import Food
 from app.models.order import Order, OrderItem, OrderStatus
-from app.schemas.order import OrderCreate, OrderResponse, OrderItemResponse
-from app.utils.security import get_current_user
+from app.schemas.order import OrderCreate, OrderResponse
+from app.schemas.user import CurrentUser
+from app.utils.security import get_current_principal, get_user_read_db, user_scope
 from app.utils.helpers import generate_order_number, calculate_order_total
+from app.utils.queries import orders_query, order_status_update
+from app.utils.pagination import paginate
+from app.utils.serialization import to_json, json_response
+from app.utils import rollups
 
 router = APIRouter(prefix="/api/orders", tags=["Orders"])
 
 
-@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-def create_order(
-    order_data: OrderCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Create a new order"""
-    if not order_data.items:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Order must have at least one item"
-        )
-    
+def build_order(order_data: OrderCreate, foods: dict, user_id: int) -> Order:
+    """
+    Price a cart against `foods` (food id -> Food) and build the pending
+    order with its items. Raises 404/400 for missing or unavailable foods.
+    """
     # Calculate subtotal from items
     subtotal = 0.0
     order_items = []
     
     for item in order_data.items:
-        food = db.query(Food).filter(Food.id == item.food_id).first()
+        food = foods.get(item.food_id)
         if not food:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -44,19 +40,17 @@ def create_order(
         
         item_total = food.price * item.quantity
         subtotal += item_total
-        order_items.append({
-            "food": food,
-            "quantity": item.quantity,
-            "price": food.price
-        })
+        order_items.append(
+            OrderItem(food_id=food.id, food=food, quantity=item.quantity, price=food.price)
+        )
     
     # Calculate totals
     totals = calculate_order_total(subtotal)
     
-    # Create order
-    new_order = Order(
+    # Create order - on PostgreSQL the items go out as one multi-row INSERT
+    return Order(
         order_number=generate_order_number(),
-        user_id=current_user.id,
+        user_id=user_id,
         delivery_address=order_data.delivery_address,
         delivery_city=order_data.delivery_city,
         delivery_zip=order_data.delivery_zip,
@@ -67,117 +61,84 @@ def create_order(
         total=totals["total"],
         payment_method=order_data.payment_method,
         notes=order_data.notes,
-        status=OrderStatus.PENDING
+        status=OrderStatus.PENDING,
+        items=order_items
     )
+
+
+@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+def create_order(
+    order_data: OrderCreate,
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Create a new order"""
+    if not order_data.items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Order must have at least one item"
+        )
+    
+    # Load every food in the cart with one IN query. FOR SHARE keeps price and
+    # availability fixed until the order commits; ordering by id gives
+    # concurrent checkouts a consistent lock order.
+    food_ids = {item.food_id for item in order_data.items}
+    foods = {
+        food.id: food
+        for food in db.query(Food)
+        .filter(Food.id.in_(food_ids))
+        .order_by(Food.id)
+        .with_for_update(read=True)
+        .all()
+    }
+    
+    new_order = build_order(order_data, foods, current_user.id)
     
     db.add(new_order)
-    db.flush()  # Get order ID
-    
-    # Create order items
-    for item_data in order_items:
-        order_item = OrderItem(
-            order_id=new_order.id,
-            food_id=item_data["food"].id,
-            quantity=item_data["quantity"],
-            price=item_data["price"]
-        )
-        db.add(order_item)
+    db.flush()
+    rollups.apply(db, rollups.order_created(db, new_order))
+    
+    # Encode from in-memory state; commit expires the instances
+    content = to_json(OrderResponse, new_order)
     
     db.commit()
-    db.refresh(new_order)
-    
-    # Build response
-    items_response = [
-        OrderItemResponse(
-            id=item.id,
-            food_id=item.food_id,
-            quantity=item.quantity,
-            price=item.price,
-            food_name=item.food.name if item.food else None
-        )
-        for item in new_order.items
-    ]
-    
-    return OrderResponse(
-        id=new_order.id,
-        order_number=new_order.order_number,
-        user_id=new_order.user_id,
-        delivery_address=new_order.delivery_address,
-        delivery_city=new_order.delivery_city,
-        delivery_zip=new_order.delivery_zip,
-        delivery_phone=new_order.delivery_phone,
-        subtotal=new_order.subtotal,
-        delivery_fee=new_order.delivery_fee,
-        tax=new_order.tax,
-        total=new_order.total,
-        payment_method=new_order.payment_method,
-        notes=new_order.notes,
-        status=new_order.status,
-        created_at=new_order.created_at,
-        updated_at=new_order.updated_at,
-        delivered_at=new_order.delivered_at,
-        items=items_response
-    )
+    # Order history reads stay on the primary until replicas have this order
+    mark_write(user_scope(current_user.id))
+    
+    return json_response(content, status_code=status.HTTP_201_CREATED)
 
 
 @router.get("/", response_model=list[OrderResponse])
 def get_my_orders(
+    response: Response,
     status: Optional[OrderStatus] = Query(None, description="Filter by status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: Session = Depends(get_user_read_db)
 ):
     """Get current user's orders"""
-    query = db.query(Order).filter(Order.user_id == current_user.id)
+    query = orders_query(db).filter(Order.user_id == current_user.id)
     
     if status:
         query = query.filter(Order.status == status)
     
-    orders = query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
-    
-    return [
-        OrderResponse(
-            id=order.id,
-            order_number=order.order_number,
-            user_id=order.user_id,
-            delivery_address=order.delivery_address,
-            delivery_city=order.delivery_city,
-            delivery_zip=order.delivery_zip,
-            delivery_phone=order.delivery_phone,
-            subtotal=order.subtotal,
-            delivery_fee=order.delivery_fee,
-            tax=order.tax,
-            total=order.total,
-            payment_method=order.payment_method,
-            notes=order.notes,
-            status=order.status,
-            created_at=order.created_at,
-            updated_at=order.updated_at,
-            delivered_at=order.delivered_at,
-            items=[
-                OrderItemResponse(
-                    id=item.id,
-                    food_id=item.food_id,
-                    quantity=item.quantity,
-                    price=item.price,
-                    food_name=item.food.name if item.food else None
-                )
-                for item in order.items
-            ]
-        )
-        for order in orders
-    ]
+    orders = paginate(
+        query, response, (Order.created_at, Order.id), cursor, skip, limit, descending=True
+    )
+    
+    return json_response(to_json(list[OrderResponse], orders), response)
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
 def get_order(
     order_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: Session = Depends(get_user_read_db)
 ):
     """Get a specific order"""
-    order = db.query(Order).filter(
+    order = orders_query(db).filter(
         Order.id == order_id,
         Order.user_id == current_user.id
     ).first()
@@ -188,41 +149,13 @@ def get_order(
             detail="Order not found"
         )
     
-    return OrderResponse(
-        id=order.id,
-        order_number=order.order_number,
-        user_id=order.user_id,
-        delivery_address=order.delivery_address,
-        delivery_city=order.delivery_city,
-        delivery_zip=order.delivery_zip,
-        delivery_phone=order.delivery_phone,
-        subtotal=order.subtotal,
-        delivery_fee=order.delivery_fee,
-        tax=order.tax,
-        total=order.total,
-        payment_method=order.payment_method,
-        notes=order.notes,
-        status=order.status,
-        created_at=order.created_at,
-        updated_at=order.updated_at,
-        delivered_at=order.delivered_at,
-        items=[
-            OrderItemResponse(
-                id=item.id,
-                food_id=item.food_id,
-                quantity=item.quantity,
-                price=item.price,
-                food_name=item.food.name if item.food else None
-            )
-            for item in order.items
-        ]
-    )
+    return json_response(to_json(OrderResponse, order))
 
 
 @router.post("/{order_id}/cancel")
 def cancel_order(
     order_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Cancel an order (only if pending)"""
@@ -243,7 +176,13 @@ def cancel_order(
             detail="Only pending orders can be cancelled"
         )
     
-    order.status = OrderStatus.CANCELLED
+    if db.execute(order_status_update(order, OrderStatus.CANCELLED)).rowcount != 1:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Order status changed, try again"
+        )
+    rollups.apply(db, rollups.order_status_changed(db, order, OrderStatus.PENDING))
     db.commit()
+    mark_write(user_scope(current_user.id))
     
     return {"message": "Order cancelled successfully"}
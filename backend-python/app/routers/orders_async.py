@@ -0,0 +1,148 @@
+"""
+Order endpoints on the async engine, used when DATABASE_MODE=async.
+
+Same paths and responses as app.routers.orders. Relationships are always
+eager-loaded because a lazy load cannot run inside the event loop.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.database import get_async_db, mark_write_async
+from app.models.food import Food
+from app.models.order import Order, OrderStatus
+from app.schemas.order import OrderCreate, OrderResponse
+from app.schemas.user import CurrentUser
+from app.routers.orders import build_order
+from app.utils.security import get_current_principal_async, get_async_user_read_db, user_scope
+from app.utils.queries import order_options, order_status_update
+from app.utils.pagination import page_query, set_next_cursor
+from app.utils.serialization import to_json, json_response
+from app.utils import rollups
+
+router = APIRouter(prefix="/api/orders", tags=["Orders"])
+
+
+@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+async def create_order(
+    order_data: OrderCreate,
+    current_user: CurrentUser = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create a new order"""
+    if not order_data.items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Order must have at least one item"
+        )
+    
+    # One IN query with FOR SHARE, in id order (see orders.create_order)
+    food_ids = {item.food_id for item in order_data.items}
+    result = await db.execute(
+        select(Food)
+        .where(Food.id.in_(food_ids))
+        .order_by(Food.id)
+        .with_for_update(read=True)
+    )
+    foods = {food.id: food for food in result.scalars().all()}
+    
+    new_order = build_order(order_data, foods, current_user.id)
+    
+    db.add(new_order)
+    await db.flush()
+    await rollups.apply_async(db, rollups.order_created(db, new_order))
+    
+    # Items hold their foods, so nothing is lazy-loaded while encoding
+    content = to_json(OrderResponse, new_order)
+    
+    await db.commit()
+    await mark_write_async(user_scope(current_user.id))
+    
+    return json_response(content, status_code=status.HTTP_201_CREATED)
+
+
+@router.get("/", response_model=list[OrderResponse])
+async def get_my_orders(
+    response: Response,
+    status: Optional[OrderStatus] = Query(None, description="Filter by status"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    current_user: CurrentUser = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_user_read_db)
+):
+    """Get current user's orders"""
+    query = select(Order).options(*order_options()).where(Order.user_id == current_user.id)
+    
+    if status:
+        query = query.where(Order.status == status)
+    
+    keys = (Order.created_at, Order.id)
+    result = await db.execute(page_query(query, keys, cursor, skip, limit, descending=True))
+    orders = result.scalars().all()
+    set_next_cursor(response, orders, keys, limit)
+    
+    return json_response(to_json(list[OrderResponse], orders), response)
+
+
+@router.get("/{order_id}", response_model=OrderResponse)
+async def get_order(
+    order_id: int,
+    current_user: CurrentUser = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_user_read_db)
+):
+    """Get a specific order"""
+    result = await db.execute(
+        select(Order).options(*order_options()).where(
+            Order.id == order_id,
+            Order.user_id == current_user.id
+        )
+    )
+    order = result.scalars().first()
+    
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+    
+    return json_response(to_json(OrderResponse, order))
+
+
+@router.post("/{order_id}/cancel")
+async def cancel_order(
+    order_id: int,
+    current_user: CurrentUser = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Cancel an order (only if pending)"""
+    result = await db.execute(
+        select(Order).where(
+            Order.id == order_id,
+            Order.user_id == current_user.id
+        )
+    )
+    order = result.scalars().first()
+    
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+    
+    if order.status != OrderStatus.PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only pending orders can be cancelled"
+        )
+    
+    if (await db.execute(order_status_update(order, OrderStatus.CANCELLED))).rowcount != 1:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Order status changed, try again"
+        )
+    await rollups.apply_async(db, rollups.order_status_changed(db, order, OrderStatus.PENDING))
+    await db.commit()
+    await mark_write_async(user_scope(current_user.id))
+    
+    return {"message": "Order cancelled successfully"}
@@ -8,23 +8,27 @@ from app.utils.security import get_current_user, get_password_hash
 router = APIRouter(prefix="/api/users", tags=["Users"])
 
 
+def profile_response(user: User) -> UserResponse:
+    """A user's profile, with the role names"""
+    return UserResponse(
+        id=user.id,
+        email=user.email,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        phone=user.phone,
+        address=user.address,
+        city=user.city,
+        zip_code=user.zip_code,
+        is_active=user.is_active,
+        created_at=user.created_at,
+        roles=[r.role.value for r in user.roles]
+    )
+
+
 @router.get("/me", response_model=UserResponse)
 def get_current_user_profile(current_user: User = Depends(get_current_user)):
     """Get current user's profile"""
-    roles = [r.role.value for r in current_user.roles]
-    return UserResponse(
-        id=current_user.id,
-        email=current_user.email,
-        first_name=current_user.first_name,
-        last_name=current_user.last_name,
-        phone=current_user.phone,
-        address=current_user.address,
-        city=current_user.city,
-        zip_code=current_user.zip_code,
-        is_active=current_user.is_active,
-        created_at=current_user.created_at,
-        roles=roles
-    )
+    return profile_response(current_user)
 
 
 @router.put("/me", response_model=UserResponse)
@@ -42,20 +46,7 @@ def update_profile(
     db.commit()
     db.refresh(current_user)
     
-    roles = [r.role.value for r in current_user.roles]
-    return UserResponse(
-        id=current_user.id,
-        email=current_user.email,
-        first_name=current_user.first_name,
-        last_name=current_user.last_name,
-        phone=current_user.phone,
-        address=current_user.address,
-        city=current_user.city,
-        zip_code=current_user.zip_code,
-        is_active=current_user.is_active,
-        created_at=current_user.created_at,
-        roles=roles
-    )
+    return profile_response(current_user)
 
 
 @router.put("/me/password")
@@ -68,7 +59,11 @@ def change_password(
     """Change current user's password"""
     from app.utils.security import verify_password
     
-    if not verify_password(current_password, current_user.hashed_password):
+    hashed_password = current_user.hashed_password
+    # Release the pooled connection while bcrypt runs
+    db.rollback()
+    
+    if not verify_password(current_password, hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
@@ -0,0 +1,67 @@
+"""
+Profile endpoints on the async engine, used when DATABASE_MODE=async.
+
+Same paths and responses as app.routers.users; only the database access and
+the password pool wait differ.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.models.user import User
+from app.schemas.user import UserResponse, UserUpdate
+from app.routers.users import profile_response
+from app.utils.security import get_current_user_async, get_password_hash_async, verify_and_update_password_async
+
+router = APIRouter(prefix="/api/users", tags=["Users"])
+
+
+@router.get("/me", response_model=UserResponse)
+async def get_current_user_profile(current_user: User = Depends(get_current_user_async)):
+    """Get current user's profile"""
+    return profile_response(current_user)
+
+
+@router.put("/me", response_model=UserResponse)
+async def update_profile(
+    user_data: UserUpdate,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Update current user's profile"""
+    update_data = user_data.model_dump(exclude_unset=True)
+    
+    for field, value in update_data.items():
+        setattr(current_user, field, value)
+    
+    # Instances are not expired on commit, so the roles stay loaded
+    await db.commit()
+    
+    return profile_response(current_user)
+
+
+@router.put("/me/password")
+async def change_password(
+    current_password: str,
+    new_password: str,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Change current user's password"""
+    user_id, hashed_password = current_user.id, current_user.hashed_password
+    # Release the pooled connection while bcrypt runs
+    await db.rollback()
+    
+    verified, _ = await verify_and_update_password_async(current_password, hashed_password)
+    if not verified:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Current password is incorrect"
+        )
+    
+    await db.execute(
+        update(User).where(User.id == user_id).values(hashed_password=await get_password_hash_async(new_password))
+    )
+    await db.commit()
+    
+    return {"message": "Password updated successfully"}
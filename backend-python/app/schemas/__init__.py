@@ -1,15 +1,21 @@
 from app.schemas.user import (
-    UserCreate, UserUpdate, UserResponse, UserLogin, Token, TokenData
+    UserCreate, UserUpdate, UserResponse, UserLogin, Token, TokenData, CurrentUser
 )
 from app.schemas.food import (
-    FoodCreate, FoodUpdate, FoodResponse, CategoryCreate, CategoryResponse
+    FoodCreate, FoodUpdate, FoodResponse, FoodSort, FoodSuggestion, CategoryCreate, CategoryResponse,
+    FoodFileFormat, FoodImportMode, FoodImportError, FoodImportBatch, FoodImportReport
 )
 from app.schemas.order import (
-    OrderCreate, OrderUpdate, OrderResponse, OrderItemCreate, OrderItemResponse
+    OrderCreate, OrderUpdate, OrderResponse, OrderItemCreate, OrderItemResponse, OrderExportFormat
+)
+from app.schemas.analytics import (
+    SalesBucketResponse, FoodSalesBucketResponse, CategorySalesBucketResponse
 )
 
 __all__ = [
-    "UserCreate", "UserUpdate", "UserResponse", "UserLogin", "Token", "TokenData",
-    "FoodCreate", "FoodUpdate", "FoodResponse", "CategoryCreate", "CategoryResponse",
-    "OrderCreate", "OrderUpdate", "OrderResponse", "OrderItemCreate", "OrderItemResponse"
+    "UserCreate", "UserUpdate", "UserResponse", "UserLogin", "Token", "TokenData", "CurrentUser",
+    "FoodCreate", "FoodUpdate", "FoodResponse", "FoodSort", "FoodSuggestion", "CategoryCreate", "CategoryResponse",
+    "FoodFileFormat", "FoodImportMode", "FoodImportError", "FoodImportBatch", "FoodImportReport",
+    "OrderCreate", "OrderUpdate", "OrderResponse", "OrderItemCreate", "OrderItemResponse", "OrderExportFormat",
+    "SalesBucketResponse", "FoodSalesBucketResponse", "CategorySalesBucketResponse"
 ]
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class SalesBucketResponse(BaseModel):
+    bucket_start: datetime
+    orders: int
+    units: int
+    revenue: float
+
+
+class FoodSalesBucketResponse(SalesBucketResponse):
+    food_id: int
+    food_name: Optional[str] = None
+    category_id: Optional[int] = None
+
+
+class CategorySalesBucketResponse(SalesBucketResponse):
+    category_id: int
+    category_name: Optional[str] = None
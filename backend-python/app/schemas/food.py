@@ -1,6 +1,22 @@
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
+import enum
+
+
+class FoodSort(str, enum.Enum):
+    ID = "id"
+    RELEVANCE = "relevance"
+
+
+class FoodFileFormat(str, enum.Enum):
+    CSV = "csv"
+    JSONL = "jsonl"
+
+
+class FoodImportMode(str, enum.Enum):
+    UPSERT = "upsert"  # update foods that already exist
+    INSERT = "insert"  # skip foods that already exist
 
 
 class CategoryBase(BaseModel):
@@ -57,3 +73,41 @@ class FoodResponse(FoodBase):
 
     class Config:
         from_attributes = True
+
+
+class FoodSuggestion(BaseModel):
+    id: int
+    name: str
+    category: Optional[str] = None
+    price: float
+    image: Optional[str] = None
+
+
+class FoodImportError(BaseModel):
+    line: int
+    error: str
+
+
+class FoodImportBatch(BaseModel):
+    batch: int
+    first_line: int
+    last_line: int
+    records: int
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    failed: int = 0
+    errors: list[FoodImportError] = []
+    # Set when the database rejected the whole batch
+    error: Optional[str] = None
+
+
+class FoodImportReport(BaseModel):
+    format: FoodFileFormat
+    mode: FoodImportMode
+    records: int = 0
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    failed: int = 0
+    batches: list[FoodImportBatch] = []
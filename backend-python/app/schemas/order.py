@@ -2,6 +2,13 @@ from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 from app.models.order import OrderStatus, PaymentMethod
+import enum
+
+
+class OrderExportFormat(str, enum.Enum):
+    CSV = "csv"  # one row per line item
+    JSONL = "jsonl"  # one order per line, items nested
+    PARQUET = "parquet"  # one row per line item, columnar (needs pyarrow)
 
 
 class OrderItemBase(BaseModel):
@@ -51,3 +51,14 @@ class TokenData(BaseModel):
     user_id: Optional[int] = None
     email: Optional[str] = None
     roles: list[str] = []
+    is_active: bool = True
+    token_version: Optional[int] = None
+    issued_at: Optional[int] = None
+
+
+class CurrentUser(BaseModel):
+    """Authenticated caller for endpoints that only need identity and roles"""
+    id: int
+    email: Optional[str] = None
+    roles: list[str] = []
+    is_active: bool = True
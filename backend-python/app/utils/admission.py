@@ -0,0 +1,98 @@
+"""
+Request admission matched to the connection pool.
+
+PoolAdmissionMiddleware caps in-flight API requests at the pool capacity.
+A sync request keeps its session's connection while it hops between
+threadpool threads (dependencies, endpoint, response validation), so with
+more requests than connections every thread can end up waiting for a
+connection held by a request that is itself waiting for a thread.
+
+The queue is bounded too: beyond DB_ADMISSION_MAX_WAITING waiting requests,
+or after DB_ADMISSION_TIMEOUT_SECONDS of waiting, requests get a 503 with
+Retry-After rather than piling up in memory.
+
+Kept apart from db_pool so app.main can install it without importing
+SQLAlchemy (see app/utils/startup.py).
+"""
+import asyncio
+import json
+from typing import Optional
+from app.config import settings
+
+_BUSY_BODY = json.dumps({"detail": "Server busy, please retry"}).encode()
+
+
+class PoolAdmissionMiddleware:
+    """ASGI middleware letting at most `limit` /api requests run at once;
+    up to `max_waiting` more wait on the event loop, which costs no thread
+    or connection, for at most `timeout_seconds`"""
+
+    def __init__(self, app, limit: int, max_waiting: int, timeout_seconds: float):
+        self.app = app
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.timeout_seconds = timeout_seconds
+        self.waiting = 0
+        self.rejected = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.limit)
+        if not await self._admit():
+            self.rejected += 1
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(_BUSY_BODY)).encode()),
+                    (b"retry-after", b"1"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": _BUSY_BODY})
+            return
+
+        held = True
+
+        def release():
+            nonlocal held
+            if held:
+                held = False
+                self._slots.release()
+
+        async def send_releasing(message):
+            # Dependencies (and their sessions) are closed before a response
+            # starts, so the slot is freed then; a streamed body such as an
+            # export reads through its own session and doesn't hold it for
+            # the whole download
+            if message["type"] == "http.response.start":
+                release()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_releasing)
+        finally:
+            release()
+
+    async def _admit(self) -> bool:
+        if self._slots.locked() and self.waiting >= self.max_waiting:
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout_seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+
+
+def admission_limit() -> int:
+    """DB_ADMISSION_LIMIT, defaulting to the pool capacity of one engine"""
+    if settings.DB_ADMISSION_LIMIT is not None:
+        return settings.DB_ADMISSION_LIMIT
+    return settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
@@ -0,0 +1,138 @@
+"""
+Sales series read from the hour/day/week bucket tables that
+app/utils/rollups.py keeps up to date.
+
+A range [start, end) covers every bucket starting in it, with the first
+bucket widened back to its boundary. Bucket times are order timestamps as
+stored (UTC for server-generated ones); timezone-aware bounds are
+converted to UTC.
+"""
+import math
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.food import Food, Category
+from app.models.rollup import Granularity, OrderSalesBucket, FoodSalesBucket, CategorySalesBucket
+from app.utils.rollups import BUCKET_STEPS, bucket_start
+
+
+def naive_utc(moment: datetime) -> datetime:
+    """`moment` in UTC without tzinfo; naive moments are taken as UTC"""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def bucket_range(granularity: Granularity, start: datetime, end: datetime) -> list[datetime]:
+    """Starts of the buckets covering [start, end), at most ANALYTICS_MAX_BUCKETS"""
+    start, end = naive_utc(start), naive_utc(end)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    first, step = bucket_start(granularity, start), BUCKET_STEPS[granularity]
+    count = math.ceil((end - first) / step)
+    if count > settings.ANALYTICS_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range spans {count} {granularity.value} buckets, "
+                   f"at most {settings.ANALYTICS_MAX_BUCKETS} are allowed"
+        )
+    return [first + step * i for i in range(count)]
+
+
+def _in_range(model, granularity: Granularity, buckets: list[datetime]) -> tuple:
+    return (
+        model.granularity == granularity.value,
+        model.bucket_start >= buckets[0],
+        model.bucket_start <= buckets[-1],
+        # Buckets whose sales were all cancelled stay behind as zero rows
+        model.orders != 0,
+    )
+
+
+def _columns(model) -> tuple:
+    return model.bucket_start, model.orders, model.units, model.revenue
+
+
+def _values(row) -> dict:
+    return {"orders": row.orders, "units": row.units, "revenue": round(row.revenue, 2)}
+
+
+def sales_series(db: Session, granularity: Granularity, start: datetime, end: datetime) -> list[dict]:
+    """Orders, units and revenue of every bucket in the range, empty ones included"""
+    buckets = bucket_range(granularity, start, end)
+    rows = {
+        row.bucket_start: row
+        for row in db.execute(
+            select(*_columns(OrderSalesBucket)).where(*_in_range(OrderSalesBucket, granularity, buckets))
+        )
+    }
+    return [
+        {"bucket_start": bucket, **(_values(rows[bucket]) if bucket in rows else {"orders": 0, "units": 0, "revenue": 0.0})}
+        for bucket in buckets
+    ]
+
+
+def food_series(
+    db: Session,
+    granularity: Granularity,
+    start: datetime,
+    end: datetime,
+    food_id: Optional[int] = None,
+    category_id: Optional[int] = None
+) -> list[dict]:
+    """Per-food sales of the buckets in the range that had any"""
+    buckets = bucket_range(granularity, start, end)
+    query = (
+        select(*_columns(FoodSalesBucket), FoodSalesBucket.food_id, Food.name, Food.category_id)
+        .outerjoin(Food, Food.id == FoodSalesBucket.food_id)
+        .where(*_in_range(FoodSalesBucket, granularity, buckets))
+        .order_by(FoodSalesBucket.bucket_start, FoodSalesBucket.food_id)
+    )
+    if food_id is not None:
+        query = query.where(FoodSalesBucket.food_id == food_id)
+    if category_id is not None:
+        query = query.where(Food.category_id == category_id)
+    return [
+        {
+            "bucket_start": row.bucket_start,
+            "food_id": row.food_id,
+            "food_name": row.name,
+            "category_id": row.category_id,
+            **_values(row),
+        }
+        for row in db.execute(query)
+    ]
+
+
+def category_series(
+    db: Session,
+    granularity: Granularity,
+    start: datetime,
+    end: datetime,
+    category_id: Optional[int] = None
+) -> list[dict]:
+    """Per-category sales of the buckets in the range that had any"""
+    buckets = bucket_range(granularity, start, end)
+    query = (
+        select(*_columns(CategorySalesBucket), CategorySalesBucket.category_id, Category.name)
+        .outerjoin(Category, Category.id == CategorySalesBucket.category_id)
+        .where(*_in_range(CategorySalesBucket, granularity, buckets))
+        .order_by(CategorySalesBucket.bucket_start, CategorySalesBucket.category_id)
+    )
+    if category_id is not None:
+        query = query.where(CategorySalesBucket.category_id == category_id)
+    return [
+        {
+            "bucket_start": row.bucket_start,
+            "category_id": row.category_id,
+            "category_name": row.name,
+            **_values(row),
+        }
+        for row in db.execute(query)
+    ]
@@ -0,0 +1,304 @@
+"""
+Process-local autocomplete index for the menu search box.
+
+Every word of an available food's name, and of its category's name, points
+to a posting list of foods sorted by a static rank (rating, then review
+count, then name). The best foods for a prefix are a merge of the posting
+lists of the words in the prefix's range of the sorted vocabulary, and the
+result is memoized per prefix, so a keystroke is usually one dict lookup.
+Name matches come before category matches. Multi-word queries intersect
+the (memoized) id sets of each word's prefix, matching names or categories
+alike, and a last word with no prefix match falls back to trigram
+similarity to absorb typos.
+
+The index is built from the Food and Category tables at startup. Admin
+food mutations update it in place on the worker that made them; other
+workers see the menu cache version move and rebuild it on their next
+autocomplete request, one request at a time while the others keep serving
+the previous index.
+"""
+import bisect
+import heapq
+import threading
+from collections import Counter, OrderedDict
+from itertools import islice
+from typing import Iterator, Optional
+from sqlalchemy import select
+from app.database import SessionLocal
+from app.models.food import Food, Category
+from app.utils.cache import menu_cache
+from app.utils.search import FUZZY_MIN_LENGTH, FUZZY_MIN_SIMILARITY, terms, trigrams
+
+# Upper bound of the `limit` parameter, and the length of memoized top lists
+MAX_SUGGESTIONS = 20
+# Prefix id sets kept for multi-word queries (least recently used dropped)
+MAX_MEMOIZED_ID_SETS = 1024
+# Multi-word matches up to this many are ranked directly; beyond it the
+# best foods are found by walking the rarest word's postings in rank order
+DIRECT_RANK_LIMIT = 256
+
+
+def _rank(rating: Optional[float], reviews_count: Optional[int], name: str, food_id: int) -> tuple:
+    return (-(rating or 0.0), -(reviews_count or 0), name.lower(), food_id)
+
+
+class WordIndex:
+    """Word -> rank-sorted posting list, with the best foods per prefix memoized"""
+
+    def __init__(self):
+        self.postings: dict[str, list[tuple]] = {}
+        self.words: list[str] = []
+        self.trigrams: dict[str, set[str]] = {}
+        self.by_trigram: dict[str, set[str]] = {}
+        self.best_by_prefix: dict[str, list[int]] = {}
+        self.ids_by_prefix: OrderedDict[str, frozenset] = OrderedDict()
+
+    def load(self, pairs) -> None:
+        """Fill an empty index from (word, rank) pairs"""
+        for word, rank in pairs:
+            self.postings.setdefault(word, []).append(rank)
+        for word, posting in self.postings.items():
+            posting.sort()
+            self.trigrams[word] = trigrams(word)
+            for trigram in self.trigrams[word]:
+                self.by_trigram.setdefault(trigram, set()).add(word)
+        self.words = sorted(self.postings)
+
+    def add(self, word: str, rank: tuple) -> None:
+        posting = self.postings.get(word)
+        if posting is None:
+            posting = self.postings[word] = []
+            bisect.insort(self.words, word)
+            self.trigrams[word] = trigrams(word)
+            for trigram in self.trigrams[word]:
+                self.by_trigram.setdefault(trigram, set()).add(word)
+        bisect.insort(posting, rank)
+        self._forget(word)
+
+    def remove(self, word: str, rank: tuple) -> None:
+        posting = self.postings[word]
+        del posting[bisect.bisect_left(posting, rank)]
+        if not posting:
+            del self.postings[word]
+            del self.words[bisect.bisect_left(self.words, word)]
+            for trigram in self.trigrams.pop(word):
+                self.by_trigram[trigram].discard(word)
+        self._forget(word)
+
+    def _forget(self, word: str) -> None:
+        """Drop memoized results of every prefix of `word`"""
+        for end in range(1, len(word) + 1):
+            self.best_by_prefix.pop(word[:end], None)
+            self.ids_by_prefix.pop(word[:end], None)
+
+    def _range(self, prefix: str) -> list[str]:
+        start = bisect.bisect_left(self.words, prefix)
+        return self.words[start:bisect.bisect_left(self.words, prefix + "\U0010ffff", start)]
+
+    def _merge(self, words) -> Iterator[int]:
+        seen = set()
+        for rank in heapq.merge(*(self.postings[word] for word in words)):
+            food_id = rank[-1]
+            if food_id not in seen:
+                seen.add(food_id)
+                yield food_id
+
+    def ranked(self, prefix: str) -> Iterator[int]:
+        """Every food with a word starting with `prefix`, best first"""
+        return self._merge(self._range(prefix))
+
+    def best(self, prefix: str) -> list[int]:
+        """The first MAX_SUGGESTIONS of ranked(prefix), memoized"""
+        best = self.best_by_prefix.get(prefix)
+        if best is None:
+            best = self.best_by_prefix[prefix] = list(islice(self.ranked(prefix), MAX_SUGGESTIONS))
+        return best
+
+    def ids(self, prefix: str) -> frozenset:
+        """Ids of every food with a word starting with `prefix`, memoized"""
+        ids = self.ids_by_prefix.get(prefix)
+        if ids is None:
+            ids = frozenset(rank[-1] for word in self._range(prefix) for rank in self.postings[word])
+            self.ids_by_prefix[prefix] = ids
+            if len(self.ids_by_prefix) > MAX_MEMOIZED_ID_SETS:
+                self.ids_by_prefix.popitem(last=False)
+        else:
+            self.ids_by_prefix.move_to_end(prefix)
+        return ids
+
+    def similar(self, term: str) -> Iterator[int]:
+        """Foods with a word within trigram similarity of `term`, best first"""
+        term_trigrams = trigrams(term)
+        shared = Counter()
+        for trigram in term_trigrams:
+            shared.update(self.by_trigram.get(trigram, ()))
+        return self._merge(
+            word for word, count in shared.items()
+            if count / (len(term_trigrams) + len(self.trigrams[word]) - count) >= FUZZY_MIN_SIMILARITY
+        )
+
+
+class AutocompleteIndex:
+    """Name and category word indexes over the available foods"""
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self._foods: dict[int, dict] = {}
+        self._names = WordIndex()
+        self._categories = WordIndex()
+        self._words = WordIndex()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._foods)
+
+    def _entry(self, row) -> dict:
+        food_id, name, rating, reviews_count, price, image, category = row
+        name_words, category_words = set(terms(name)), set(terms(category or ""))
+        return {
+            "suggestion": {"id": food_id, "name": name, "category": category, "price": price, "image": image},
+            "rank": _rank(rating, reviews_count, name, food_id),
+            "name_words": name_words,
+            "category_words": category_words,
+            "words": tuple(name_words | category_words),
+        }
+
+    def _add(self, row) -> None:
+        entry = self._foods[row[0]] = self._entry(row)
+        rank, name_words, category_words = entry["rank"], entry["name_words"], entry["category_words"]
+        for word in name_words:
+            self._names.add(word, rank)
+        for word in category_words:
+            self._categories.add(word, rank)
+        for word in name_words | category_words:
+            self._words.add(word, rank)
+
+    def _remove(self, food_id: int) -> None:
+        entry = self._foods.pop(food_id, None)
+        if entry is None:
+            return
+        for word in entry["name_words"]:
+            self._names.remove(word, entry["rank"])
+        for word in entry["category_words"]:
+            self._categories.remove(word, entry["rank"])
+        for word in entry["words"]:
+            self._words.remove(word, entry["rank"])
+
+    def build(self, rows, version: Optional[int]) -> None:
+        """Replace the contents with (id, name, rating, reviews_count, price,
+        image, category name) rows of the available foods"""
+        fresh = AutocompleteIndex()
+        fresh._foods = {row[0]: fresh._entry(row) for row in rows}
+        entries = fresh._foods.values()
+        fresh._names.load((word, entry["rank"]) for entry in entries for word in entry["name_words"])
+        fresh._categories.load((word, entry["rank"]) for entry in entries for word in entry["category_words"])
+        fresh._words.load((word, entry["rank"]) for entry in entries for word in entry["words"])
+        # Warm the shortest prefixes, which the first keystroke always hits
+        for index in (fresh._names, fresh._categories):
+            for prefix in {word[:length] for word in index.words for length in (1, 2)}:
+                index.best(prefix)
+        with self._lock:
+            self._foods, self._names, self._categories, self._words = (
+                fresh._foods, fresh._names, fresh._categories, fresh._words
+            )
+            self.version = version
+
+    def update(self, food_id: int, row, version: int) -> bool:
+        """Apply one food change made under menu cache `version`; False when
+        the index had missed an earlier change and needs a rebuild"""
+        with self._lock:
+            if self.version is None or self.version != version - 1:
+                return False
+            self._remove(food_id)
+            if row is not None:
+                self._add(row)
+            self.version = version
+            return True
+
+    def _matches(self, food_id: int, tokens: list[str]) -> bool:
+        words = self._foods[food_id]["words"]
+        return all(any(word.startswith(token) for word in words) for token in tokens)
+
+    def _single(self, term: str, limit: int) -> list[int]:
+        found = dict.fromkeys(self._names.best(term))
+        found.update(dict.fromkeys(self._categories.best(term)))
+        return list(found)[:limit]
+
+    def _multiple(self, tokens: list[str], limit: int) -> list[int]:
+        rarest, *others = sorted(tokens, key=lambda token: len(self._words.ids(token)))
+        candidates = self._words.ids(rarest).intersection(*(self._words.ids(token) for token in others))
+        if len(candidates) <= DIRECT_RANK_LIMIT:
+            return heapq.nsmallest(limit, candidates, key=lambda food_id: self._foods[food_id]["rank"])
+        return list(islice((food_id for food_id in self._words.ranked(rarest) if food_id in candidates), limit))
+
+    def suggest(self, text: str, limit: int = 8) -> list[dict]:
+        """Up to `limit` foods whose words start with the words of `text`"""
+        tokens = terms(text)
+        if not tokens:
+            return []
+        *leading, last = tokens
+        limit = min(limit, MAX_SUGGESTIONS)
+        with self._lock:
+            found = self._multiple(tokens, limit) if leading else self._single(last, limit)
+            if not found and len(last) >= FUZZY_MIN_LENGTH:
+                found = list(islice(
+                    (food_id for food_id in self._names.similar(last) if self._matches(food_id, leading)),
+                    limit
+                ))
+            return [self._foods[food_id]["suggestion"] for food_id in found]
+
+
+autocomplete_index = AutocompleteIndex()
+
+
+def _rows(db, *where):
+    return db.execute(
+        select(Food.id, Food.name, Food.rating, Food.reviews_count, Food.price, Food.image, Category.name)
+        .join(Category, Category.id == Food.category_id)
+        .where(Food.is_available == True, *where)
+    ).all()
+
+
+# Held while the index is rebuilt, so a menu change costs one rebuild per
+# worker rather than one per autocomplete request that notices it
+_rebuild_lock = threading.Lock()
+
+
+def _build() -> None:
+    version = menu_cache.version()
+    db = SessionLocal()
+    try:
+        autocomplete_index.build(_rows(db), version)
+    finally:
+        db.close()
+
+
+def rebuild() -> None:
+    """Load the index from the database"""
+    with _rebuild_lock:
+        _build()
+
+
+def ensure_current() -> None:
+    """
+    Rebuild when the menu changed somewhere this index didn't see. One
+    request rebuilds; the others keep serving the previous index meanwhile,
+    or wait for it if nothing was built yet.
+    """
+    if autocomplete_index.version == menu_cache.version():
+        return
+    if not _rebuild_lock.acquire(blocking=autocomplete_index.version is None):
+        return
+    try:
+        # Another request may have rebuilt it while this one waited
+        if autocomplete_index.version != menu_cache.version():
+            _build()
+    finally:
+        _rebuild_lock.release()
+
+
+def food_changed(db, food_id: int) -> None:
+    """Apply a committed create, update or delete of a food; call after
+    invalidating the menu cache"""
+    rows = _rows(db, Food.id == food_id)
+    autocomplete_index.update(food_id, rows[0] if rows else None, menu_cache.version())
@@ -0,0 +1,387 @@
+import logging
+import pickle
+from abc import ABC, abstractmethod
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from anyio import to_thread
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl_seconds` after being set"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or `default` if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# ==================== Backends ====================
+
+class CacheUnavailable(Exception):
+    """The backend could not be reached. Unlike a miss, says nothing about the key."""
+
+
+class CacheBackend(ABC):
+    """
+    Key/value store behind the cache namespaces.
+
+    get() and set() treat backend errors as misses, which suits cached
+    copies of database data. Callers for which a missing entry means
+    something (a recorded revocation, say) use fetch() and store(), which
+    raise CacheUnavailable instead. Counters always raise it, as a lost
+    increment or a counter read as 0 would bring back stale entries.
+    """
+
+    name = "base"
+    # Shared backends are visible to every worker; local ones only to this process
+    shared = False
+
+    @abstractmethod
+    def fetch(self, key: str) -> Any:
+        """The stored value, or None if there is none; raises CacheUnavailable"""
+
+    @abstractmethod
+    def store(self, key: str, value: Any, ttl_seconds: float) -> None:
+        """Store a value; raises CacheUnavailable"""
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        """Increment a counter and return its new value; raises CacheUnavailable"""
+
+    @abstractmethod
+    def get_counter(self, key: str) -> int:
+        """A counter's value, 0 if never incremented; raises CacheUnavailable"""
+
+    def get(self, key: str) -> Any:
+        try:
+            return self.fetch(key)
+        except CacheUnavailable:
+            return None
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        try:
+            self.store(key, value, ttl_seconds)
+        except CacheUnavailable:
+            pass
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process backend for single-worker deployments"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        self._entries = TTLCache(max_entries, ttl_seconds=0)
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, key: str) -> Any:
+        return self._entries.get(key)
+
+    def store(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self._entries.set(key, value, ttl_seconds)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Backend for any server speaking the Redis protocol. Values are pickled.
+    Connection errors are logged; get() and set() then treat them as cache
+    misses so an outage degrades to database reads instead of failing
+    requests.
+    """
+
+    name = "redis"
+    shared = True
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from exc
+        self._errors = (redis.RedisError,)
+        self._client = redis.Redis.from_url(
+            url,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS
+        )
+
+    def fetch(self, key: str) -> Any:
+        try:
+            raw = self._client.get(key)
+        except self._errors as exc:
+            logger.warning("Cache get failed for %s: %s", key, exc)
+            raise CacheUnavailable(str(exc)) from exc
+        return pickle.loads(raw) if raw is not None else None
+
+    def store(self, key: str, value: Any, ttl_seconds: float) -> None:
+        try:
+            self._client.set(
+                key,
+                pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+                px=max(1, int(ttl_seconds * 1000))
+            )
+        except self._errors as exc:
+            logger.warning("Cache set failed for %s: %s", key, exc)
+            raise CacheUnavailable(str(exc)) from exc
+
+    def incr(self, key: str) -> int:
+        try:
+            return self._client.incr(key)
+        except self._errors as exc:
+            logger.warning("Cache incr failed for %s: %s", key, exc)
+            raise CacheUnavailable(str(exc)) from exc
+
+    def get_counter(self, key: str) -> int:
+        try:
+            return int(self._client.get(key) or 0)
+        except self._errors as exc:
+            logger.warning("Cache counter read failed for %s: %s", key, exc)
+            raise CacheUnavailable(str(exc)) from exc
+
+
+def create_backend(name: str = None) -> CacheBackend:
+    """Build the backend selected by CACHE_BACKEND"""
+    name = name or settings.CACHE_BACKEND
+    if name == "memory":
+        return MemoryBackend(settings.CACHE_MEMORY_MAX_ENTRIES)
+    if name == "redis":
+        return RedisBackend(settings.REDIS_URL)
+    raise ValueError(f"Unknown cache backend: {name}")
+
+
+# ==================== Namespaces ====================
+
+class NamespacedCache:
+    """
+    A group of related entries that is invalidated as a unit.
+
+    Lookups go to a per-process TTLCache first, then to the backend when it
+    is shared (a local backend would only duplicate the per-process cache).
+    Invalidation bumps a version counter stored in the backend. Each worker
+    re-reads that counter at most every `version_poll_seconds` and drops its
+    local entries when it moved, so an invalidation on one worker reaches all
+    others within that delay. Shared entries are keyed by version, so stale
+    ones are never read again and simply expire.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        backend: CacheBackend,
+        max_entries: int,
+        ttl_seconds: float,
+        version_poll_seconds: float
+    ):
+        self.namespace = namespace
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.version_poll_seconds = version_poll_seconds
+        self.local = TTLCache(max_entries, ttl_seconds)
+        self.enabled = max_entries > 0
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self._version = 0
+        self._version_checked_at = float("-inf")
+        self._version_lock = threading.Lock()
+
+    @property
+    def _version_key(self) -> str:
+        return f"{self.namespace}:version"
+
+    def _version_is_fresh(self) -> bool:
+        return time.monotonic() - self._version_checked_at < self.version_poll_seconds
+
+    def _current_version(self) -> int:
+        if self._version_is_fresh():
+            return self._version
+        # One caller polls; the others keep using the current version meanwhile.
+        # The lock is never held across backend I/O, as the event loop takes it.
+        with self._version_lock:
+            if self._version_is_fresh():
+                return self._version
+            polled_at = self._version_checked_at = time.monotonic()
+        try:
+            version = self.backend.get_counter(self._version_key)
+        except CacheUnavailable:
+            # Keep the last known version (an older one could bring back
+            # stale shared entries) and retry at the next poll
+            return self._version
+        with self._version_lock:
+            # Unless an invalidate() on this worker got there first
+            if self._version_checked_at == polled_at and version != self._version:
+                self.local.clear()
+                self._version = version
+        return self._version
+
+    def _backend_key(self, version: int, key: Hashable) -> str:
+        return f"{self.namespace}:{version}:{key!r}"
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or `default` on a miss"""
+        if not self.enabled:
+            return default
+        version = self._current_version()
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        return self._get_shared(key, version, default)
+
+    def _get_shared(self, key: Hashable, version: int, default: Any) -> Any:
+        if self.backend.shared:
+            value = self.backend.get(self._backend_key(version, key))
+            if value is not None:
+                self.shared_hits += 1
+                self._set_local(key, value, version)
+                return value
+            self.shared_misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, version: int) -> None:
+        """
+        Store a value locally and in the shared backend.
+
+        `version` is what version() returned before the value was read from
+        the database. If the namespace was invalidated since, the value may
+        predate the change and is not stored.
+        """
+        if not self.enabled or self._current_version() != version:
+            return
+        if self._set_local(key, value, version) and self.backend.shared:
+            self.backend.set(self._backend_key(version, key), value, self.ttl_seconds)
+
+    def _set_local(self, key: Hashable, value: Any, version: int) -> bool:
+        # Under the lock a version change cannot clear the local cache between
+        # the check and the store
+        with self._version_lock:
+            if self._version != version:
+                return False
+            self.local.set(key, value)
+            return True
+
+    def version(self) -> int:
+        """Invalidation counter, as of the last poll. Capture it before
+        reading what will be passed to set()."""
+        return self._current_version()
+
+    # Async endpoints use these. Whatever needs no backend round trip (local
+    # hits, a version polled recently, any local backend) is done inline;
+    # round trips to a shared backend run on the threadpool.
+
+    async def version_async(self) -> int:
+        """version() for the event loop"""
+        if not self.backend.shared or self._version_is_fresh():
+            return self._current_version()
+        return await to_thread.run_sync(self._current_version)
+
+    async def get_async(self, key: Hashable, default: Any = None) -> Any:
+        """get() for the event loop"""
+        if not self.enabled:
+            return default
+        version = await self.version_async()
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        if not self.backend.shared:
+            return default
+        return await to_thread.run_sync(self._get_shared, key, version, default)
+
+    async def set_async(self, key: Hashable, value: Any, version: int) -> None:
+        """set() for the event loop"""
+        if not self.enabled or await self.version_async() != version:
+            return
+        if self._set_local(key, value, version) and self.backend.shared:
+            await to_thread.run_sync(self.backend.set, self._backend_key(version, key), value, self.ttl_seconds)
+
+    def invalidate(self) -> None:
+        """Drop every entry of the namespace on all workers; raises
+        CacheUnavailable when the backend cannot record it"""
+        version = self.backend.incr(self._version_key)
+        with self._version_lock:
+            # Concurrent invalidations may finish out of order
+            self._version = max(self._version, version)
+            self._version_checked_at = time.monotonic()
+            self.local.clear()
+
+    def stats(self) -> dict:
+        """Local and shared hit/miss counters"""
+        return {
+            **self.local.stats(),
+            "backend": self.backend.name,
+            "version": self._version,
+            "shared_hits": self.shared_hits,
+            "shared_misses": self.shared_misses
+        }
+
+
+cache_backend = create_backend()
+
+# Public menu responses (food listings, single foods, categories). The menu
+# only changes through admin endpoints, which invalidate this namespace.
+menu_cache = NamespacedCache(
+    "menu",
+    cache_backend,
+    max_entries=settings.MENU_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.MENU_CACHE_TTL_SECONDS,
+    version_poll_seconds=settings.CACHE_VERSION_POLL_SECONDS
+)
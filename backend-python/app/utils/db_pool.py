@@ -0,0 +1,173 @@
+"""
+Connection pool sizing and instrumentation.
+
+Every engine is built with the DB_POOL_* settings and a pool subclass that
+times how long each checkout waits for a free connection. Counters, the
+wait histogram and live gauges (in use, idle, overflow) are kept per engine
+in POOL_METRICS and exposed through GET /api/admin/db/pool. Requests are
+admitted to match the pool capacity by app/utils/admission.py.
+"""
+import threading
+import time
+from typing import Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.config import settings
+
+# Upper bounds (ms) of the checkout wait histogram buckets; the last bucket is +Inf
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    """Checkout counters and wait histogram for one engine's pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.engine: Optional[Engine] = None
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.wait_count = 0
+        self.wait_sum_ms = 0.0
+        self.wait_max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe_wait(self, wait_ms: float, timed_out: bool = False) -> None:
+        """Record how long a checkout waited for a connection"""
+        index = next(
+            (i for i, bound in enumerate(WAIT_BUCKETS_MS) if wait_ms <= bound),
+            len(WAIT_BUCKETS_MS)
+        )
+        with self._lock:
+            self.wait_buckets[index] += 1
+            self.wait_count += 1
+            self.wait_sum_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            self.timeouts += timed_out
+
+    def attach(self, engine: Engine) -> None:
+        """Count pool events of `engine` (the sync engine of an AsyncEngine)"""
+        self.engine = engine
+
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with self._lock:
+                self.checkouts += 1
+
+        @event.listens_for(engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            with self._lock:
+                self.checkins += 1
+
+        @event.listens_for(engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        """Counters, cumulative wait histogram and current pool gauges"""
+        pool = self.engine.pool
+        if isinstance(pool, QueuePool):
+            size, max_overflow, in_use = pool.size(), pool._max_overflow, pool.checkedout()
+            gauges = {
+                "pool_size": size,
+                "max_overflow": max_overflow,
+                "in_use": in_use,
+                "idle": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+                "saturation": round(in_use / (size + max_overflow), 4) if size + max_overflow else 0.0,
+            }
+        else:
+            gauges = {"pool_class": type(pool).__name__}
+        with self._lock:
+            cumulative, histogram = 0, {}
+            for bound, count in zip((*WAIT_BUCKETS_MS, "+Inf"), self.wait_buckets):
+                cumulative += count
+                histogram[str(bound)] = cumulative
+            return {
+                **gauges,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_ms": {
+                    "count": self.wait_count,
+                    "sum": round(self.wait_sum_ms, 3),
+                    "max": round(self.wait_max_ms, 3),
+                    "buckets": histogram
+                }
+            }
+
+
+# Engine name -> metrics, in creation order
+POOL_METRICS: dict[str, PoolMetrics] = {}
+
+
+def _timed_pool_class(base: type, metrics: PoolMetrics) -> type:
+    """Subclass of `base` that reports checkout wait times to `metrics`.
+    A class rather than an instance attribute so pool.recreate() keeps it."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = base._do_get(self)
+        except PoolTimeoutError:
+            metrics.observe_wait((time.perf_counter() - start) * 1000, timed_out=True)
+            raise
+        metrics.observe_wait((time.perf_counter() - start) * 1000)
+        return connection
+
+    return type(f"Timed{base.__name__}", (base,), {"_do_get": _do_get})
+
+
+def _pool_options(url: str, base: type, metrics: PoolMetrics) -> dict:
+    # Dialects that don't pool by default (aiosqlite uses NullPool, in-memory
+    # SQLite a single shared connection) keep their own pool; its events are
+    # still counted but there is nothing to size or wait on
+    parsed = make_url(url)
+    if not issubclass(parsed.get_dialect().get_pool_class(parsed), QueuePool):
+        return {}
+    return {
+        "poolclass": _timed_pool_class(base, metrics),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def create_pooled_engine(name: str, url: str) -> Engine:
+    """create_engine with the configured, instrumented pool"""
+    metrics = PoolMetrics(name)
+    engine = create_engine(url, **_pool_options(url, QueuePool, metrics))
+    metrics.attach(engine)
+    POOL_METRICS[name] = metrics
+    return engine
+
+
+def create_pooled_async_engine(name: str, url: str) -> AsyncEngine:
+    """create_async_engine with the configured, instrumented pool"""
+    metrics = PoolMetrics(name)
+    engine = create_async_engine(url, **_pool_options(url, AsyncAdaptedQueuePool, metrics))
+    metrics.attach(engine.sync_engine)
+    POOL_METRICS[name] = metrics
+    return engine
+
+
+def pool_stats() -> dict:
+    """Snapshot of every instrumented pool"""
+    return {name: metrics.snapshot() for name, metrics in POOL_METRICS.items()}
+
@@ -0,0 +1,114 @@
+"""
+Encoders for streamed file exports. Each turns a batch of rows into the
+next chunk of the file, so an export never holds more than one batch.
+
+Parquet needs the optional `pyarrow` package; every batch becomes a row
+group, written out as soon as it is encoded.
+"""
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from typing import Iterable, Optional
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def content_disposition(name: str, file_format: str) -> dict:
+    return {"Content-Disposition": f'attachment; filename="{name}.{file_format}"'}
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def csv_chunk(rows: Iterable[Iterable], header: Optional[Iterable[str]] = None) -> str:
+    """CSV lines of `rows`, after a `header` line if given"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header is not None:
+        writer.writerow(header)
+    writer.writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def jsonl_chunk(records: Iterable[dict]) -> str:
+    """One JSON object per line"""
+    return "".join(json.dumps(record, default=_json_default) + "\n" for record in records)
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _Sink:
+    """Write-only file object whose bytes are taken out as they are written"""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+class ParquetChunks:
+    """Parquet file written a row group at a time. `columns` are
+    (name, pyarrow type) pairs; write() and close() return the bytes to
+    send next."""
+
+    def __init__(self, columns: list[tuple]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError("Parquet exports require the 'pyarrow' package") from exc
+        self._pa = pa
+        self._schema = pa.schema(columns)
+        self._sink = _Sink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="zstd")
+
+    def write(self, rows: list[tuple]) -> bytes:
+        columns = list(zip(*rows)) if rows else [()] * len(self._schema)
+        self._writer.write_table(self._pa.Table.from_arrays(
+            [self._pa.array(values, type=field.type) for values, field in zip(columns, self._schema)],
+            schema=self._schema,
+        ))
+        return self._sink.take()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.take()
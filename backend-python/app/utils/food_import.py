@@ -0,0 +1,287 @@
+"""
+Bulk food import and export for the admin API.
+
+Imports read the request body as it arrives: CSV with a header row or JSON
+Lines, one food per record. Records are validated against FoodCreate a
+batch at a time and each batch is written with multi-row
+INSERT ... ON CONFLICT (category_id, name) and committed on its own, so a
+large file never holds a transaction or a pooled connection for long. A
+record that fails validation is reported with its line number and skipped;
+a batch the database rejects is reported and the import moves on.
+
+A record names its category by `category` (name) or `category_id`. Upserts
+replace every imported column of an existing food; within a batch a
+repeated (category, name) counts as if the records were applied in order.
+
+Exports walk the foods in id order, a batch per query, as the same columns
+plus id, rating and reviews_count, which imports ignore. An export can be
+imported as is, into the same database or another one.
+"""
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Iterator, Optional
+from anyio import to_thread
+from pydantic import ValidationError
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from app.database import SessionLocal, read_engine
+from app.models.food import Food, Category
+from app.schemas.food import (
+    FoodCreate, FoodFileFormat, FoodImportMode, FoodImportError, FoodImportBatch, FoodImportReport
+)
+from app.utils.exports import csv_chunk, jsonl_chunk
+from app.utils.rollups import dialect_insert
+
+KEY = ("category_id", "name")
+EXPORT_COLUMNS = (
+    "id", "name", "description", "price", "original_price", "image", "category",
+    "prep_time", "is_special", "is_available", "rating", "reviews_count",
+)
+_CONTENT_TYPES = {
+    "text/csv": FoodFileFormat.CSV,
+    "application/csv": FoodFileFormat.CSV,
+    "application/x-ndjson": FoodFileFormat.JSONL,
+    "application/jsonl": FoodFileFormat.JSONL,
+    "application/x-jsonlines": FoodFileFormat.JSONL,
+}
+
+
+def format_of(content_type: Optional[str]) -> Optional[FoodFileFormat]:
+    """File format named by a Content-Type header, if any"""
+    if not content_type:
+        return None
+    return _CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decoded lines of a byte stream, line ends included; a UTF-8 byte
+    order mark is dropped. Raises UnicodeDecodeError on invalid UTF-8."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        # Only "\n" ends a line: JSON strings may hold other line breaks
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def records(chunks: AsyncIterator[bytes], file_format: FoodFileFormat) -> AsyncIterator[tuple[int, object]]:
+    """(line number, record) pairs of an uploaded file. A record is a dict,
+    or an error message for a line that can't be parsed."""
+    line_number = 0
+    if file_format == FoodFileFormat.JSONL:
+        async for line in _lines(chunks):
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, f"Invalid JSON: {e}"
+                continue
+            yield line_number, record if isinstance(record, dict) else "Expected a JSON object"
+        return
+
+    # A CSV record ends at a line end outside quotes: an escaped quote is
+    # doubled, so the quotes seen so far are even there
+    header = None
+    text, start, quotes = "", 0, 0
+    async for line in _lines(chunks):
+        line_number += 1
+        if not text:
+            start = line_number
+        text += line
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        record_text, text, quotes = text, "", 0
+        try:
+            values = next(csv.reader([record_text]), [])
+        except csv.Error as e:
+            yield start, f"Invalid CSV: {e}"
+            continue
+        if not any(values):
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) > len(header):
+            yield start, f"Expected {len(header)} fields, got {len(values)}"
+            continue
+        # Empty fields are left out so FoodCreate's defaults apply
+        yield start, {name: value for name, value in zip(header, values) if value != ""}
+    if text:
+        yield start, "Unterminated quoted field"
+
+
+def category_ids(db) -> dict:
+    """Category id by name"""
+    return dict(db.execute(select(Category.name, Category.id)).all())
+
+
+def _validate(record, categories: dict, known_ids: set) -> dict:
+    """Row of the foods table for a parsed record; raises ValueError"""
+    if isinstance(record, str):
+        raise ValueError(record)
+    record = dict(record)
+    if record.get("category") is not None:
+        name = str(record.pop("category"))
+        if name not in categories:
+            raise ValueError(f"Unknown category '{name}'")
+        record["category_id"] = categories[name]
+    try:
+        row = FoodCreate.model_validate(record).model_dump()
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()
+        ))
+    if row["category_id"] not in known_ids:
+        raise ValueError(f"Unknown category_id {row['category_id']}")
+    return row
+
+
+def upsert_foods(db, rows: list[dict], mode: FoodImportMode) -> int:
+    """Write rows of the foods table (all with the same keys); existing
+    (category_id, name) pairs are updated or left alone depending on
+    `mode`. Returns the rows inserted or updated."""
+    if not rows:
+        return 0
+    # Same lock order in every writer, so concurrent imports can't deadlock
+    rows = sorted(rows, key=lambda row: (row["category_id"], row["name"]))
+    # A one-row statement executed for many rows compiles once and is sent
+    # as multi-row INSERTs ("insertmanyvalues"); RETURNING counts the rows
+    # written, which rowcount doesn't reliably do for executemany
+    stmt = dialect_insert(db)(Food.__table__)
+    if mode == FoodImportMode.INSERT:
+        stmt = stmt.on_conflict_do_nothing(index_elements=list(KEY))
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(KEY),
+            set_={
+                **{name: stmt.excluded[name] for name in rows[0] if name not in KEY},
+                "updated_at": func.now(),
+            },
+        )
+    return len(db.execute(stmt.returning(Food.id), rows).all())
+
+
+def import_batch(db, number: int, batch: list[tuple[int, object]], mode: FoodImportMode, categories: dict) -> FoodImportBatch:
+    """Validate and write one batch of (line number, record) pairs and commit it"""
+    result = FoodImportBatch(batch=number, first_line=batch[0][0], last_line=batch[-1][0], records=len(batch))
+    known_ids = set(categories.values())
+    rows = {}
+    for line_number, record in batch:
+        try:
+            row = _validate(record, categories, known_ids)
+        except ValueError as e:
+            result.errors.append(FoodImportError(line=line_number, error=str(e)))
+            continue
+        key = (row["category_id"], row["name"])
+        if key not in rows:
+            rows[key] = row
+        elif mode == FoodImportMode.INSERT:
+            result.skipped += 1
+        else:
+            rows[key] = row
+            result.updated += 1
+    result.failed = len(result.errors)
+    if not rows:
+        return result
+
+    try:
+        existing = 0
+        if mode == FoodImportMode.UPSERT:
+            existing = db.execute(
+                select(func.count()).select_from(Food).where(tuple_(Food.category_id, Food.name).in_(list(rows)))
+            ).scalar()
+        written = upsert_foods(db, list(rows.values()), mode)
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        result.error = str(e.orig if getattr(e, "orig", None) is not None else e).splitlines()[0]
+        result.failed += len(rows) + result.skipped + result.updated
+        result.skipped = result.updated = 0
+        return result
+
+    if mode == FoodImportMode.UPSERT:
+        result.inserted = written - existing
+        result.updated += existing
+    else:
+        result.inserted = written
+        result.skipped += len(rows) - written
+    return result
+
+
+async def import_foods(db, chunks: AsyncIterator[bytes], file_format: FoodFileFormat,
+                       mode: FoodImportMode, batch_size: int) -> FoodImportReport:
+    """Import an uploaded file. Parsing runs on the event loop as the body
+    arrives; validation and writes run in a worker thread, a batch at a time."""
+    report = FoodImportReport(format=file_format, mode=mode)
+
+    def load_categories():
+        try:
+            return category_ids(db)
+        finally:
+            db.commit()
+
+    categories = await to_thread.run_sync(load_categories)
+
+    async def flush(batch):
+        result = await to_thread.run_sync(import_batch, db, len(report.batches) + 1, batch, mode, categories)
+        report.batches.append(result)
+        report.records += result.records
+        report.inserted += result.inserted
+        report.updated += result.updated
+        report.skipped += result.skipped
+        report.failed += result.failed
+
+    batch = []
+    async for line_number, record in records(chunks, file_format):
+        batch.append((line_number, record))
+        if len(batch) == batch_size:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+    return report
+
+
+def _export_query(after_id: int, batch_size: int):
+    return (
+        select(
+            Food.id, Food.name, Food.description, Food.price, Food.original_price, Food.image,
+            Category.name.label("category"), Food.prep_time, Food.is_special, Food.is_available,
+            Food.rating, Food.reviews_count,
+        )
+        .join(Category, Category.id == Food.category_id)
+        .where(Food.id > after_id)
+        .order_by(Food.id)
+        .limit(batch_size)
+    )
+
+
+def export_chunks(file_format: FoodFileFormat, batch_size: int) -> Iterator[str]:
+    """An export file, one chunk per batch of foods. Runs after the request's
+    dependencies have exited, so it opens its own session; the connection
+    goes back to the pool between batches, whatever the client's pace."""
+    db = SessionLocal(bind=read_engine("menu"))
+    try:
+        if file_format == FoodFileFormat.CSV:
+            yield csv_chunk([], header=EXPORT_COLUMNS)
+        last_id = 0
+        while True:
+            rows = db.execute(_export_query(last_id, batch_size)).all()
+            db.commit()
+            if not rows:
+                return
+            last_id = rows[-1].id
+            if file_format == FoodFileFormat.CSV:
+                yield csv_chunk(rows)
+            else:
+                yield jsonl_chunk(dict(zip(EXPORT_COLUMNS, row)) for row in rows)
+    finally:
+        db.close()
@@ -0,0 +1,4 @@
+"""Response headers shared by the routers and the CORS configuration"""
+
+# Cursor of the next page of a keyset-paginated listing
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
@@ -0,0 +1,122 @@
+"""
+Streaming order export for accounting.
+
+One query joins orders to their line items and foods, in (created_at, id)
+order through ix_orders_created_at_id (items of an order by id), and is
+read with yield_per: on
+PostgreSQL that is a server-side cursor, elsewhere the driver fetches a
+batch at a time. Each batch is encoded and sent before the next is read,
+so memory stays at one batch whatever the export's size, and the first
+rows go out as soon as the database returns them.
+
+The export holds one connection (and, on PostgreSQL, one snapshot) until
+it is done. The delivery street address, phone and notes are left out.
+"""
+import itertools
+from datetime import datetime
+from typing import Iterator, Optional
+from sqlalchemy import select
+from app.database import SessionLocal, read_engine
+from app.models.food import Food
+from app.models.order import Order, OrderItem, OrderStatus
+from app.schemas.order import OrderExportFormat
+from app.utils.analytics import naive_utc
+from app.utils.exports import ParquetChunks, csv_chunk, jsonl_chunk
+
+ORDER_COLUMNS = (
+    "order_id", "order_number", "user_id", "status", "payment_method", "created_at", "delivered_at",
+    "delivery_city", "delivery_zip", "subtotal", "delivery_fee", "tax", "total",
+)
+ITEM_COLUMNS = ("item_id", "food_id", "food_name", "quantity", "price")
+_ENUM_COLUMNS = (ORDER_COLUMNS.index("status"), ORDER_COLUMNS.index("payment_method"))
+# The first batch is kept small so the first rows go out right away
+FIRST_BATCH_SIZE = 100
+
+
+def _parquet_columns() -> list[tuple]:
+    import pyarrow as pa
+    types = {
+        "order_number": pa.string(), "status": pa.string(), "payment_method": pa.string(),
+        "delivery_city": pa.string(), "delivery_zip": pa.string(), "food_name": pa.string(),
+        "created_at": pa.timestamp("us", tz="UTC"), "delivered_at": pa.timestamp("us", tz="UTC"),
+        "subtotal": pa.float64(), "delivery_fee": pa.float64(), "tax": pa.float64(),
+        "total": pa.float64(), "price": pa.float64(),
+    }
+    return [(name, types.get(name, pa.int64())) for name in ORDER_COLUMNS + ITEM_COLUMNS]
+
+
+def export_query(start: Optional[datetime], end: Optional[datetime], status: Optional[OrderStatus]):
+    """Orders created in [start, end), one row per line item (an order
+    without items gets one row of nulls)"""
+    query = (
+        select(
+            Order.id.label("order_id"), Order.order_number, Order.user_id, Order.status,
+            Order.payment_method, Order.created_at, Order.delivered_at, Order.delivery_city,
+            Order.delivery_zip, Order.subtotal, Order.delivery_fee, Order.tax, Order.total,
+            OrderItem.id.label("item_id"), OrderItem.food_id, Food.name.label("food_name"),
+            OrderItem.quantity, OrderItem.price,
+        )
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(Food, Food.id == OrderItem.food_id)
+        .order_by(Order.created_at, Order.id, OrderItem.id)
+    )
+    if start is not None:
+        query = query.where(Order.created_at >= naive_utc(start))
+    if end is not None:
+        query = query.where(Order.created_at < naive_utc(end))
+    if status is not None:
+        query = query.where(Order.status == status)
+    return query
+
+
+def _flat(row) -> list:
+    """A result row with status and payment method as their values"""
+    row = list(row)
+    for index in _ENUM_COLUMNS:
+        if row[index] is not None:
+            row[index] = row[index].value
+    return row
+
+
+def _orders(rows, pending: Optional[dict]) -> tuple[list[dict], Optional[dict]]:
+    """Group consecutive item rows into order records. The last order may
+    continue in the next batch, so it is returned apart as `pending`."""
+    orders = []
+    split = len(ORDER_COLUMNS)
+    for row in rows:
+        if pending is None or pending["order_id"] != row[0]:
+            if pending is not None:
+                orders.append(pending)
+            pending = {**dict(zip(ORDER_COLUMNS, row[:split])), "items": []}
+        if row[split] is not None:
+            pending["items"].append(dict(zip(ITEM_COLUMNS, row[split:])))
+    return orders, pending
+
+
+def export_chunks(file_format: OrderExportFormat, start: Optional[datetime], end: Optional[datetime],
+                  status: Optional[OrderStatus], batch_size: int) -> Iterator:
+    """An export file, one chunk per batch of rows. Runs after the request's
+    dependencies have exited, so it opens its own session."""
+    parquet = ParquetChunks(_parquet_columns()) if file_format == OrderExportFormat.PARQUET else None
+    if file_format == OrderExportFormat.CSV:
+        yield csv_chunk([], header=ORDER_COLUMNS + ITEM_COLUMNS)
+
+    db = SessionLocal(bind=read_engine())
+    try:
+        result = db.execute(export_query(start, end, status).execution_options(yield_per=batch_size))
+        pending = None
+        for rows in itertools.chain([result.fetchmany(min(FIRST_BATCH_SIZE, batch_size))], result.partitions()):
+            rows = [_flat(row) for row in rows]
+            if file_format == OrderExportFormat.CSV:
+                yield csv_chunk(rows)
+            elif parquet is not None:
+                yield parquet.write(rows)
+            else:
+                orders, pending = _orders(rows, pending)
+                yield jsonl_chunk(orders)
+        if pending is not None:
+            yield jsonl_chunk([pending])
+        if parquet is not None:
+            yield parquet.close()
+    finally:
+        db.close()
@@ -0,0 +1,83 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException, Response, status
+from sqlalchemy import literal, tuple_
+from sqlalchemy.orm import Query
+from app.utils.headers import NEXT_CURSOR_HEADER
+
+
+def encode_cursor(values: list) -> str:
+    """Encode the sort key of the last row of a page as an opaque token"""
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: list) -> tuple:
+    """Decode a token produced by encode_cursor back into typed values"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("cursor shape mismatch")
+        return tuple(
+            datetime.fromisoformat(value) if type_ is datetime else type_(value)
+            for value, type_ in zip(values, types)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def page_query(query, keys: tuple, cursor: Optional[str], skip: int, limit: int, descending: bool = False):
+    """
+    Restrict a Query or select() to one page ordered by the unique column
+    tuple `keys`.
+
+    With a cursor the page starts right after the encoded key (keyset
+    pagination, an index range scan); without one it falls back to
+    offset(skip).
+    """
+    if cursor:
+        values = decode_cursor(cursor, [column.type.python_type for column in keys])
+        bound = [literal(value, column.type) for value, column in zip(values, keys)]
+        if len(keys) > 1:
+            key, bound = tuple_(*keys), tuple_(*bound)
+        else:
+            key, bound = keys[0], bound[0]
+        query = query.filter(key < bound if descending else key > bound)
+
+    query = query.order_by(*[column.desc() if descending else column for column in keys])
+    if not cursor:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def set_next_cursor(response: Response, rows: list, keys: tuple, limit: int) -> None:
+    """Return the cursor for the following page in X-Next-Cursor when the page is full"""
+    if len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            [getattr(last, column.key) for column in keys]
+        )
+
+
+def paginate(
+    query: Query,
+    response: Response,
+    keys: tuple,
+    cursor: Optional[str],
+    skip: int,
+    limit: int,
+    descending: bool = False
+) -> list:
+    """Fetch one page of `query` (see page_query) and set X-Next-Cursor"""
+    rows = page_query(query, keys, cursor, skip, limit, descending).all()
+    set_next_cursor(response, rows, keys, limit)
+    return rows
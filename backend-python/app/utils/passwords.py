@@ -0,0 +1,157 @@
+"""
+bcrypt hashing and verification in a bounded process pool.
+
+Each bcrypt call burns ~250ms of CPU. Running it in request threads lets a
+login burst occupy the whole threadpool and stall unrelated requests, so the
+work is sent to a small dedicated process pool instead. At most
+PASSWORD_POOL_MAX_PENDING calls may be queued or running; beyond that
+callers get a 503 immediately rather than waiting for a thread.
+
+This module is imported by the pool's worker processes, so it must not
+import the database or routers. passlib and the process pool machinery are
+loaded on first use, keeping them out of worker startup.
+"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import Optional
+from fastapi import HTTPException, status
+from app.config import settings
+
+_pwd_context = None
+
+
+def pwd_context():
+    """The passlib CryptContext, created on first use"""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        # Hashes made with a different cost than BCRYPT_ROUNDS are flagged
+        # for update, which login uses to rehash transparently
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+    return _pwd_context
+
+
+def _hash(password: str) -> str:
+    return pwd_context().hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    return pwd_context().verify_and_update(password, hashed_password)
+
+
+class PasswordPool:
+    """Process pool with a hard limit on queued work"""
+
+    def __init__(self, workers: int, max_pending: int, timeout_seconds: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional["concurrent.futures.ProcessPoolExecutor"] = None
+        self._executor_lock = threading.Lock()
+        self.rejected = 0
+
+    def _get_executor(self) -> "concurrent.futures.ProcessPoolExecutor":
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _acquire(self) -> None:
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry",
+                headers={"Retry-After": "1"}
+            )
+
+    @staticmethod
+    def _timed_out() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication timed out, please retry",
+            headers={"Retry-After": "1"}
+        )
+
+    def _submit(self, fn, *args) -> concurrent.futures.Future:
+        """Queue fn in the pool under an acquired slot. The slot is released
+        when the job ends rather than when its caller stops waiting, so
+        max_pending bounds what is really queued or running."""
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        """Run fn in the pool and wait for it, or raise 503 when saturated"""
+        self._acquire()
+        if self.workers <= 0:
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+        future = self._submit(fn, *args)
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except concurrent.futures.TimeoutError:
+            # Drops the job if it hasn't started; a running one keeps its slot
+            # until it finishes
+            future.cancel()
+            raise self._timed_out()
+
+    async def run_async(self, fn, *args):
+        """run() for the event loop: awaits the pool without holding a thread"""
+        self._acquire()
+        if self.workers <= 0:
+            from anyio import to_thread
+            try:
+                # Not cancellable, so the slot is held until fn returns
+                return await to_thread.run_sync(fn, *args)
+            finally:
+                self._slots.release()
+        future = self._submit(fn, *args)
+        try:
+            # Cancelling the wrapper (timeout, client gone) cancels the job too
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise self._timed_out()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordPool(
+    workers=settings.PASSWORD_POOL_WORKERS,
+    max_pending=settings.PASSWORD_POOL_MAX_PENDING,
+    timeout_seconds=settings.PASSWORD_POOL_TIMEOUT_SECONDS
+)
+
+
+def hash_password(password: str) -> str:
+    """Hash a password in the pool"""
+    return password_pool.run(_hash, password)
+
+
+def verify_and_update(password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """Verify a password in the pool; also returns a new hash when the stored
+    one was made with outdated cost parameters"""
+    return password_pool.run(_verify_and_update, password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password() for async endpoints"""
+    return await password_pool.run_async(_hash, password)
+
+
+async def verify_and_update_async(password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """verify_and_update() for async endpoints"""
+    return await password_pool.run_async(_verify_and_update, password, hashed_password)
@@ -0,0 +1,227 @@
+"""
+Stack-sampling profiler for live traffic.
+
+An admin starts a session (POST /api/admin/debug/profile) for a time window,
+optionally only for paths matching a regex, and for a percentage of those
+requests. While a sampled request is in flight a background thread reads
+every thread's stack each PROFILER_INTERVAL_MS and counts the stacks that
+belong to sampled requests:
+
+- on the event loop, stacks running inside a sampled request's
+  ProfilerMiddleware call (async endpoints, middleware, response encoding),
+- in the threadpool, stacks whose anyio worker runs in a sampled request's
+  context (sync endpoints and dependencies: auth, jose, pydantic, SQL).
+
+Nothing is traced, so a sampled request runs at full speed and the cost is
+the sampler thread's walk over the stacks; with no sampled request in flight
+the sampler sleeps. Results are aggregated as folded stacks ("a;b;c 12"),
+which flamegraph.pl, speedscope and inferno read directly, and as top
+functions by self and total samples (GET /api/admin/debug/profile).
+
+bcrypt runs in the password process pool unless PASSWORD_POOL_WORKERS=0, so
+it shows up as the wait for that pool. A session covers the worker that
+received the request; with several workers, start it on each or profile
+one. Kept free of SQLAlchemy imports (see app/utils/startup.py).
+"""
+import asyncio
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import Context, ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+_sampled: ContextVar[bool] = ContextVar("profiler_sampled", default=False)
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_frame_names: dict = {}
+_HANDOFF = asyncio.BaseEventLoop.call_soon_threadsafe.__code__
+
+
+def _frame_name(code) -> str:
+    """function (file:line), with library paths relative to site-packages"""
+    name = _frame_names.get(code)
+    if name is None:
+        path = code.co_filename
+        if "site-packages" in path:
+            path = path.rsplit("site-packages" + os.sep, 1)[-1]
+        elif path.startswith(_ROOT):
+            path = os.path.relpath(path, _ROOT)
+        name = _frame_names[code] = f"{getattr(code, 'co_qualname', code.co_name)} ({path}:{code.co_firstlineno})"
+    return name
+
+
+class ProfileSession:
+    """One profiling window and the stacks it collected"""
+
+    def __init__(self, seconds: float, route: Optional[str], sample_percent: float, interval_ms: float):
+        self.route = route
+        self.route_pattern = re.compile(route) if route else None
+        self.sample_percent = sample_percent
+        self.interval = interval_ms / 1000
+        self.started_at = datetime.now(timezone.utc)
+        self.ends = time.monotonic() + seconds
+        self.seconds = seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.requests_seen = 0
+        self.requests_sampled = 0
+        self._request_frames: set = set()
+        self._loop_threads: set = set()
+        self._lock = threading.Lock()
+        self._busy = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    @property
+    def active(self) -> bool:
+        return not self._stopped.is_set() and time.monotonic() < self.ends
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._busy.set()
+
+    def should_sample(self, path: str) -> bool:
+        if not self.active or (self.route_pattern is not None and not self.route_pattern.search(path)):
+            return False
+        self.requests_seen += 1
+        return random.random() * 100 < self.sample_percent
+
+    def request_started(self, frame) -> None:
+        with self._lock:
+            self.requests_sampled += 1
+            self._request_frames.add(frame)
+            self._loop_threads.add(threading.get_ident())
+            self._busy.set()
+
+    def request_finished(self, frame) -> None:
+        with self._lock:
+            self._request_frames.discard(frame)
+            if not self._request_frames:
+                self._busy.clear()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while self.active:
+            if not self._busy.wait(timeout=max(0.0, self.ends - time.monotonic())):
+                continue
+            self._sample(own)
+            self._stopped.wait(self.interval)
+
+    def _sample(self, own: int) -> None:
+        with self._lock:
+            request_frames = set(self._request_frames)
+            loop_threads = set(self._loop_threads)
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame)
+                frame = frame.f_back
+            stack.reverse()
+            names = self._request_stack(stack, request_frames, ident in loop_threads)
+            if names:
+                self.stacks[";".join(names)] += 1
+                self.samples += 1
+
+    @staticmethod
+    def _request_stack(stack: list, request_frames: set, on_loop: bool) -> Optional[list[str]]:
+        """Frame names from the sampled request's entry point up, or None
+        if the stack doesn't belong to a sampled request"""
+        if on_loop:
+            for depth, frame in enumerate(stack):
+                if frame in request_frames:
+                    return ["event loop", *(_frame_name(f.f_code) for f in stack[depth:])]
+            return None
+        # anyio's worker thread loop holds the context it runs the call in
+        for depth, frame in enumerate(stack):
+            if "context" in frame.f_code.co_varnames:
+                context = frame.f_locals.get("context")
+                if isinstance(context, Context):
+                    call = stack[depth + 1:]
+                    # Once the call returns the worker hands its result to
+                    # the loop, which is no longer the request's work
+                    if not context.get(_sampled, False) or not call or call[0].f_code is _HANDOFF:
+                        return None
+                    return ["threadpool", *(_frame_name(f.f_code) for f in call)]
+        return None
+
+    def folded(self) -> str:
+        """Collapsed stacks, one "frame;frame;frame count" line each"""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def summary(self, top: int = 30) -> dict:
+        self_counts, total_counts = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if frames:
+                self_counts[frames[-1]] += count
+            for frame in set(frames):
+                total_counts[frame] += count
+
+        def ranked(counts: Counter) -> list[dict]:
+            return [
+                {"frame": frame, "samples": count, "percent": round(100 * count / self.samples, 2)}
+                for frame, count in counts.most_common(top)
+            ]
+
+        return {
+            "active": self.active,
+            "route": self.route,
+            "sample_percent": self.sample_percent,
+            "interval_ms": self.interval * 1000,
+            "started_at": self.started_at.isoformat(),
+            "seconds": self.seconds,
+            "requests_seen": self.requests_seen,
+            "requests_sampled": self.requests_sampled,
+            "samples": self.samples,
+            "top_self": ranked(self_counts),
+            "top_total": ranked(total_counts),
+        }
+
+
+# The current or last session of this worker
+session: Optional[ProfileSession] = None
+
+
+def start(seconds: float, route: Optional[str], sample_percent: float, interval_ms: float) -> ProfileSession:
+    """Replace any running session with a new one; raises ValueError for an
+    invalid route pattern"""
+    global session
+    try:
+        new_session = ProfileSession(seconds, route, sample_percent, interval_ms)
+    except re.error as e:
+        raise ValueError(f"Invalid route pattern: {e}") from e
+    if session is not None:
+        session.stop()
+    session = new_session
+    new_session.start()
+    return new_session
+
+
+class ProfilerMiddleware:
+    """ASGI middleware marking the requests the current session samples"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        current = session
+        if scope["type"] != "http" or current is None or not current.should_sample(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        frame = sys._getframe()
+        token = _sampled.set(True)
+        current.request_started(frame)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current.request_finished(frame)
+            _sampled.reset(token)
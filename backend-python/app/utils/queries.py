@@ -0,0 +1,55 @@
+from sqlalchemy import update
+from sqlalchemy.orm import Session, Query, joinedload, selectinload
+from app.models.user import User
+from app.models.food import Food
+from app.models.order import Order, OrderItem
+
+
+# Loader options shared by every endpoint that serializes these models.
+# Many-to-one hops use joinedload (same SELECT), collections use selectinload
+# (one extra SELECT ... WHERE id IN (...) per page), so a listing costs a
+# fixed number of statements regardless of how many rows it returns.
+
+def food_options():
+    """Eager-load the category of each food"""
+    return (joinedload(Food.category),)
+
+
+def order_options():
+    """Eager-load order items and the food each item refers to"""
+    return (selectinload(Order.items).joinedload(OrderItem.food),)
+
+
+def user_options():
+    """Eager-load the roles of each user"""
+    return (selectinload(User.roles),)
+
+
+def foods_query(db: Session) -> Query:
+    """Base query for food listings"""
+    return db.query(Food).options(*food_options())
+
+
+def orders_query(db: Session) -> Query:
+    """Base query for order listings"""
+    return db.query(Order).options(*order_options())
+
+
+def users_query(db: Session) -> Query:
+    """Base query for user listings"""
+    return db.query(User).options(*user_options())
+
+
+def order_status_update(order: Order, new_status, **values):
+    """UPDATE moving an order from the status it was loaded with to new_status.
+
+    It only matches while the row still has that status, so of two concurrent
+    transitions exactly one gets rowcount 1; only that one may apply the
+    rollup deltas. The loaded order is updated in place.
+    """
+    return (
+        update(Order)
+        .where(Order.id == order.id, Order.status == order.status)
+        .values(status=new_status, **values)
+        .execution_options(synchronize_session="evaluate")
+    )
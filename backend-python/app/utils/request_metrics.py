@@ -0,0 +1,197 @@
+"""
+Per-route request metrics: latency, SQL statements, database time and rows.
+
+RequestMetricsMiddleware times every HTTP request and collects, through a
+context variable, what the database engines did on its behalf: attach()
+hooks each engine's cursor events (see app/database.py). The context is
+copied into threadpool threads and SQLAlchemy's async greenlets, so sync
+and async endpoints are both counted; statements outside a request
+(warm-up, background rebuilds) are not.
+
+Totals are kept per method, route template and status, and served in the
+Prometheus text format by GET /metrics. Each response also carries its own
+numbers in a Server-Timing header, which browser dev tools display; it is
+sent with the response headers, so a streamed body's queries are left out.
+Rows are the cursor's rowcount as the driver reports it: rows returned by
+SELECTs on PostgreSQL, and rows written everywhere (sqlite3 doesn't count
+SELECT rows). Like the pool metrics, the numbers are per worker process.
+
+Kept free of SQLAlchemy imports so app.main can install the middleware in a
+lean start (see app/utils/startup.py).
+"""
+import threading
+import time
+from contextvars import ContextVar
+from operator import attrgetter
+from typing import Optional
+
+# Upper bounds of the histogram buckets; the last bucket is +Inf
+DURATION_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestStats:
+    """Database work done for one request"""
+
+    __slots__ = ("statements", "db_seconds", "rows")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def attach(engine) -> None:
+    """Count the statements `engine` (the sync engine of an AsyncEngine)
+    executes for the current request"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and _current.get() is not None:
+            context._request_metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        start = getattr(context, "_request_metrics_start", None)
+        if stats is None or start is None:
+            return
+        stats.statements += 1
+        stats.db_seconds += time.perf_counter() - start
+        if cursor.rowcount > 0:
+            stats.rows += cursor.rowcount
+
+
+class _Histogram:
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = next((i for i, bound in enumerate(self.bounds) if value <= bound), len(self.bounds))
+        self.counts[index] += 1
+        self.sum += value
+
+    def samples(self, name: str, labels: str) -> list[str]:
+        lines, cumulative = [], 0
+        for bound, count in zip((*self.bounds, "+Inf"), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class _RouteMetrics:
+    def __init__(self):
+        self.duration = _Histogram(DURATION_BUCKETS_SECONDS)
+        self.statements = _Histogram(STATEMENT_BUCKETS)
+        self.db_seconds = _Histogram(DURATION_BUCKETS_SECONDS)
+        self.rows = 0
+
+
+# Name, type, help and value of each metric, in exposition order
+_METRICS = (
+    ("http_request_duration_seconds", "histogram", "Time from receiving a request to sending its last byte",
+     attrgetter("duration")),
+    ("http_request_db_statements", "histogram", "SQL statements executed per request",
+     attrgetter("statements")),
+    ("http_request_db_seconds", "histogram", "Time spent executing SQL per request",
+     attrgetter("db_seconds")),
+    ("http_request_db_rows_total", "counter", "Rows returned or written by SQL, as reported by the driver",
+     attrgetter("rows")),
+)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestMetrics:
+    """Request metrics by (method, route template, status)"""
+
+    def __init__(self):
+        self._routes: dict[tuple, _RouteMetrics] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        with self._lock:
+            metrics = self._routes.get((method, route, status))
+            if metrics is None:
+                metrics = self._routes[(method, route, status)] = _RouteMetrics()
+            metrics.duration.observe(seconds)
+            metrics.statements.observe(stats.statements)
+            metrics.db_seconds.observe(stats.db_seconds)
+            metrics.rows += stats.rows
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format"""
+        with self._lock:
+            routes = [
+                (f'method="{_label(method)}",route="{_label(route)}",status="{status}"', metrics)
+                for (method, route, status), metrics in sorted(self._routes.items())
+            ]
+            lines = []
+            for name, kind, description, value in _METRICS:
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, metrics in routes:
+                    sample = value(metrics)
+                    if isinstance(sample, _Histogram):
+                        lines.extend(sample.samples(name, labels))
+                    else:
+                        lines.append(f"{name}{{{labels}}} {sample}")
+            return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+def server_timing(seconds: float, stats: RequestStats) -> str:
+    """Server-Timing header value: time so far and the database's share"""
+    return (
+        f"app;dur={seconds * 1000:.1f}, "
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} statements, {stats.rows} rows"'
+    )
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording each HTTP request in `metrics`, and
+    optionally adding a Server-Timing header to its response"""
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics, add_server_timing: bool = True):
+        self.app = app
+        self.metrics = metrics
+        self.add_server_timing = add_server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.add_server_timing:
+                    header = server_timing(time.perf_counter() - start, stats)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            self.metrics.observe(scope["method"], route, status, time.perf_counter() - start, stats)
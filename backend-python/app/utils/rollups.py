@@ -0,0 +1,337 @@
+"""
+Incrementally maintained dashboard aggregates.
+
+Order and user writes add their deltas to the rollup tables (see
+app/models/rollup.py) in the same transaction, so the admin dashboard reads
+a few small rows instead of scanning orders and order_items. Each delta is
+one multi-row upsert that adds to existing rows, which keeps concurrent
+checkouts correct without read-modify-write.
+
+Sales analytics buckets (hour, day and week) are refreshed the same way:
+the rows of the order being written are grouped into buckets in SQL and
+added to the bucket tables, so a checkout or cancellation touches one
+order's items, never the whole table.
+
+Data written around the API (seed scripts, bulk loads) is picked up by
+rebuild(), run via `python rebuild_rollups.py`.
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional
+from sqlalchemy import Date, String, cast, delete, func, insert as core_insert, literal, literal_column, select, union_all
+from sqlalchemy.orm import Session
+from app.models.food import Food
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.rollup import (
+    StatCounter, DailyOrderStats, FoodSales,
+    Granularity, OrderSalesBucket, FoodSalesBucket, CategorySalesBucket
+)
+from app.models.user import User
+
+SALES_BUCKET_MODELS = (OrderSalesBucket, FoodSalesBucket, CategorySalesBucket)
+
+# Distance between consecutive bucket starts
+BUCKET_STEPS = {
+    Granularity.HOUR: timedelta(hours=1),
+    Granularity.DAY: timedelta(days=1),
+    Granularity.WEEK: timedelta(weeks=1),
+}
+
+
+def dialect_insert(db):
+    """insert() of the session's dialect, which supports ON CONFLICT"""
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect.name}")
+    return insert
+
+
+def _add_on_conflict(stmt, table, keys: tuple, columns):
+    return stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={column: table.c[column] + stmt.excluded[column] for column in columns if column not in keys}
+    )
+
+
+def _upsert_add(db, model, keys: tuple, rows: list[dict]):
+    """INSERT rows, adding their non-key values to rows that already exist"""
+    # Same row order in every transaction so concurrent upserts can't deadlock
+    rows = sorted(rows, key=lambda row: tuple(str(row[key]) for key in keys))
+    stmt = dialect_insert(db)(model.__table__).values(rows)
+    return _add_on_conflict(stmt, model.__table__, keys, rows[0])
+
+
+def _upsert_add_select(db, model, keys: tuple, query):
+    """INSERT ... SELECT version of _upsert_add; `query`'s columns are named
+    after the table's and it is ordered by `keys`"""
+    columns = [column.name for column in query.selected_columns]
+    stmt = dialect_insert(db)(model.__table__).from_select(columns, query)
+    return _add_on_conflict(stmt, model.__table__, keys, columns)
+
+
+def bucket_start(granularity: Granularity, moment: datetime) -> datetime:
+    """Start of the bucket containing `moment`; weeks start on Monday"""
+    if granularity == Granularity.HOUR:
+        return moment.replace(minute=0, second=0, microsecond=0)
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == Granularity.WEEK:
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def bucket_expr(db, granularity: Granularity, column):
+    """bucket_start() in SQL"""
+    if db.get_bind().dialect.name == "sqlite":
+        # Rendered in the text format SQLAlchemy stores DateTime in, so
+        # buckets written here compare equal to bound parameters
+        hour = "%H" if granularity == Granularity.HOUR else "00"
+        # Back six days, then forward to the next Monday: the Monday on or before
+        modifiers = ("-6 days", "weekday 1") if granularity == Granularity.WEEK else ()
+        return func.strftime(f"%Y-%m-%d {hour}:00:00.000000", column, *modifiers)
+    # Inline so SELECT and GROUP BY render the same expression with
+    # server-side parameters (asyncpg)
+    return func.date_trunc(literal_column(f"'{granularity.value}'"), column)
+
+
+def _keys(model) -> tuple:
+    return tuple(model.__table__.primary_key.columns.keys())
+
+
+def _sales_bucket_queries(db, where: tuple, sign: int = 1, granularities: tuple = tuple(Granularity)) -> dict:
+    """Model -> SELECT of the bucket rows of the orders matching `where`
+    for all `granularities` at once, values multiplied by `sign`"""
+    def signed(expr, name):
+        return (expr if sign > 0 else -expr).label(name)
+
+    units = (
+        select(OrderItem.order_id, func.sum(OrderItem.quantity).label("units"))
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(*where)
+        .group_by(OrderItem.order_id)
+        .subquery()
+    )
+    line_revenue = OrderItem.quantity * OrderItem.price
+    branches = {model: [] for model in SALES_BUCKET_MODELS}
+    for granularity in granularities:
+        label = literal(granularity.value, String).label("granularity")
+        bucket = bucket_expr(db, granularity, Order.created_at)
+        branches[OrderSalesBucket].append(
+            select(
+                label, bucket.label("bucket_start"),
+                signed(func.count(Order.id), "orders"),
+                signed(func.coalesce(func.sum(units.c.units), 0), "units"),
+                signed(func.sum(Order.total), "revenue"),
+            )
+            .select_from(Order)
+            .outerjoin(units, units.c.order_id == Order.id)
+            .where(*where)
+            .group_by(bucket)
+        )
+        for model, key in ((FoodSalesBucket, OrderItem.food_id), (CategorySalesBucket, Food.category_id)):
+            branches[model].append(
+                select(
+                    label, bucket.label("bucket_start"), key,
+                    signed(func.count(func.distinct(OrderItem.order_id)), "orders"),
+                    signed(func.sum(OrderItem.quantity), "units"),
+                    signed(func.sum(line_revenue), "revenue"),
+                )
+                .select_from(OrderItem)
+                .join(Order, Order.id == OrderItem.order_id)
+                .join(Food, Food.id == OrderItem.food_id)
+                .where(*where)
+                .group_by(bucket, key)
+            )
+
+    queries = {}
+    for model, selects in branches.items():
+        rows = union_all(*selects).subquery()
+        # Same row order in every transaction so concurrent upserts can't deadlock
+        queries[model] = select(rows).order_by(*(rows.c[key] for key in _keys(model)))
+    return queries
+
+
+def _sales_buckets(db, order: Order, sign: int) -> list:
+    """Statements adding (sign=1) or removing (sign=-1) an order's sales"""
+    return [
+        _upsert_add_select(db, model, _keys(model), query)
+        for model, query in _sales_bucket_queries(db, (Order.id == order.id,), sign).items()
+    ]
+
+
+def _counters(db, deltas: dict):
+    return _upsert_add(
+        db, StatCounter, ("name",),
+        [{"name": name, "value": value} for name, value in deltas.items()]
+    )
+
+
+def _revenue(order: Order, status: OrderStatus) -> float:
+    return 0.0 if status == OrderStatus.CANCELLED else order.total
+
+
+def order_day(order: Order) -> date:
+    """Day an order is bucketed under (its creation date as stored)"""
+    return order.created_at.date()
+
+
+def order_created(db, order: Order) -> list:
+    """Statements adding a new, flushed order and its items to the rollups"""
+    quantities: dict[int, int] = {}
+    for item in order.items:
+        quantities[item.food_id] = quantities.get(item.food_id, 0) + item.quantity
+    return [
+        _counters(db, {
+            "orders": 1,
+            f"orders:{order.status.value}": 1,
+            "revenue": _revenue(order, order.status),
+        }),
+        _upsert_add(db, DailyOrderStats, ("day", "status"), [{
+            "day": order_day(order),
+            "status": order.status,
+            "orders": 1,
+            "revenue": order.total,
+        }]),
+        _upsert_add(db, FoodSales, ("food_id",), [
+            {"food_id": food_id, "quantity": quantity}
+            for food_id, quantity in quantities.items()
+        ]),
+        *([] if order.status == OrderStatus.CANCELLED else _sales_buckets(db, order, 1)),
+    ]
+
+
+def order_status_changed(db, order: Order, old_status: OrderStatus) -> list:
+    """Statements moving an order from `old_status` to its current status"""
+    if order.status == old_status:
+        return []
+    statements = []
+    if (old_status == OrderStatus.CANCELLED) != (order.status == OrderStatus.CANCELLED):
+        statements = _sales_buckets(db, order, 1 if old_status == OrderStatus.CANCELLED else -1)
+    return [
+        *statements,
+        _counters(db, {
+            f"orders:{old_status.value}": -1,
+            f"orders:{order.status.value}": 1,
+            "revenue": _revenue(order, order.status) - _revenue(order, old_status),
+        }),
+        _upsert_add(db, DailyOrderStats, ("day", "status"), [
+            {"day": order_day(order), "status": old_status, "orders": -1, "revenue": -order.total},
+            {"day": order_day(order), "status": order.status, "orders": 1, "revenue": order.total},
+        ]),
+    ]
+
+
+def user_created(db) -> list:
+    """Statements counting a new user"""
+    return [_counters(db, {"users": 1})]
+
+
+def apply(db: Session, statements: list) -> None:
+    """Run rollup statements in the caller's transaction"""
+    for statement in statements:
+        db.execute(statement)
+
+
+async def apply_async(db, statements: list) -> None:
+    """apply() for an AsyncSession"""
+    for statement in statements:
+        await db.execute(statement)
+
+
+def rebuild(db: Session) -> None:
+    """Recompute every rollup from the base tables (caller commits)"""
+    dialect = db.get_bind().dialect
+    for model in (StatCounter, DailyOrderStats, FoodSales, *SALES_BUCKET_MODELS):
+        db.execute(delete(model))
+
+    counters = {
+        "users": db.scalar(select(func.count(User.id))),
+        "orders": db.scalar(select(func.count(Order.id))),
+        "revenue": db.scalar(
+            select(func.coalesce(func.sum(Order.total), 0)).where(Order.status != OrderStatus.CANCELLED)
+        ),
+    }
+    for status in OrderStatus:
+        counters[f"orders:{status.value}"] = 0
+
+    # SQLite's CAST(... AS DATE) is numeric, date() returns 'YYYY-MM-DD'
+    day = func.date(Order.created_at) if dialect.name == "sqlite" else cast(Order.created_at, Date)
+    daily = []
+    for order_date, status, orders, revenue in db.execute(
+        select(day, Order.status, func.count(Order.id), func.sum(Order.total)).group_by(day, Order.status)
+    ):
+        counters[f"orders:{status.value}"] += orders
+        daily.append({
+            "day": date.fromisoformat(order_date) if isinstance(order_date, str) else order_date,
+            "status": status,
+            "orders": orders,
+            "revenue": revenue,
+        })
+
+    db.execute(core_insert(StatCounter), [{"name": name, "value": value} for name, value in counters.items()])
+    if daily:
+        db.execute(core_insert(DailyOrderStats), daily)
+    db.execute(
+        core_insert(FoodSales).from_select(
+            ["food_id", "quantity"],
+            select(OrderItem.food_id, func.sum(OrderItem.quantity)).group_by(OrderItem.food_id)
+        )
+    )
+    hourly = _sales_bucket_queries(db, (Order.status != OrderStatus.CANCELLED,), granularities=(Granularity.HOUR,))
+    for model, query in hourly.items():
+        db.execute(core_insert(model).from_select([column.name for column in query.selected_columns], query))
+        # Every measure adds up across hours (an order is in exactly one), so
+        # days and weeks are summed from the hour buckets, not the base tables
+        keys = [model.__table__.c[key] for key in _keys(model)[2:]]
+        for granularity in (Granularity.DAY, Granularity.WEEK):
+            bucket = bucket_expr(db, granularity, model.bucket_start)
+            db.execute(core_insert(model).from_select(
+                ["granularity", "bucket_start", *(key.name for key in keys), "orders", "units", "revenue"],
+                select(
+                    literal(granularity.value, String), bucket, *keys,
+                    func.sum(model.orders), func.sum(model.units), func.sum(model.revenue)
+                )
+                .where(model.granularity == Granularity.HOUR.value)
+                .group_by(bucket, *keys)
+            ))
+
+
+def dashboard_totals(db: Session, days: int = 7, today: Optional[date] = None) -> dict:
+    """Counters, top sellers and the last `days` days, read from the rollups"""
+    counters = dict(db.execute(select(StatCounter.name, StatCounter.value)).all())
+
+    top_foods = db.execute(
+        select(Food.name, FoodSales.quantity)
+        .join(Food, Food.id == FoodSales.food_id)
+        .order_by(FoodSales.quantity.desc())
+        .limit(5)
+    ).all()
+
+    today = today or datetime.now().date()
+    start = today - timedelta(days=days - 1)
+    daily = {start + timedelta(days=i): {"orders": 0, "revenue": 0.0} for i in range(days)}
+    for day, status, orders, revenue in db.execute(
+        select(DailyOrderStats.day, DailyOrderStats.status, DailyOrderStats.orders, DailyOrderStats.revenue)
+        .where(DailyOrderStats.day >= start, DailyOrderStats.day <= today)
+    ):
+        daily[day]["orders"] += orders
+        if status != OrderStatus.CANCELLED:
+            daily[day]["revenue"] += revenue
+
+    return {
+        "total_users": int(counters.get("users", 0)),
+        "total_orders": int(counters.get("orders", 0)),
+        "total_revenue": counters.get("revenue", 0.0),
+        "orders_by_status": {
+            status.value: int(counters[f"orders:{status.value}"])
+            for status in OrderStatus
+            if counters.get(f"orders:{status.value}")
+        },
+        "top_selling_foods": [(name, quantity) for name, quantity in top_foods],
+        "daily": [
+            {"day": day.isoformat(), "orders": values["orders"], "revenue": round(values["revenue"], 2)}
+            for day, values in daily.items()
+        ],
+    }
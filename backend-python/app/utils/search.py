@@ -0,0 +1,166 @@
+"""
+Menu search with relevance ranking.
+
+Search terms match words of a food's name or description as prefixes
+("chick" finds "Chicken"), all terms must match, and name matches rank
+above description matches. Misspelled words still match through trigram
+similarity.
+
+On PostgreSQL this runs on foods.search_vector, a generated tsvector over
+name and description with a GIN index, plus a pg_trgm GIN index on name
+(created by migration 0006 from the definitions in app/models/food.py);
+the database keeps both in sync with every write.
+Other databases (SQLite in development and benchmarks) use
+MenuSearchIndex, an in-memory inverted index rebuilt from the foods table
+whenever the menu cache version moves, which every admin menu change bumps.
+"""
+import bisect
+import re
+import threading
+from typing import Optional
+from sqlalchemy import case, false, func, literal, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from app.models.food import Food, FOOD_SEARCH_CONFIG
+from app.utils.cache import menu_cache
+
+# Field weights, matching the tsvector weights A (name) and B (description)
+NAME_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+# Score factor of a prefix match relative to a whole word
+PREFIX_FACTOR = 0.8
+# Typo tolerance: minimum term length and trigram similarity to a word
+FUZZY_MIN_LENGTH = 3
+FUZZY_MIN_SIMILARITY = 0.45
+FUZZY_FACTOR = 0.6
+
+_WORD = re.compile(r"\w+")
+
+
+def terms(search: str) -> list[str]:
+    """Lowercased words of a search string"""
+    return _WORD.findall(search.lower())
+
+
+def trigrams(word: str) -> set[str]:
+    """pg_trgm-style trigrams of a word"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MenuSearchIndex:
+    """Inverted index over food names and descriptions"""
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self.documents = 0
+        # word -> {food id: best field weight}; sorted words for prefix lookups;
+        # trigram -> words for typo lookups
+        self._postings: dict[str, dict[int, float]] = {}
+        self._words: list[str] = []
+        self._by_trigram: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def is_stale(self, version: int) -> bool:
+        return self.version != version
+
+    def build(self, rows, version: int) -> None:
+        """Index (id, name, description) rows as of menu cache `version`"""
+        postings: dict[str, dict[int, float]] = {}
+        documents = 0
+        for food_id, name, description in rows:
+            documents += 1
+            for field, weight in ((description, DESCRIPTION_WEIGHT), (name, NAME_WEIGHT)):
+                for word in terms(field or ""):
+                    entry = postings.setdefault(word, {})
+                    entry[food_id] = max(entry.get(food_id, 0.0), weight)
+        by_trigram: dict[str, set[str]] = {}
+        for word in postings:
+            for trigram in trigrams(word):
+                by_trigram.setdefault(trigram, set()).add(word)
+        with self._lock:
+            # Swapped together so concurrent searches see one consistent index
+            self._postings, self._words, self._by_trigram = postings, sorted(postings), by_trigram
+            self.documents, self.version = documents, version
+
+    def _matches(self, term: str, postings, words, by_trigram) -> dict[str, float]:
+        """Indexed words matching `term` and their score factor"""
+        matches = {}
+        start = bisect.bisect_left(words, term)
+        for word in words[start:]:
+            if not word.startswith(term):
+                break
+            matches[word] = 1.0 if word == term else PREFIX_FACTOR
+        if len(term) >= FUZZY_MIN_LENGTH:
+            term_trigrams = trigrams(term)
+            candidates = set().union(*(by_trigram.get(trigram, ()) for trigram in term_trigrams))
+            for word in candidates.difference(matches):
+                word_trigrams = trigrams(word)
+                similarity = len(term_trigrams & word_trigrams) / len(term_trigrams | word_trigrams)
+                if similarity >= FUZZY_MIN_SIMILARITY:
+                    matches[word] = similarity * FUZZY_FACTOR
+        return matches
+
+    def search(self, search: str) -> dict[int, float]:
+        """Food id -> relevance for foods matching every term of `search`"""
+        with self._lock:
+            postings, words, by_trigram = self._postings, self._words, self._by_trigram
+        scores: Optional[dict[int, float]] = None
+        for term in terms(search):
+            term_scores: dict[int, float] = {}
+            for word, factor in self._matches(term, postings, words, by_trigram).items():
+                for food_id, weight in postings[word].items():
+                    term_scores[food_id] = max(term_scores.get(food_id, 0.0), weight * factor)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {food_id: score + term_scores[food_id] for food_id, score in scores.items() if food_id in term_scores}
+            if not scores:
+                return {}
+        return scores or {}
+
+
+menu_search_index = MenuSearchIndex()
+
+
+def _uses_index(db) -> bool:
+    return db.get_bind().dialect.name != "postgresql"
+
+
+def _documents():
+    return select(Food.id, Food.name, Food.description)
+
+
+def refresh(db) -> None:
+    """Rebuild the in-memory index if the menu changed (no-op on PostgreSQL)"""
+    if _uses_index(db):
+        version = menu_cache.version()
+        if menu_search_index.is_stale(version):
+            menu_search_index.build(db.execute(_documents()).all(), version)
+
+
+async def refresh_async(db) -> None:
+    """refresh() for an AsyncSession"""
+    if _uses_index(db):
+        version = await menu_cache.version_async()
+        if menu_search_index.is_stale(version):
+            menu_search_index.build((await db.execute(_documents())).all(), version)
+
+
+def match(db, search: str) -> tuple:
+    """WHERE clause selecting foods that match `search`, and their relevance"""
+    if not _uses_index(db):
+        words = terms(search)
+        if not words:
+            return false(), literal(0.0)
+        search_vector = literal_column(f"{Food.__tablename__}.search_vector", TSVECTOR)
+        query = func.to_tsquery(FOOD_SEARCH_CONFIG, " & ".join(f"{word}:*" for word in words))
+        return (
+            or_(search_vector.op("@@")(query), literal(search).op("<%")(Food.name)),
+            func.ts_rank_cd(search_vector, query) + func.word_similarity(search, Food.name),
+        )
+
+    scores = menu_search_index.search(search)
+    if not scores:
+        return false(), literal(0.0)
+    return Food.id.in_(scores), case(scores, value=Food.id, else_=0.0)
+
@@ -1,27 +1,46 @@
+import time
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from app.config import settings
-from app.database import get_db
+from app.database import get_db, get_async_db, read_session, async_read_session
 from app.models.user import User, Role, UserRole
-from app.schemas.user import TokenData
+from app.schemas.user import TokenData, CurrentUser
+from app.utils.cache import cache_backend, CacheUnavailable
+from app.utils.passwords import hash_password, verify_and_update, hash_password_async, verify_and_update_async
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return verify_and_update(plain_password, hashed_password)[0]
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """Verify a password; the second item is a replacement hash when the
+    stored one uses outdated bcrypt cost parameters"""
+    return verify_and_update(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    return hash_password(password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """verify_and_update_password for async endpoints"""
+    return await verify_and_update_async(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash for async endpoints"""
+    return await hash_password_async(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -32,12 +51,28 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    from jose import jwt  # loaded on first use, with its crypto backend
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
+def create_user_token(user: User) -> str:
+    """Create an access token carrying the claims the stateless auth mode trusts"""
+    return create_access_token(
+        data={
+            "sub": str(user.id),
+            "email": user.email,
+            "roles": [r.role.value for r in user.roles],
+            "active": user.is_active,
+            "ver": settings.AUTH_TOKEN_VERSION,
+            "iat": int(time.time())
+        }
+    )
+
+
 def decode_token(token: str) -> Optional[TokenData]:
     """Decode and validate a JWT token"""
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: int = payload.get("sub")
@@ -45,11 +80,53 @@ def decode_token(token: str) -> Optional[TokenData]:
         roles: list = payload.get("roles", [])
         if user_id is None:
             return None
-        return TokenData(user_id=user_id, email=email, roles=roles)
+        return TokenData(
+            user_id=user_id,
+            email=email,
+            roles=roles,
+            is_active=payload.get("active", True),
+            token_version=payload.get("ver"),
+            issued_at=payload.get("iat")
+        )
     except JWTError:
         return None
 
 
+def _auth_changed_key(user_id: int) -> str:
+    return f"auth:changed:{user_id}"
+
+
+def invalidate_user_auth(user_id: int) -> None:
+    """
+    Record that a user's status or roles changed. Tokens issued before now
+    stop being trusted on claims alone and go through the database check.
+    Raises a 503 if the record cannot be written.
+    """
+    try:
+        cache_backend.store(
+            _auth_changed_key(user_id),
+            time.time(),
+            settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        )
+    except CacheUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Cache backend unavailable, try again"
+        )
+
+
+def _claims_are_current(token_data: TokenData) -> bool:
+    """Whether a token's claims can be trusted without loading the user"""
+    if token_data.token_version != settings.AUTH_TOKEN_VERSION or token_data.issued_at is None:
+        return False
+    try:
+        changed_at = cache_backend.fetch(_auth_changed_key(token_data.user_id))
+    except CacheUnavailable:
+        # A change may have been recorded there; check the database instead
+        return False
+    return changed_at is None or token_data.issued_at > changed_at
+
+
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
@@ -82,17 +159,140 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
     return current_user
 
 
-def require_admin(
-    current_user: User = Depends(get_current_user),
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _principal_from_claims(token_data: TokenData) -> Optional[CurrentUser]:
+    """The caller built from token claims alone, or None when the user must be loaded"""
+    if settings.AUTH_MODE != "claims" or not _claims_are_current(token_data):
+        return None
+    if not token_data.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return CurrentUser(
+        id=token_data.user_id,
+        email=token_data.email,
+        roles=token_data.roles,
+        is_active=token_data.is_active
+    )
+
+
+def _principal_from_user(user: Optional[User]) -> CurrentUser:
+    """The caller built from a user loaded with its roles"""
+    if user is None:
+        raise _credentials_exception()
+    
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    
+    return CurrentUser(
+        id=user.id,
+        email=user.email,
+        roles=[r.role.value for r in user.roles],
+        is_active=user.is_active
+    )
+
+
+def get_current_principal(
+    token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> User:
-    """Check if user has admin role - uses separate roles table for security"""
-    is_admin = db.query(Role).filter(
-        Role.user_id == current_user.id,
-        Role.role == UserRole.ADMIN
+) -> CurrentUser:
+    """
+    Get the caller's identity and roles.
+
+    In "claims" auth mode the signed token is trusted as long as the user has
+    not changed since it was issued, so no query runs. Otherwise the user and
+    roles are loaded from the database in a single query.
+    """
+    token_data = decode_token(token)
+    if token_data is None:
+        raise _credentials_exception()
+    
+    principal = _principal_from_claims(token_data)
+    if principal is not None:
+        return principal
+    
+    user = db.query(User).options(joinedload(User.roles)).filter(
+        User.id == token_data.user_id
     ).first()
+    return _principal_from_user(user)
+
+
+async def get_current_principal_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> CurrentUser:
+    """get_current_principal for routers running on the async engine"""
+    token_data = decode_token(token)
+    if token_data is None:
+        raise _credentials_exception()
+    
+    # The claims check reads the cache backend with a blocking client, so
+    # it runs on the threadpool rather than stalling the event loop
+    if settings.AUTH_MODE == "claims":
+        principal = await run_in_threadpool(_principal_from_claims, token_data)
+        if principal is not None:
+            return principal
+    
+    result = await db.execute(
+        select(User).options(joinedload(User.roles)).where(User.id == token_data.user_id)
+    )
+    return _principal_from_user(result.unique().scalar_one_or_none())
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """get_current_user for routers running on the async engine; roles are loaded"""
+    token_data = decode_token(token)
+    if token_data is None:
+        raise _credentials_exception()
+    
+    result = await db.execute(
+        select(User).options(joinedload(User.roles)).where(User.id == token_data.user_id)
+    )
+    user = result.unique().scalar_one_or_none()
+    if user is None:
+        raise _credentials_exception()
     
-    if not is_admin:
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    
+    return user
+
+
+def user_scope(user_id: int) -> str:
+    """Read-your-writes scope of a user's own data (orders, profile)"""
+    return f"user:{user_id}"
+
+
+def get_user_read_db(
+    current_user: CurrentUser = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Read-only session for the caller's own data; on the primary right
+    after the caller wrote, on a replica otherwise"""
+    yield from read_session(db, user_scope(current_user.id))
+
+
+async def get_async_user_read_db(
+    current_user: CurrentUser = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Async counterpart of get_user_read_db"""
+    async for read_db in async_read_session(db, user_scope(current_user.id)):
+        yield read_db
+
+
+def require_admin(current_user: CurrentUser = Depends(get_current_principal)) -> CurrentUser:
+    """Check if user has admin role - roles come from the separate roles table
+    or, in claims mode, from a token issued after the last role change"""
+    if UserRole.ADMIN.value not in current_user.roles:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
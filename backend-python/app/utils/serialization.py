@@ -0,0 +1,46 @@
+"""
+JSON responses built straight from ORM objects.
+
+Returning pydantic models from an endpoint validates every object twice:
+once when the endpoint builds the model and again when FastAPI checks the
+result against response_model, before json.dumps encodes it. to_json()
+instead validates ORM objects against the response schema once, reading
+their attributes, and encodes them with pydantic's compiled serializer.
+Endpoints send the bytes with json_response(), which FastAPI passes through
+untouched; the route's response_model still documents the body in OpenAPI.
+
+Other responses (dicts, error bodies) are encoded by ORJSONResponse, the
+app's default response class.
+"""
+from functools import lru_cache
+from typing import Any, Optional
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def to_json(schema, value: Any) -> bytes:
+    """`value` (an ORM object, or a list of them for `list[Schema]`) encoded
+    as `schema`"""
+    adapter = _adapter(schema)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+class JSONBytesResponse(Response):
+    """A body that is already encoded JSON"""
+
+    media_type = "application/json"
+
+
+def json_response(content: bytes, response: Optional[Response] = None, status_code: int = 200) -> JSONBytesResponse:
+    """Response for encoded JSON. Headers set on the endpoint's injected
+    `response` (such as X-Next-Cursor) are carried over, as FastAPI only
+    merges them into responses it builds itself."""
+    result = JSONBytesResponse(content, status_code=status_code)
+    if response is not None:
+        result.raw_headers.extend(response.raw_headers)
+    return result
@@ -0,0 +1,204 @@
+"""
+Slow-query log and sampled per-request SQL traces.
+
+attach() times every statement of an engine (see app/database.py).
+Statements slower than SLOW_QUERY_THRESHOLD_MS go to a ring buffer of the
+last SLOW_QUERY_LOG_SIZE, with the endpoint that ran them, and to the log;
+GET /api/admin/debug/slow-queries lists them.
+
+With SQL_TRACE_SAMPLE_PERCENT above 0, SqlTraceMiddleware picks that share
+of requests and records every statement they run; each finished trace is
+logged and kept in a ring buffer of SQL_TRACE_LOG_SIZE, listed by
+GET /api/admin/debug/sql-traces.
+
+Parameters are redacted: numbers, booleans, dates and nulls are kept,
+strings and bytes become their length, so ids and page sizes stay visible
+but emails, names and hashes don't. Buffers are per worker process.
+
+Kept free of SQLAlchemy imports so app.main can install the middleware in a
+lean start (see app/utils/startup.py).
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Longer statements (multi-row INSERTs) are cut to this many characters
+MAX_STATEMENT_CHARS = 2000
+# Statements kept per trace; the rest are only counted
+MAX_TRACE_STATEMENTS = 500
+
+
+class _RequestTrace:
+    """The request a statement runs for and, if sampled, its statements"""
+
+    __slots__ = ("scope", "started", "statements", "dropped")
+
+    def __init__(self, scope: dict, sampled: bool):
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.statements: Optional[list] = [] if sampled else None
+        self.dropped = 0
+
+    @property
+    def endpoint(self) -> str:
+        route = getattr(self.scope.get("route"), "path", None) or self.scope["path"]
+        return f"{self.scope['method']} {route}"
+
+
+_current: ContextVar[Optional[_RequestTrace]] = ContextVar("sql_trace", default=None)
+
+
+def _redact_value(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact(parameters, executemany: bool = False):
+    """Parameters of a statement with strings and other values hidden;
+    executemany batches show their first row and a row count"""
+    if executemany and parameters:
+        return {"rows": len(parameters), "first": redact(parameters[0])}
+    if isinstance(parameters, dict):
+        return {name: _redact_value(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact_value(value) for value in parameters]
+    return _redact_value(parameters)
+
+
+class RingLog:
+    """The last `size` records, newest first when read"""
+
+    def __init__(self, size: int):
+        self.recorded = 0
+        self._records = deque(maxlen=max(size, 0))
+        self._lock = threading.Lock()
+
+    def add(self, record: dict) -> None:
+        with self._lock:
+            self.recorded += 1
+            self._records.append(record)
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return list(reversed(self._records))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+
+slow_queries = RingLog(settings.SLOW_QUERY_LOG_SIZE)
+sql_traces = RingLog(settings.SQL_TRACE_LOG_SIZE)
+
+
+def enabled() -> bool:
+    return settings.SLOW_QUERY_LOG_SIZE > 0 or settings.SQL_TRACE_SAMPLE_PERCENT > 0
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def attach(engine) -> None:
+    """Record slow statements of `engine` (the sync engine of an
+    AsyncEngine), and every statement of sampled requests"""
+    from sqlalchemy import event
+    threshold_ms = settings.SLOW_QUERY_THRESHOLD_MS
+    log_slow = settings.SLOW_QUERY_LOG_SIZE > 0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._sql_trace_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_sql_trace_start", None)
+        if start is None:
+            return
+        duration_ms = (time.perf_counter() - start) * 1000
+        trace = _current.get()
+        slow = log_slow and duration_ms >= threshold_ms
+        if not slow and (trace is None or trace.statements is None):
+            return
+        record = {
+            "duration_ms": round(duration_ms, 3),
+            "statement": statement[:MAX_STATEMENT_CHARS],
+            "parameters": redact(parameters, executemany),
+            "rows": cursor.rowcount if cursor.rowcount >= 0 else None,
+        }
+        if trace is not None and trace.statements is not None:
+            if len(trace.statements) < MAX_TRACE_STATEMENTS:
+                offset_ms = (start - trace.started) * 1000
+                trace.statements.append({"offset_ms": round(offset_ms, 3), **record})
+            else:
+                trace.dropped += 1
+        if slow:
+            endpoint = trace.endpoint if trace is not None else None
+            slow_queries.add({"at": _now(), "endpoint": endpoint, **record})
+            logger.warning("Slow query (%.1f ms) in %s: %s", duration_ms, endpoint or "background work",
+                           " ".join(statement.split())[:200])
+
+
+class SqlTraceMiddleware:
+    """ASGI middleware tying statements to their request, and tracing
+    `sample_percent` percent of requests in full"""
+
+    def __init__(self, app, sample_percent: float = 0.0):
+        self.app = app
+        self.sample_percent = sample_percent
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        sampled = self.sample_percent > 0 and random.random() * 100 < self.sample_percent
+        trace = _RequestTrace(scope, sampled)
+        token = _current.set(trace)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current.reset(token)
+            if sampled:
+                _finish(trace, status)
+
+
+def _finish(trace: _RequestTrace, status: int) -> None:
+    statements = trace.statements
+    record = {
+        "at": _now(),
+        "endpoint": trace.endpoint,
+        "path": trace.scope["path"],
+        "status": status,
+        "duration_ms": round((time.perf_counter() - trace.started) * 1000, 3),
+        "statement_count": len(statements) + trace.dropped,
+        "db_ms": round(sum(statement["duration_ms"] for statement in statements), 3),
+        "statements": statements,
+    }
+    sql_traces.add(record)
+    logger.info("SQL trace of %s: %d statements, %.1f ms in the database, %.1f ms total",
+                record["endpoint"], record["statement_count"], record["db_ms"], record["duration_ms"])
@@ -0,0 +1,140 @@
+"""
+Worker startup: which routers to load and when.
+
+STARTUP_MODE=eager (the default) imports every router with app.main and
+loads the autocomplete index before the first request. STARTUP_MODE=lean
+is for autoscaled and serverless workers, where cold starts count: app.main
+imports only FastAPI and the settings, so the worker answers /health as
+soon as it is up. Each router (with its schemas, SQLAlchemy models, jose
+and the rest) is imported by LazyRouterMiddleware on the first request
+under its prefix. No database connection is opened until a request needs
+one.
+
+warm_up() loads everything a lean start deferred. It runs in a background
+thread after startup (STARTUP_WARMUP) and is served as GET /warmup, for
+platforms that send warm-up requests before routing traffic.
+"""
+import importlib
+import logging
+import threading
+import time
+from anyio import to_thread
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def router_modules() -> dict[str, str]:
+    """Module of the router serving each path prefix, in inclusion order"""
+    # In async mode the user-facing endpoints run on the event loop with an
+    # AsyncSession. Admin endpoints stay on the threadpool and sync engine:
+    # their traffic is small, and imports, exports and analytics are built
+    # on the sync Session.
+    variant = "_async" if settings.DATABASE_MODE == "async" else ""
+    return {
+        "/api/auth": f"app.routers.auth{variant}",
+        "/api/users": f"app.routers.users{variant}",
+        "/api/foods": f"app.routers.foods{variant}",
+        "/api/orders": f"app.routers.orders{variant}",
+        "/api/admin": "app.routers.admin",
+    }
+
+
+def is_lean() -> bool:
+    return settings.STARTUP_MODE == "lean"
+
+
+class RouterLoader:
+    """Includes the routers of router_modules() into an app, each once"""
+
+    def __init__(self, app):
+        self.app = app
+        self.pending = router_modules()
+        self._lock = threading.Lock()
+
+    def prefix_of(self, path: str):
+        """Prefix of the pending router that would serve `path`, if any"""
+        for prefix in self.pending:
+            if path == prefix or path.startswith(prefix + "/"):
+                return prefix
+        return None
+
+    def load(self, prefix: str) -> None:
+        with self._lock:
+            module = self.pending.get(prefix)
+            if module is None:
+                return
+            self.app.include_router(importlib.import_module(module).router)
+            # Regenerate the OpenAPI schema with the new routes
+            self.app.openapi_schema = None
+            del self.pending[prefix]
+
+    def load_all(self) -> None:
+        for prefix in list(self.pending):
+            self.load(prefix)
+
+
+class LazyRouterMiddleware:
+    """Loads a router on the first request under its prefix (lean mode). The
+    import runs in a worker thread, so the event loop keeps serving."""
+
+    def __init__(self, app, loader: RouterLoader):
+        self.app = app
+        self.loader = loader
+        self.docs_paths = {loader.app.openapi_url, loader.app.docs_url, loader.app.redoc_url}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket") and self.loader.pending:
+            path = scope["path"]
+            if path in self.docs_paths:
+                await to_thread.run_sync(self.loader.load_all)
+            else:
+                prefix = self.loader.prefix_of(path)
+                if prefix is not None:
+                    await to_thread.run_sync(self.loader.load, prefix)
+        await self.app(scope, receive, send)
+
+
+def _connect_database() -> None:
+    from app.database import engine
+    with engine.connect():
+        pass
+
+
+def _load_auth_backends() -> None:
+    from jose import jwt  # noqa: F401
+    from app.utils.passwords import pwd_context
+    pwd_context()
+
+
+def _build_autocomplete_index() -> None:
+    from app.utils import autocomplete
+    autocomplete.ensure_current()
+
+
+def warm_up(loader: RouterLoader) -> dict:
+    """Load routers, auth backends, a pooled database connection and the
+    autocomplete index; returns milliseconds per step. Failed steps are
+    logged and skipped, and retried by the requests that need them."""
+    timings = {}
+    for name, step in (
+        ("routers", loader.load_all),
+        ("auth", _load_auth_backends),
+        ("database", _connect_database),
+        ("autocomplete", _build_autocomplete_index),
+    ):
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception("Warm-up step %s failed", name)
+            timings[name] = None
+            continue
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    return timings
+
+
+def warm_up_in_background(loader: RouterLoader) -> threading.Thread:
+    thread = threading.Thread(target=warm_up, args=(loader,), name="warm-up", daemon=True)
+    thread.start()
+    return thread
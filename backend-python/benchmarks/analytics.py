@@ -0,0 +1,139 @@
+"""
+Compare sales analytics served from the bucket tables with the same series
+aggregated from orders and order_items.
+
+A synthetic year of orders (ITEMS / 4 orders with four items each, 200 foods
+in 10 categories) is bulk inserted and the buckets rebuilt. For each
+granularity the per-food series of a fixed range is then computed by a raw
+GROUP BY over the base tables and read from the buckets. The bucket read
+touches one row per food and bucket, so its latency depends on the range
+and granularity, not on the size of order_items. The endpoint column adds
+HTTP and JSON encoding of the same rows.
+
+Run: python -m benchmarks.analytics [--items 10000000]
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select
+from benchmarks.harness import AsgiClient, SessionLocal, auth_headers, engine, reset_database, seed, timed
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.rollup import Granularity
+from app.utils import analytics, rollups
+from app.main import app
+
+BATCH_SIZE = 50_000
+ITEMS_PER_ORDER = 4
+START = datetime(2024, 1, 1)
+
+# granularity -> range length queried
+RANGES = {
+    Granularity.HOUR: timedelta(days=3),
+    Granularity.DAY: timedelta(days=90),
+    Granularity.WEEK: timedelta(days=364),
+}
+
+
+def insert_orders(orders: int, user_id: int, food_ids: list[int]):
+    """Bulk insert `orders` orders spread evenly over a year"""
+    rng = random.Random(7)
+    spacing = timedelta(days=365) / orders
+    statuses = list(OrderStatus)
+    with engine.begin() as conn:
+        for offset in range(0, orders, BATCH_SIZE):
+            batch = range(offset, min(offset + BATCH_SIZE, orders))
+            conn.execute(insert(Order), [
+                {
+                    "id": i + 1,
+                    "order_number": f"TB-ANL-{i:09d}",
+                    "user_id": user_id,
+                    "delivery_address": "1 Bench Street",
+                    "delivery_city": "Benchville",
+                    "delivery_zip": "00000",
+                    "delivery_phone": "+1 555-000-0000",
+                    "subtotal": 40.0,
+                    "delivery_fee": 4.99,
+                    "tax": 3.2,
+                    "total": 48.19,
+                    "status": statuses[i % len(statuses)],
+                    "created_at": START + spacing * i,
+                }
+                for i in batch
+            ])
+            conn.execute(insert(OrderItem), [
+                {"order_id": i + 1, "food_id": food_id, "quantity": rng.randint(1, 3), "price": 10.0}
+                for i in batch for food_id in rng.sample(food_ids, ITEMS_PER_ORDER)
+            ])
+
+
+def raw_food_series(db, granularity: Granularity, start: datetime, end: datetime):
+    """The per-food series as an aggregate over the base tables"""
+    bucket = rollups.bucket_expr(db, granularity, Order.created_at)
+    return db.execute(
+        select(
+            bucket, OrderItem.food_id,
+            func.count(func.distinct(OrderItem.order_id)),
+            func.sum(OrderItem.quantity),
+            func.sum(OrderItem.quantity * OrderItem.price),
+        )
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(Order.created_at >= start, Order.created_at < end, Order.status != OrderStatus.CANCELLED)
+        .group_by(bucket, OrderItem.food_id)
+    ).all()
+
+
+def median_ms(fn, repeat: int) -> float:
+    return statistics.median(timed(fn)[1] for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=10_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    reset_database()
+    ids = seed(users=2, foods=200, orders=0)
+    client = AsgiClient(app)
+    headers = auth_headers(ids["admin_id"], ["admin"])
+
+    start = time.perf_counter()
+    insert_orders(args.items // ITEMS_PER_ORDER, ids["user_ids"][1], ids["food_ids"])
+    print(f"inserted {args.items} order items in {time.perf_counter() - start:.1f}s")
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        rollups.rebuild(db)
+        db.commit()
+        print(f"rebuilt buckets in {time.perf_counter() - start:.1f}s")
+
+        range_start = START + timedelta(days=120)
+        print(f"{'granularity':<12} {'range':>6} {'rows':>7} {'raw scan ms':>12} {'buckets ms':>11} {'endpoint ms':>12}")
+        for granularity, length in RANGES.items():
+            range_end = range_start + length
+            raw_rows = len(raw_food_series(db, granularity, range_start, range_end))
+            raw_ms = median_ms(lambda: raw_food_series(db, granularity, range_start, range_end), args.repeat)
+            bucket_ms = median_ms(lambda: analytics.food_series(db, granularity, range_start, range_end), args.repeat)
+
+            def endpoint():
+                response = client.get("/api/admin/analytics/foods", headers=headers, params={
+                    "granularity": granularity.value,
+                    "start": range_start.isoformat(),
+                    "end": range_end.isoformat(),
+                })
+                assert response.status_code == 200, response.content
+                return response
+
+            rows = len(endpoint().json())
+            assert rows == raw_rows, (rows, raw_rows)
+            endpoint_ms = median_ms(endpoint, args.repeat)
+            print(f"{granularity.value:<12} {length.days:>5}d {rows:>7} {raw_ms:>12.1f} {bucket_ms:>11.1f} {endpoint_ms:>12.1f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
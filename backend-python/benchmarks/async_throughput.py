@@ -0,0 +1,113 @@
+"""
+Compare request throughput of DATABASE_MODE=sync and DATABASE_MODE=async.
+
+N concurrent clients each fetch their order history and the menu in a loop.
+In sync mode every request holds one of the ~40 threadpool threads for its
+whole database round trip; in async mode requests wait on the event loop,
+so concurrency is bounded by the connection pool instead. Each mode runs in
+its own process because the mode is read at import time.
+
+With DB_ADMISSION_LIMIT=0 sync mode can stall outright: all threads block
+waiting for a connection while the requests holding the connections wait
+for a thread to finish. Stalled requests are reported as errors once
+--timeout expires.
+
+The gap only shows when queries wait on the network: point DATABASE_URL at
+PostgreSQL (asyncpg is used for async mode). Against the default SQLite file
+both modes are CPU bound and finish close together.
+
+Run: python -m benchmarks.async_throughput [--clients 1000] [--requests 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ["MENU_CACHE_MAX_ENTRIES"] = "0"
+
+from benchmarks.harness import AsgiClient, auth_headers, reset_database, seed  # noqa: E402
+
+MODES = ("sync", "async")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def client_loop(
+    client: AsgiClient, headers: dict, requests: int, timeout: float, timings: list, errors: list
+):
+    for i in range(requests):
+        path = "/api/orders/" if i % 2 == 0 else "/api/foods/"
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                client.arequest("GET", path, params={"limit": 10}, headers=headers), timeout
+            )
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except Exception as exc:  # timeouts and QueuePool errors count as failures
+            errors.append(type(exc).__name__)
+        timings.append((time.perf_counter() - start) * 1000)
+
+
+async def run_mode(clients: int, requests: int, timeout: float, user_ids: list[int]) -> dict:
+    from app.main import app
+
+    client = AsgiClient(app)
+    timings, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client_loop(client, auth_headers(user_ids[i % len(user_ids)], ["user"]), requests, timeout, timings, errors)
+        for i in range(clients)
+    ])
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(timings),
+        "seconds": elapsed,
+        "rps": len(timings) / elapsed,
+        "p50": statistics.median(timings),
+        "p99": percentile(timings, 99),
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5, help="requests per client")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--mode", choices=MODES, help="run a single mode in this process")
+    parser.add_argument("--user-ids", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        user_ids = [int(i) for i in args.user_ids.split(",")]
+        print(json.dumps(asyncio.run(run_mode(args.clients, args.requests, args.timeout, user_ids))))
+        return
+
+    reset_database()
+    ids = seed(users=50, foods=100, orders=2000, items_per_order=3)
+    user_ids = ",".join(str(i) for i in ids["user_ids"][1:])
+
+    print(f"{args.clients} clients x {args.requests} requests")
+    print(f"{'mode':<6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.async_throughput", "--mode", mode,
+             "--clients", str(args.clients), "--requests", str(args.requests),
+             "--timeout", str(args.timeout), "--user-ids", user_ids],
+            env={**os.environ, "DATABASE_MODE": mode},
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<6} {result['rps']:>9.1f} {result['p50']:>9.2f} {result['p99']:>9.2f} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
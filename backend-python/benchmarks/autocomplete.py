@@ -0,0 +1,110 @@
+"""
+Microbenchmark of the in-memory menu autocomplete index.
+
+Builds the index from N synthetic foods (names drawn from a few hundred
+dish words plus a couple of thousand made-up ones, 20 categories), then
+times suggest() for typical keystroke sequences: single letters, longer
+prefixes, multi-word and misspelled queries. Each query is timed on its
+first call (memo miss) and on repeats. For reference the same prefixes are
+run as the ILIKE query the search box used before, on SQLite.
+
+Run: python -m benchmarks.autocomplete [--foods 100000]
+"""
+import argparse
+import random
+import statistics
+import time
+from sqlalchemy import insert, select
+from benchmarks.harness import SessionLocal, engine, reset_database, seed
+from app.models.food import Food
+from app.utils.autocomplete import AutocompleteIndex
+
+ADJECTIVES = ["spicy", "smoked", "crispy", "grilled", "roasted", "creamy", "sweet", "sour", "garlic", "honey",
+              "lemon", "pepper", "chili", "herb", "truffle", "classic", "double", "mini", "loaded", "tandoori"]
+PROTEINS = ["chicken", "beef", "pork", "lamb", "salmon", "tuna", "shrimp", "tofu", "paneer", "duck",
+            "turkey", "cod", "mushroom", "halloumi", "chickpea", "lentil", "egg", "bacon", "crab", "squid"]
+DISHES = ["burger", "pizza", "salad", "wrap", "curry", "noodles", "ramen", "taco", "burrito", "sandwich",
+          "risotto", "pasta", "bowl", "skewers", "pie", "soup", "stew", "dumplings", "fries", "platter"]
+SYLLABLES = ["ka", "zu", "mi", "ro", "ta", "shi", "po", "la", "ne", "vo", "ri", "qu", "ba", "do", "fe", "gi"]
+
+QUERIES = ["c", "s", "ch", "sp", "chi", "chick", "chicken", "spicy chi", "chicken bu", "grilled salmon r",
+           "tandori", "risoto", "kazumi", "zzzz"]
+
+
+def synthetic_foods(count: int, rng: random.Random) -> list[tuple]:
+    """(id, name, rating, reviews_count, price, image, category) rows"""
+    made_up = ["".join(rng.choices(SYLLABLES, k=3)) for _ in range(2000)]
+    rows = []
+    for food_id in range(1, count + 1):
+        words = [rng.choice(ADJECTIVES), rng.choice(PROTEINS), rng.choice(DISHES)]
+        if rng.random() < 0.5:
+            words.insert(0, rng.choice(made_up).title())
+        rows.append((
+            food_id, " ".join(words).title(), round(rng.uniform(3, 5), 1), rng.randint(0, 500),
+            round(rng.uniform(3, 30), 2), None, f"Category {food_id % 20}"
+        ))
+    return rows
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def ilike_ms(prefix: str, repeat: int) -> float:
+    db = SessionLocal()
+    try:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            db.execute(select(Food.id, Food.name).where(Food.name.ilike(f"%{prefix}%")).limit(8)).all()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--foods", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--skip-db", action="store_true", help="Skip the ILIKE reference")
+    args = parser.parse_args()
+
+    rows = synthetic_foods(args.foods, random.Random(3))
+    index = AutocompleteIndex()
+    start = time.perf_counter()
+    index.build(rows, version=0)
+    print(f"built index of {len(index)} foods in {time.perf_counter() - start:.2f}s")
+
+    ilike = {}
+    if not args.skip_db:
+        reset_database()
+        ids = seed(users=1, foods=1, orders=0)
+        category_id = SessionLocal().get(Food, ids["food_ids"][0]).category_id
+        # Food names are unique per category, so each name goes in once
+        unique_rows = {row[1]: row for row in rows}.values()
+        with engine.begin() as conn:
+            conn.execute(insert(Food), [
+                {"name": name, "price": price, "rating": rating, "reviews_count": reviews, "category_id": category_id}
+                for _, name, rating, reviews, price, _, _ in unique_rows
+            ])
+        ilike = {query: ilike_ms(query, 5) for query in QUERIES}
+
+    print(f"{'query':<18} {'hits':>4} {'first us':>9} {'p50 us':>8} {'p99 us':>8} {'ilike ms':>9}")
+    for query in QUERIES:
+        start = time.perf_counter()
+        hits = len(index.suggest(query, 8))
+        first_us = (time.perf_counter() - start) * 1e6
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            index.suggest(query, 8)
+            timings.append((time.perf_counter() - start) * 1e6)
+        reference = f"{ilike[query]:>9.2f}" if query in ilike else f"{'-':>9}"
+        print(f"{query:<18} {hits:>4} {first_us:>9.1f} {statistics.median(timings):>8.1f} "
+              f"{percentile(timings, 99):>8.1f} {reference}")
+
+
+if __name__ == "__main__":
+    main()
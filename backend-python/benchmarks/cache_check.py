@@ -0,0 +1,156 @@
+"""
+Check that menu cache invalidation reaches every worker.
+
+Two NamespacedCache instances stand for two workers sharing one backend (an
+in-process stand-in for Redis). Checks that entries are shared, that an
+invalidation on one worker is seen by the other after its version poll, and
+that a value read before an invalidation is never stored: reader threads
+keep caching a value from a fake database while a writer changes it and
+invalidates, and afterwards neither worker may return anything but the
+last value. Finally checks that during a backend outage an invalidation
+fails loudly and workers keep their last known version.
+
+Run: python -m benchmarks.cache_check
+"""
+import random
+import sys
+import threading
+import time
+from app.utils.cache import CacheUnavailable, MemoryBackend, NamespacedCache
+
+POLL_SECONDS = 0.05
+
+
+class SharedMemoryBackend(MemoryBackend):
+    """MemoryBackend that NamespacedCache treats as shared, like Redis"""
+
+    name = "shared-memory"
+    shared = True
+
+
+class FlakySharedBackend(SharedMemoryBackend):
+    """SharedMemoryBackend whose every call fails while `down` is set"""
+
+    down = False
+
+    def _check(self):
+        if self.down:
+            raise CacheUnavailable("backend down")
+
+    def fetch(self, key):
+        self._check()
+        return super().fetch(key)
+
+    def store(self, key, value, ttl_seconds):
+        self._check()
+        super().store(key, value, ttl_seconds)
+
+    def incr(self, key):
+        self._check()
+        return super().incr(key)
+
+    def get_counter(self, key):
+        self._check()
+        return super().get_counter(key)
+
+
+def workers(backend) -> tuple:
+    return tuple(
+        NamespacedCache("menu", backend, max_entries=100, ttl_seconds=60, version_poll_seconds=POLL_SECONDS)
+        for _ in range(2)
+    )
+
+
+def check_sharing(failures: list) -> None:
+    a, b = workers(SharedMemoryBackend(1000))
+    a.set("key", "first", a.version())
+    if b.get("key") != "first":
+        failures.append("an entry set on one worker is not read by the other")
+
+    a.invalidate()
+    if a.get("key") is not None:
+        failures.append("the invalidating worker still returns the old entry")
+    time.sleep(POLL_SECONDS * 2)
+    if b.get("key") is not None:
+        failures.append("the other worker returns the old entry after its version poll")
+
+
+def check_stale_set(failures: list) -> None:
+    a, b = workers(SharedMemoryBackend(1000))
+    version = b.version()
+    # An admin change lands between b's database read and its cache store
+    a.invalidate()
+    time.sleep(POLL_SECONDS * 2)
+    b.set("key", "before the change", version)
+    if a.get("key") is not None or b.get("key") is not None:
+        failures.append("a value read before an invalidation was stored")
+
+
+def check_concurrent(failures: list, readers: int = 8, writes: int = 200) -> None:
+    a, b = workers(SharedMemoryBackend(1000))
+    database = {"value": 0}
+    done = threading.Event()
+
+    def read(cache):
+        rng = random.Random()
+        while not done.is_set():
+            version = cache.version()
+            if cache.get("key") is None:
+                value = database["value"]
+                time.sleep(rng.uniform(0, 0.002))
+                cache.set("key", value, version)
+
+    def write():
+        for i in range(1, writes + 1):
+            database["value"] = i
+            a.invalidate()
+            time.sleep(0.001)
+        done.set()
+
+    threads = [threading.Thread(target=read, args=((a, b)[i % 2],)) for i in range(readers)]
+    threads.append(threading.Thread(target=write))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    time.sleep(POLL_SECONDS * 2)
+    for name, cache in (("invalidating", a), ("other", b)):
+        value = cache.get("key")
+        if value not in (None, writes):
+            failures.append(f"{name} worker returns {value} after the last change, expected {writes}")
+
+
+def check_outage(failures: list) -> None:
+    backend = FlakySharedBackend(1000)
+    a, b = workers(backend)
+    a.invalidate()
+    a.invalidate()
+    time.sleep(POLL_SECONDS * 2)
+    b.set("key", "current", b.version())
+
+    backend.down = True
+    try:
+        a.invalidate()
+        failures.append("an invalidation that could not be recorded did not raise")
+    except CacheUnavailable:
+        pass
+    time.sleep(POLL_SECONDS * 2)
+    if b.version() != 2 or b.get("key") != "current":
+        failures.append(f"a failed version read moved the version to {b.version()} instead of keeping 2")
+
+
+def main() -> int:
+    failures = []
+    check_sharing(failures)
+    check_stale_set(failures)
+    check_concurrent(failures)
+    check_outage(failures)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print("OK" if not failures else f"{len(failures)} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
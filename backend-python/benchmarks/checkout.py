@@ -0,0 +1,50 @@
+"""
+Benchmark order creation for 1, 10 and 50-line carts.
+
+Reports SQL statements per checkout (including the auth lookup) and latency.
+SQLite cannot batch INSERT ... RETURNING, so it sends one statement per order
+line; on PostgreSQL the order items are a single multi-row INSERT.
+
+Run: python -m benchmarks.checkout [--iterations 50]
+"""
+import argparse
+import statistics
+from benchmarks.harness import (
+    AsgiClient, auth_headers, count_statements, reset_database, seed, timed
+)
+from app.main import app
+
+CART_SIZES = (1, 10, 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    reset_database()
+    ids = seed(users=2, foods=100, orders=0)
+    client = AsgiClient(app)
+    headers = auth_headers(ids["user_ids"][1], ["user"])
+
+    print(f"{'lines':>6} {'statements':>11} {'mean ms':>9} {'p95 ms':>8}")
+    for size in CART_SIZES:
+        payload = {
+            "delivery_address": "1 Bench Street",
+            "delivery_city": "Benchville",
+            "delivery_zip": "00000",
+            "delivery_phone": "+1 555-000-0000",
+            "items": [{"food_id": food_id, "quantity": 2} for food_id in ids["food_ids"][:size]],
+        }
+        timings = []
+        for _ in range(args.iterations):
+            with count_statements() as statements:
+                response, elapsed = timed(client.post, "/api/orders/", json_body=payload, headers=headers)
+            assert response.status_code == 201, response.content
+            timings.append(elapsed)
+        p95 = statistics.quantiles(timings, n=20)[-1]
+        print(f"{size:>6} {len(statements):>11} {statistics.mean(timings):>9.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
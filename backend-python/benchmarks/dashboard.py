@@ -0,0 +1,111 @@
+"""
+Compare the admin dashboard served from rollups with the full-table
+aggregates it used to run, as the orders table grows.
+
+Orders and items are bulk inserted and the rollups rebuilt at each size.
+The rollup dashboard reads a fixed number of small rows, so its latency
+should stay flat while the full scans grow linearly.
+
+Run: python -m benchmarks.dashboard [--sizes 10000 100000 1000000]
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select
+from benchmarks.harness import AsgiClient, SessionLocal, auth_headers, engine, reset_database, seed, timed
+from app.models.food import Food
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.user import User
+from app.utils import rollups
+from app.main import app
+
+BATCH_SIZE = 10_000
+
+
+def insert_orders(start_index: int, count: int, user_id: int, food_ids: list[int]):
+    """Bulk insert orders with two items each through Core executemany"""
+    rng = random.Random(start_index)
+    start = datetime(2023, 1, 1)
+    statuses = list(OrderStatus)
+    with engine.begin() as conn:
+        for offset in range(start_index, start_index + count, BATCH_SIZE):
+            batch = range(offset, min(offset + BATCH_SIZE, start_index + count))
+            conn.execute(insert(Order), [
+                {
+                    "id": i + 1,
+                    "order_number": f"TB-DASH-{i:09d}",
+                    "user_id": user_id,
+                    "delivery_address": "1 Bench Street",
+                    "delivery_city": "Benchville",
+                    "delivery_zip": "00000",
+                    "delivery_phone": "+1 555-000-0000",
+                    "subtotal": 20.0,
+                    "delivery_fee": 4.99,
+                    "tax": 1.6,
+                    "total": 26.59,
+                    "status": statuses[i % len(statuses)],
+                    "created_at": start + timedelta(minutes=i),
+                }
+                for i in batch
+            ])
+            conn.execute(insert(OrderItem), [
+                {"order_id": i + 1, "food_id": rng.choice(food_ids), "quantity": rng.randint(1, 3), "price": 10.0}
+                for i in batch for _ in range(2)
+            ])
+
+
+def full_scan_stats(db):
+    """The aggregates the dashboard ran before rollups"""
+    db.scalar(select(func.count(User.id)))
+    db.scalar(select(func.count(Order.id)))
+    db.scalar(select(func.sum(Order.total)).where(Order.status != OrderStatus.CANCELLED))
+    db.execute(select(Order.status, func.count(Order.id)).group_by(Order.status)).all()
+    db.execute(
+        select(Food.name, func.sum(OrderItem.quantity))
+        .join(OrderItem).group_by(Food.id).order_by(func.sum(OrderItem.quantity).desc()).limit(5)
+    ).all()
+
+
+def median_ms(fn, repeat: int) -> float:
+    return statistics.median(timed(fn)[1] for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    reset_database()
+    ids = seed(users=2, foods=50, orders=0)
+    client = AsgiClient(app)
+    headers = auth_headers(ids["admin_id"], ["admin"])
+
+    print(f"{'orders':>10} {'full scan ms':>13} {'rollup ms':>10} {'rebuild s':>10}")
+    inserted = 0
+    for size in sorted(args.sizes):
+        insert_orders(inserted, size - inserted, ids["user_ids"][1], ids["food_ids"])
+        inserted = size
+
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            rollups.rebuild(db)
+            db.commit()
+            rebuild_seconds = time.perf_counter() - start
+            scan_ms = median_ms(lambda: full_scan_stats(db), args.repeat)
+        finally:
+            db.close()
+
+        def dashboard():
+            response = client.get("/api/admin/dashboard", headers=headers)
+            assert response.status_code == 200, response.content
+
+        rollup_ms = median_ms(dashboard, args.repeat)
+        print(f"{size:>10} {scan_ms:>13.2f} {rollup_ms:>10.2f} {rebuild_seconds:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Throughput of the bulk food import and export endpoints.
+
+Drives the app in process, as an admin:
+
+1. one POST /api/admin/foods per food (the way menus were loaded before),
+2. POST /api/admin/foods/import of a CSV file of new foods, uploaded in
+   64 KiB chunks,
+3. the same file again, so every row takes the ON CONFLICT DO UPDATE path,
+4. GET /api/admin/foods/export as CSV and as JSON Lines,
+5. the JSON Lines export imported back.
+
+Run: python -m benchmarks.food_import [--foods 50000] [--single 500]
+"""
+import argparse
+import csv
+import io
+import random
+import time
+from benchmarks.harness import AsgiClient, auth_headers, reset_database, seed
+from app.config import settings
+from app.main import app
+
+CATEGORIES = 5
+
+
+def food_records(count: int, rng: random.Random, prefix: str) -> list[dict]:
+    return [
+        {
+            "name": f"{prefix} {i}",
+            "description": f"Imported food number {i}",
+            "price": round(rng.uniform(3, 30), 2),
+            "category": f"Category {i % CATEGORIES}",
+            "prep_time": f"{rng.randint(5, 40)} min",
+            "is_special": i % 10 == 0,
+        }
+        for i in range(count)
+    ]
+
+
+def to_csv(records: list[dict]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(records[0]), lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(records)
+    return buffer.getvalue().encode()
+
+
+def report(label: str, rows: int, seconds: float, extra: str = "") -> None:
+    print(f"{label:<34} {rows:>8} rows {seconds:>8.2f} s {rows / seconds:>10.0f} rows/s  {extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--foods", type=int, default=50_000)
+    parser.add_argument("--single", type=int, default=500, help="Foods created one request at a time")
+    parser.add_argument("--batch-size", type=int, default=settings.FOOD_BULK_BATCH_SIZE)
+    args = parser.parse_args()
+
+    reset_database()
+    ids = seed(users=2, foods=CATEGORIES, orders=0)
+    client = AsgiClient(app)
+    admin = auth_headers(ids["admin_id"], ["admin", "user"])
+    rng = random.Random(7)
+
+    start = time.perf_counter()
+    for i, record in enumerate(food_records(args.single, rng, "Single")):
+        body = {**record, "category_id": i % CATEGORIES + 1}
+        del body["category"]
+        response = client.post("/api/admin/foods", headers=admin, json_body=body)
+        assert response.status_code == 201, response.content
+    report("POST /api/admin/foods (one each)", args.single, time.perf_counter() - start)
+
+    upload = to_csv(food_records(args.foods, rng, "Bulk"))
+    csv_headers = {**admin, "Content-Type": "text/csv"}
+    for label, mode in (("import csv (new rows)", "insert"), ("import csv (same rows, upsert)", "upsert")):
+        start = time.perf_counter()
+        response = client.request(
+            "POST", "/api/admin/foods/import", headers=csv_headers, content=upload,
+            params={"mode": mode, "batch_size": args.batch_size}
+        )
+        seconds = time.perf_counter() - start
+        assert response.status_code == 200, response.content
+        result = response.json()
+        report(label, result["records"], seconds,
+               f"inserted={result['inserted']} updated={result['updated']} failed={result['failed']} "
+               f"batches={len(result['batches'])} ({len(upload) / seconds / 2 ** 20:.1f} MiB/s)")
+
+    exported = {}
+    for file_format in ("csv", "jsonl"):
+        start = time.perf_counter()
+        response = client.get("/api/admin/foods/export", headers=admin, params={"format": file_format})
+        seconds = time.perf_counter() - start
+        assert response.status_code == 200, response.content
+        exported[file_format] = response.content
+        rows = response.content.count(b"\n") - (file_format == "csv")
+        report(f"export {file_format}", rows, seconds, f"({len(response.content) / 2 ** 20:.1f} MiB)")
+
+    start = time.perf_counter()
+    response = client.request(
+        "POST", "/api/admin/foods/import", headers={**admin, "Content-Type": "application/x-ndjson"},
+        content=exported["jsonl"], params={"batch_size": args.batch_size}
+    )
+    seconds = time.perf_counter() - start
+    result = response.json()
+    report("import jsonl export (upsert)", result["records"], seconds,
+           f"updated={result['updated']} failed={result['failed']}")
+
+
+if __name__ == "__main__":
+    main()
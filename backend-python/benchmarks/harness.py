@@ -0,0 +1,280 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Importing this module points the app at a throwaway SQLite database unless
+DATABASE_URL is already set, so the scripts can run without Postgres.
+"""
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'tastybites_bench.db')}"
+)
+
+from sqlalchemy import event  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.database import SessionLocal, engine, Base  # noqa: E402
+from app.models.user import User, Role, UserRole  # noqa: E402
+from app.models.food import Food, Category  # noqa: E402
+from app.models.order import Order, OrderItem, OrderStatus  # noqa: E402
+from app.utils.security import create_access_token  # noqa: E402
+from app.utils import rollups  # noqa: E402
+
+# bcrypt hash of "secret" - hashing once per seeded user would dominate setup
+PASSWORD_HASH = "$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW"
+
+
+def reset_database():
+    """Drop and recreate every table"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def seed(users: int = 10, foods: int = 50, orders: int = 200, items_per_order: int = 3, seed: int = 42) -> dict:
+    """Seed a fresh dataset and return the ids the scripts need"""
+    rng = random.Random(seed)
+    db = SessionLocal()
+    try:
+        categories = [Category(name=f"Category {i}", description="Benchmark category") for i in range(5)]
+        db.add_all(categories)
+        db.flush()
+
+        food_rows = [
+            Food(
+                name=f"Food {i}",
+                description=f"Benchmark food number {i}",
+                price=round(rng.uniform(3, 30), 2),
+                category_id=categories[i % len(categories)].id,
+                is_special=i % 10 == 0,
+            )
+            for i in range(foods)
+        ]
+        db.add_all(food_rows)
+
+        user_rows = [
+            User(
+                email=f"user{i}@bench.example.com",
+                hashed_password=PASSWORD_HASH,
+                first_name="Bench",
+                last_name=f"User{i}",
+            )
+            for i in range(users)
+        ]
+        db.add_all(user_rows)
+        db.flush()
+
+        db.add_all([Role(user_id=u.id, role=UserRole.USER) for u in user_rows])
+        db.add(Role(user_id=user_rows[0].id, role=UserRole.ADMIN))
+
+        # Explicit timestamps spread orders over time and keep SQLite's stored
+        # format identical to bound parameters, which cursor comparisons rely on
+        start = datetime(2024, 1, 1)
+        for i in range(orders):
+            chosen = rng.sample(food_rows, k=min(items_per_order, len(food_rows)))
+            subtotal = round(sum(f.price for f in chosen), 2)
+            db.add(Order(
+                order_number=f"TB-BENCH-{i:08d}",
+                user_id=user_rows[i % len(user_rows)].id,
+                delivery_address="1 Bench Street",
+                delivery_city="Benchville",
+                delivery_zip="00000",
+                delivery_phone="+1 555-000-0000",
+                subtotal=subtotal,
+                tax=round(subtotal * 0.08, 2),
+                total=round(subtotal * 1.08 + 4.99, 2),
+                status=rng.choice(list(OrderStatus)),
+                created_at=start + timedelta(minutes=i * 7 // 3),
+                items=[OrderItem(food_id=f.id, quantity=1, price=f.price) for f in chosen],
+            ))
+        db.commit()
+        rollups.rebuild(db)
+        db.commit()
+
+        return {
+            "admin_id": user_rows[0].id,
+            "user_ids": [u.id for u in user_rows],
+            "food_ids": [f.id for f in food_rows],
+        }
+    finally:
+        db.close()
+
+
+def auth_headers(user_id: int, roles: list[str]) -> dict:
+    """Bearer token headers for a seeded user"""
+    token = create_access_token({
+        "sub": str(user_id),
+        "email": f"{user_id}@bench.example.com",
+        "roles": roles,
+        "active": True,
+        "ver": settings.AUTH_TOKEN_VERSION,
+        "iat": int(time.time()),
+    })
+    return {"Authorization": f"Bearer {token}"}
+
+
+@contextmanager
+def count_statements(bind=engine):
+    """Count SQL statements sent to the database inside the block"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(bind, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", before_cursor_execute)
+
+
+class Response:
+    def __init__(self, status: int, headers: dict, body: bytes):
+        self.status_code = status
+        self.headers = headers
+        self.content = body
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AsgiClient:
+    """Minimal in-process ASGI client, enough to drive the API without a server"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def arequest(self, method: str, path: str, params: dict = None, json_body=None, headers: dict = None,
+                       content: bytes = None, chunk_size: int = 64 * 1024, on_body=None) -> Response:
+        """`content` is a raw body, sent in `chunk_size` messages like a
+        streamed upload. With `on_body`, response body chunks are passed to
+        it as they are sent instead of being kept."""
+        body = json.dumps(json_body).encode() if json_body is not None else content or b""
+        messages = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)] or [b""]
+        raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+        if json_body is not None:
+            raw_headers.append((b"content-type", b"application/json"))
+        raw_headers.append((b"host", b"bench"))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": urlencode(params or {}, doseq=True).encode(),
+            "headers": raw_headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("bench", 80),
+        }
+        sent = 0
+        status = 500
+        response_headers = {}
+        chunks = []
+        # Like a server, report the client gone only once the response is
+        # sent; streaming responses listen for it while they stream
+        finished = asyncio.Event()
+
+        async def receive():
+            nonlocal sent
+            if sent == len(messages):
+                await finished.wait()
+                return {"type": "http.disconnect"}
+            sent += 1
+            return {"type": "http.request", "body": messages[sent - 1], "more_body": sent < len(messages)}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers.update({k.decode(): v.decode() for k, v in message.get("headers", [])})
+            elif message["type"] == "http.response.body":
+                (on_body or chunks.append)(message.get("body", b""))
+                if not message.get("more_body", False):
+                    finished.set()
+
+        await self.app(scope, receive, send)
+        return Response(status, response_headers, b"".join(chunks))
+
+    def request(self, method: str, path: str, **kwargs) -> Response:
+        return asyncio.run(self.arequest(method, path, **kwargs))
+
+    def get(self, path: str, **kwargs) -> Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> Response:
+        return self.request("POST", path, **kwargs)
+
+
+class SocketClient:
+    """HTTP/1.1 client over one keep-alive connection to a local server,
+    with the same arequest() as AsgiClient"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    async def arequest(self, method: str, path: str, params: dict = None, json_body=None,
+                       headers: dict = None) -> Response:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            return await self._exchange(method, path, params, json_body, headers)
+        except Exception:
+            # The connection is in an unknown state, the next request reconnects
+            await self.aclose()
+            raise
+
+    async def _exchange(self, method, path, params, json_body, headers) -> Response:
+        body = json.dumps(json_body).encode() if json_body is not None else b""
+        target = f"{path}?{urlencode(params, doseq=True)}" if params else path
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(body)}"]
+        if json_body is not None:
+            lines.append("Content-Type: application/json")
+        lines.extend(f"{k}: {v}" for k, v in (headers or {}).items())
+        self._writer.write("\r\n".join(lines).encode() + b"\r\n\r\n" + body)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError("Server closed the connection")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while (line := await self._reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while size := int((await self._reader.readline()).split(b";")[0], 16):
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readline()
+            await self._reader.readline()
+            content = b"".join(chunks)
+        else:
+            content = await self._reader.readexactly(int(response_headers.get("content-length", 0)))
+        if response_headers.get("connection") == "close":
+            await self.aclose()
+        return Response(status, response_headers, content)
+
+    async def aclose(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+
+def timed(fn, *args, **kwargs):
+    """Run fn and return (result, elapsed milliseconds)"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
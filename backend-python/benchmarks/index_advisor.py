@@ -0,0 +1,207 @@
+"""
+Index advisor: EXPLAIN every query the API sends and flag table scans.
+
+Seeds a dataset, drives each endpoint below through the app (following one
+X-Next-Cursor page for listings) and captures the SELECT, UPDATE and DELETE
+statements it sends with their parameters. Each one is explained against
+the seeded data:
+
+- SQLite: EXPLAIN QUERY PLAN; a "SCAN <table>" step without an index is a
+  full scan, unless it walks the table in primary key order for the
+  statement's ORDER BY (the rowid b-tree is SQLite's primary key index).
+- PostgreSQL: EXPLAIN (FORMAT JSON) with enable_seqscan off, so a Seq Scan
+  left in the plan means no index can serve the query at all, whatever the
+  table size.
+
+A flagged scan lists the table's columns the statement filters or sorts on,
+as a starting point for an index. Scans of tables in EXPECTED_SCANS are
+reported but not counted. The exit status is 1 when anything was flagged.
+
+Run: python -m benchmarks.index_advisor [--orders 2000]
+"""
+import argparse
+import json
+import re
+import sys
+from sqlalchemy import Column, event
+from sqlalchemy.sql import visitors
+from benchmarks.harness import AsgiClient, Base, auth_headers, engine, reset_database, seed
+from app.main import app
+from app.models.order import OrderStatus
+from app.utils.pagination import NEXT_CURSOR_HEADER
+
+# (method, path, caller, query params, JSON body)
+CASES = [
+    ("GET", "/api/foods/", "anonymous", {}, None),
+    ("GET", "/api/foods/", "anonymous", {"category": "Category 1"}, None),
+    ("GET", "/api/foods/", "anonymous", {"is_special": "true"}, None),
+    ("GET", "/api/foods/{food_id}", "anonymous", {}, None),
+    ("GET", "/api/foods/categories", "anonymous", {}, None),
+    ("GET", "/api/users/me", "user", {}, None),
+    ("GET", "/api/orders/", "user", {"limit": 5}, None),
+    ("GET", "/api/orders/{order_id}", "user", {}, None),
+    ("POST", "/api/orders/", "user", {}, "checkout"),
+    ("POST", "/api/orders/{order_id}/cancel", "user", {}, None),
+    ("GET", "/api/admin/dashboard", "admin", {}, None),
+    ("GET", "/api/admin/users", "admin", {"limit": 5}, None),
+    ("GET", "/api/admin/foods", "admin", {"limit": 5}, None),
+    ("GET", "/api/admin/foods", "admin", {"limit": 5, "include_unavailable": "false"}, None),
+    ("GET", "/api/admin/foods/export", "admin", {"format": "jsonl"}, None),
+    ("GET", "/api/admin/orders", "admin", {"limit": 5}, None),
+    ("GET", "/api/admin/orders", "admin", {"limit": 5, "status": OrderStatus.PENDING.value}, None),
+    ("GET", "/api/admin/orders/export", "admin",
+     {"format": "jsonl", "start": "2024-01-01T00:00:00", "end": "2024-01-02T00:00:00"}, None),
+    ("PUT", "/api/admin/orders/{order_id}/status", "admin", {}, {"status": OrderStatus.DELIVERED.value}),
+    ("GET", "/api/admin/analytics/sales", "admin", {}, None),
+    ("GET", "/api/admin/analytics/foods", "admin", {}, None),
+    ("GET", "/api/admin/analytics/categories", "admin", {}, None),
+    ("DELETE", "/api/admin/categories/{category_id}", "admin", {}, None),
+]
+
+# table -> why a full scan is fine
+EXPECTED_SCANS = {
+    "categories": "a handful of rows, listed whole",
+    "stat_counters": "a handful of counters, read whole",
+}
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?! USING)")
+
+
+def orders_by_primary_key(compiled_statement, table: str) -> bool:
+    """Whether the statement's ORDER BY starts with `table`'s primary key"""
+    order_by = getattr(compiled_statement, "_order_by_clauses", None)
+    if not order_by:
+        return False
+    column = getattr(order_by[0], "element", order_by[0])
+    return isinstance(column, Column) and column.table.name == table and column.primary_key
+
+
+def sqlite_scans(conn, statement: str, parameters, compiled_statement) -> list[str]:
+    details = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+    sorted_in_temp = any("TEMP B-TREE FOR ORDER BY" in detail for detail in details)
+    return [
+        match.group(1) for match in map(_SQLITE_SCAN.match, details)
+        if match and (sorted_in_temp or not orders_by_primary_key(compiled_statement, match.group(1)))
+    ]
+
+
+def postgresql_scans(conn, statement: str, parameters, compiled_statement) -> list[str]:
+    conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    (plan,) = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar_one()
+    scans, nodes = [], [plan["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan":
+            scans.append(node["Relation Name"])
+        nodes.extend(node.get("Plans", ()))
+    return scans
+
+
+def candidate_columns(compiled_statement, table: str) -> list[str]:
+    """Columns of `table` in the statement's WHERE, join and ORDER BY clauses"""
+    clauses = [
+        getattr(compiled_statement, "whereclause", None),
+        *(getattr(compiled_statement, "_order_by_clauses", None) or ()),
+    ]
+    for join in getattr(compiled_statement, "get_final_froms", lambda: ())():
+        clauses.append(getattr(join, "onclause", None))
+    columns = {}
+    for clause in filter(lambda clause: clause is not None, clauses):
+        for element in visitors.iterate(clause):
+            if isinstance(element, Column) and element.table.name == table:
+                columns[element.name] = None
+    return list(columns)
+
+
+class StatementLog:
+    """Statements, parameters and the compiled statement sent while active"""
+
+    def __init__(self, bind=engine):
+        self.bind = bind
+        self.entries = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE"):
+            compiled = getattr(context, "compiled", None)
+            self.entries.append((statement, parameters, getattr(compiled, "statement", None)))
+
+    def __enter__(self):
+        event.listen(self.bind, "before_cursor_execute", self._record)
+        return self.entries
+
+    def __exit__(self, *exc):
+        event.remove(self.bind, "before_cursor_execute", self._record)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--verbose", action="store_true", help="Print every explained statement")
+    args = parser.parse_args()
+
+    reset_database()
+    ids = seed(users=20, foods=200, orders=args.orders, items_per_order=4)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    client = AsgiClient(app)
+    headers = {
+        "anonymous": {},
+        "user": auth_headers(ids["user_ids"][1], ["user"]),
+        "admin": auth_headers(ids["admin_id"], ["admin", "user"]),
+    }
+    own_order_id = client.get("/api/orders/", headers=headers["user"]).json()[0]["id"]
+    path_params = {"food_id": ids["food_ids"][0], "order_id": own_order_id, "category_id": 1}
+    checkout = {
+        "items": [{"food_id": food_id, "quantity": 1} for food_id in ids["food_ids"][:3]],
+        "delivery_address": "1 Bench Street",
+        "delivery_city": "Benchville",
+        "delivery_zip": "00000",
+        "delivery_phone": "+1 555-000-0000",
+    }
+    explain = postgresql_scans if engine.dialect.name == "postgresql" else sqlite_scans
+
+    flagged = 0
+    explained = 0
+    for method, path, who, params, body in CASES:
+        url = path.format(**path_params)
+        pages = [dict(params)]
+        while pages:
+            page_params = pages.pop()
+            with StatementLog() as entries:
+                response = client.request(
+                    method, url, params=page_params, headers=headers[who],
+                    json_body=checkout if body == "checkout" else body
+                )
+            label = f"{method} {url}" + (f" {json.dumps(page_params)}" if page_params else "")
+            if response.status_code >= 500:
+                print(f"ERROR {label} status={response.status_code}")
+                flagged += 1
+                continue
+            cursor = response.headers.get(NEXT_CURSOR_HEADER.lower())
+            if cursor and "cursor" not in page_params:
+                pages.append({**page_params, "cursor": cursor})
+
+            for statement, parameters, compiled_statement in entries:
+                explained += 1
+                with engine.begin() as conn:
+                    scans = explain(conn, statement, parameters, compiled_statement)
+                flat = " ".join(statement.split())
+                if args.verbose:
+                    print(f"     {label}: {flat[:140]}")
+                for table in scans:
+                    if table not in Base.metadata.tables:
+                        continue
+                    expected = EXPECTED_SCANS.get(table)
+                    flagged += expected is None
+                    columns = candidate_columns(compiled_statement, table) if compiled_statement is not None else []
+                    print(f"{'ok  ' if expected else 'SCAN'} {label}: {table}"
+                          + (f" ({expected})" if expected else f" -> consider an index on {table}({', '.join(columns) or '?'})"))
+                    if not expected:
+                        print(f"       {flat[:160]}")
+
+    print(f"{explained} statements explained, {flagged} unexpected table scans")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
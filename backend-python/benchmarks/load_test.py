@@ -0,0 +1,333 @@
+"""
+Load test: scripted traffic mixes with throughput and latency per endpoint.
+
+Seeds a dataset of --users, --foods and --orders (with --items-per-order
+lines each), then runs --clients virtual users for --duration seconds after
+a --warmup. Each virtual user repeatedly picks a scenario by the --mix
+weights and plays it against the API, one request after another:
+
+- menu: categories, a category page and the next one, two dishes, a search,
+- checkout: looks at one to three dishes and orders them,
+- history: the user's latest orders and one of them in detail,
+- admin: the dashboard, a month of sales analytics and the order list.
+
+With --transport asgi requests go straight into the app in this process;
+with --transport socket a uvicorn server (--workers processes) is started on
+a local port, so HTTP parsing and the event loop of a real server are part
+of the numbers. Every run is written to --output as JSON; --compare
+prints the change against an earlier result and exits with status 1 if a
+p95 latency or the throughput of an endpoint got worse by more than
+--threshold percent. Virtual users are seeded from --seed, so the same
+arguments replay the same request sequence.
+
+Run: python -m benchmarks.load_test [--clients 20] [--duration 30] [--transport socket]
+                                    [--compare benchmarks/results/<earlier run>.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from benchmarks.harness import AsgiClient, SocketClient, auth_headers, reset_database, seed
+from app.config import settings
+from app.main import app
+
+MIXES = ("menu", "checkout", "history", "admin")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+# Seeded orders start here (see harness.seed)
+ANALYTICS_RANGE = {"granularity": "day", "start": "2024-01-01T00:00:00", "end": "2024-02-01T00:00:00"}
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """"menu=60,checkout=15" -> {"menu": 60.0, "checkout": 15.0}"""
+    weights = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in MIXES:
+            raise argparse.ArgumentTypeError(f"unknown mix {name!r}, choose from {', '.join(MIXES)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+class Recorder:
+    """Latencies and failures per endpoint, for requests started after the warm-up"""
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.scenarios: dict[str, int] = defaultdict(int)
+
+    async def request(self, client, endpoint: str, method: str, path: str, expect: int = 200, **kwargs):
+        """Send a request recorded under `endpoint` (its route template);
+        returns the response, or None if it failed"""
+        start = time.perf_counter()
+        try:
+            response = await client.arequest(method, path, **kwargs)
+        except Exception:
+            response = None
+        if start >= self.measure_from:
+            self.latencies[endpoint].append((time.perf_counter() - start) * 1000)
+            if response is None or response.status_code != expect:
+                self.errors[endpoint] += 1
+        return response if response is not None and response.status_code == expect else None
+
+
+class VirtualUser:
+    def __init__(self, client, recorder: Recorder, rng: random.Random, ids: dict, user_id: int, admin: dict):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.food_ids = ids["food_ids"]
+        self.headers = auth_headers(user_id, ["user"])
+        self.admin = admin
+
+    async def get(self, endpoint: str, path: str, **kwargs):
+        return await self.recorder.request(self.client, endpoint, "GET", path, **kwargs)
+
+    async def menu(self):
+        await self.get("GET /api/foods/categories", "/api/foods/categories")
+        category = f"Category {self.rng.randrange(5)}"
+        page = await self.get("GET /api/foods/", "/api/foods/", params={"category": category, "limit": 20})
+        if page is not None and page.headers.get("x-next-cursor"):
+            await self.get("GET /api/foods/", "/api/foods/",
+                           params={"category": category, "limit": 20, "cursor": page.headers["x-next-cursor"]})
+        for food_id in self.rng.sample(self.food_ids, k=min(2, len(self.food_ids))):
+            await self.get("GET /api/foods/{food_id}", f"/api/foods/{food_id}")
+        await self.get("GET /api/foods/autocomplete", "/api/foods/autocomplete",
+                       params={"q": f"Food {self.rng.randrange(10)}"})
+
+    async def checkout(self):
+        cart = self.rng.sample(self.food_ids, k=min(self.rng.randint(1, 3), len(self.food_ids)))
+        for food_id in cart:
+            await self.get("GET /api/foods/{food_id}", f"/api/foods/{food_id}")
+        await self.recorder.request(
+            self.client, "POST /api/orders/", "POST", "/api/orders/", expect=201, headers=self.headers,
+            json_body={
+                "delivery_address": "1 Load Street",
+                "delivery_city": "Benchville",
+                "delivery_zip": "00000",
+                "delivery_phone": "+1 555-000-0000",
+                "items": [{"food_id": food_id, "quantity": self.rng.randint(1, 3)} for food_id in cart],
+            }
+        )
+
+    async def history(self):
+        page = await self.get("GET /api/orders/", "/api/orders/", params={"limit": 10}, headers=self.headers)
+        orders = page.json() if page is not None else []
+        if orders:
+            order_id = self.rng.choice(orders)["id"]
+            await self.get("GET /api/orders/{order_id}", f"/api/orders/{order_id}", headers=self.headers)
+
+    async def admin_dashboard(self):
+        await self.get("GET /api/admin/dashboard", "/api/admin/dashboard", headers=self.admin)
+        await self.get("GET /api/admin/analytics/sales", "/api/admin/analytics/sales",
+                       params=ANALYTICS_RANGE, headers=self.admin)
+        await self.get("GET /api/admin/orders", "/api/admin/orders", params={"limit": 50}, headers=self.admin)
+
+    async def run(self, mix: dict[str, float], deadline: float):
+        scenarios = {"menu": self.menu, "checkout": self.checkout,
+                     "history": self.history, "admin": self.admin_dashboard}
+        names, weights = list(mix), list(mix.values())
+        while time.perf_counter() < deadline:
+            name = self.rng.choices(names, weights)[0]
+            await scenarios[name]()
+            if time.perf_counter() >= self.recorder.measure_from:
+                self.recorder.scenarios[name] += 1
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def serve(workers: int):
+    """Run the app under uvicorn on a local port until the block exits"""
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=os.environ
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=1):
+                    break
+            except OSError:
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not start")
+                time.sleep(0.1)
+        yield port
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+async def run_load(args, ids: dict, port: int = None) -> tuple[Recorder, float]:
+    shared = AsgiClient(app) if port is None else None
+    start = time.perf_counter()
+    recorder = Recorder(measure_from=start + args.warmup)
+    deadline = recorder.measure_from + args.duration
+    admin = auth_headers(ids["admin_id"], ["admin", "user"])
+    user_ids = ids["user_ids"][1:] or ids["user_ids"]
+    clients = [shared or SocketClient("127.0.0.1", port) for _ in range(args.clients)]
+    await asyncio.gather(*[
+        VirtualUser(client, recorder, random.Random(args.seed * 100003 + i), ids,
+                    user_ids[i % len(user_ids)], admin).run(args.mix, deadline)
+        for i, client in enumerate(clients)
+    ])
+    for client in clients:
+        if isinstance(client, SocketClient):
+            await client.aclose()
+    return recorder, time.perf_counter() - recorder.measure_from
+
+
+def summarize(recorder: Recorder, seconds: float) -> dict:
+    endpoints = {}
+    for endpoint, times in sorted(recorder.latencies.items()):
+        endpoints[endpoint] = {
+            "requests": len(times),
+            "errors": recorder.errors[endpoint],
+            "rps": round(len(times) / seconds, 2),
+            "mean_ms": round(statistics.mean(times), 3),
+            "p50_ms": round(percentile(times, 50), 3),
+            "p95_ms": round(percentile(times, 95), 3),
+            "p99_ms": round(percentile(times, 99), 3),
+        }
+    every = [t for times in recorder.latencies.values() for t in times]
+    total = {
+        "requests": len(every),
+        "errors": sum(recorder.errors.values()),
+        "rps": round(len(every) / seconds, 2),
+        "p50_ms": round(percentile(every, 50), 3) if every else None,
+        "p95_ms": round(percentile(every, 95), 3) if every else None,
+        "p99_ms": round(percentile(every, 99), 3) if every else None,
+        "scenarios": dict(sorted(recorder.scenarios.items())),
+    }
+    return {"seconds": round(seconds, 3), "total": total, "endpoints": endpoints}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(summary: dict) -> None:
+    print(f"{'endpoint':<32} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for endpoint, row in summary["endpoints"].items():
+        print(f"{endpoint:<32} {row['requests']:>9} {row['errors']:>7} {row['rps']:>8.1f} "
+              f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}")
+    total = summary["total"]
+    if total["requests"]:
+        print(f"{'total':<32} {total['requests']:>9} {total['errors']:>7} {total['rps']:>8.1f} "
+              f"{total['p50_ms']:>8.2f} {total['p95_ms']:>8.2f} {total['p99_ms']:>8.2f}")
+    print("scenarios: " + ", ".join(f"{name} {count}" for name, count in total["scenarios"].items()))
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> bool:
+    """Print the change from `baseline`; True if an endpoint regressed"""
+    if baseline["config"] != result["config"]:
+        changed = sorted(k for k in {**baseline["config"], **result["config"]}
+                         if baseline["config"].get(k) != result["config"].get(k))
+        print(f"warning: runs differ in {', '.join(changed)}")
+    print(f"\nvs {baseline['git_commit'] or 'baseline'} from {baseline['started_at']}")
+    print(f"{'endpoint':<32} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    regressed = False
+    for endpoint, row in result["summary"]["endpoints"].items():
+        before = baseline["summary"]["endpoints"].get(endpoint)
+        if before is None:
+            print(f"{endpoint:<32} {'(new)':>9}")
+            continue
+        change = {key: 100 * (row[key] - before[key]) / before[key] if before[key] else 0.0
+                  for key in ("rps", "p50_ms", "p95_ms", "p99_ms")}
+        worse = change["p95_ms"] > threshold or change["rps"] < -threshold
+        regressed |= worse
+        print(f"{endpoint:<32} {change['rps']:>+8.1f}% {change['p50_ms']:>+8.1f}% {change['p95_ms']:>+8.1f}% "
+              f"{change['p99_ms']:>+8.1f}%{'  REGRESSION' if worse else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--foods", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--items-per-order", type=int, default=3)
+    parser.add_argument("--clients", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds run before measuring")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("menu=60,checkout=10,history=25,admin=5"),
+                        help="scenario weights, e.g. menu=60,checkout=10,history=25,admin=5")
+    parser.add_argument("--transport", choices=("asgi", "socket"), default="asgi")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --transport socket")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="result file, by default under benchmarks/results/")
+    parser.add_argument("--compare", help="earlier result file to compare with")
+    parser.add_argument("--threshold", type=float, default=10, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    reset_database()
+    ids = seed(users=args.users, foods=args.foods, orders=args.orders,
+               items_per_order=args.items_per_order, seed=args.seed)
+    started_at = datetime.now(timezone.utc)
+    print(f"{args.clients} clients, {args.duration:g} s over {args.transport}, "
+          f"mix {','.join(f'{k}={v:g}' for k, v in args.mix.items())}\n")
+    if args.transport == "socket":
+        with serve(args.workers) as port:
+            recorder, seconds = asyncio.run(run_load(args, ids, port))
+    else:
+        recorder, seconds = asyncio.run(run_load(args, ids))
+    summary = summarize(recorder, seconds)
+    print_table(summary)
+
+    result = {
+        "started_at": started_at.isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "users": args.users, "foods": args.foods, "orders": args.orders,
+            "items_per_order": args.items_per_order, "clients": args.clients, "duration": args.duration,
+            "warmup": args.warmup, "mix": args.mix, "transport": args.transport,
+            "workers": args.workers if args.transport == "socket" else None, "seed": args.seed,
+            "database": settings.DATABASE_URL.split(":", 1)[0], "database_mode": settings.DATABASE_MODE,
+        },
+        "summary": summary,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"load_test-{started_at.strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nsaved {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Measure menu latency while a burst of concurrent logins is in flight.
+
+Menu requests are timed on their own, then again while N logins run
+concurrently. With bcrypt in the bounded process pool, logins beyond
+PASSWORD_POOL_MAX_PENDING are rejected with 503 instead of holding request
+threads, so menu p99 should barely move. The menu cache is disabled so every
+menu request does real work.
+
+Run: python -m benchmarks.login_burst [--logins 100]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ["MENU_CACHE_MAX_ENTRIES"] = "0"
+
+from benchmarks.harness import AsgiClient, reset_database, seed  # noqa: E402
+from app.main import app  # noqa: E402
+from app.utils.passwords import password_pool  # noqa: E402
+
+
+async def menu_traffic(client: AsgiClient, requests: int) -> tuple[list[float], int]:
+    """Sequential menu requests; returns latencies and the number of failures"""
+    timings, errors = [], 0
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.arequest("GET", "/api/foods/", params={"limit": 20})
+        timings.append((time.perf_counter() - start) * 1000)
+        errors += response.status_code != 200
+        await asyncio.sleep(0.005)
+    return timings, errors
+
+
+async def login(client: AsgiClient, email: str) -> int:
+    response = await client.arequest(
+        "POST", "/api/auth/login", json_body={"email": email, "password": "secret"}
+    )
+    return response.status_code
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(logins: int, menu_requests: int):
+    reset_database()
+    seed(users=20, foods=100, orders=0)
+    client = AsgiClient(app)
+
+    baseline = await menu_traffic(client, menu_requests)
+
+    burst_start = time.perf_counter()
+    statuses, during = await asyncio.gather(
+        asyncio.gather(*[login(client, f"user{i % 20}@bench.example.com") for i in range(logins)]),
+        menu_traffic(client, menu_requests),
+    )
+    burst_seconds = time.perf_counter() - burst_start
+
+    print(f"pool workers={password_pool.workers} max_pending={password_pool.max_pending}")
+    print(f"logins: {statuses.count(200)} ok, {statuses.count(503)} rejected (503) in {burst_seconds:.2f}s")
+    print(f"{'menu':<14} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for label, (timings, errors) in (("idle", baseline), ("during burst", during)):
+        print(f"{label:<14} {statistics.median(timings):>8.2f} {percentile(timings, 99):>8.2f} {errors:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--menu-requests", type=int, default=200)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args.logins, args.menu_requests))
+    finally:
+        password_pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Check that a database from before migrations upgrades to a schema the app runs on.
+
+Mirrors the documented upgrade of an existing deployment on an empty
+database: builds revision 0001 and checks it is still exactly the schema
+create_all built before migrations existed (stamped databases never run
+it, so anything added there is never created for them), marks it with
+`alembic stamp 0001` and runs `alembic upgrade head`. It then compares the
+result with the models, seeds data and calls the main endpoints (menu,
+search, checkout, cancel, order history, dashboard), and finally
+downgrades to an empty database.
+
+Uses a throwaway SQLite file unless DATABASE_URL is set; that database
+must be empty.
+
+Run: python -m benchmarks.migration_check
+"""
+import os
+import sys
+import tempfile
+
+_DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "tastybites_migration_check.db")
+if "DATABASE_URL" not in os.environ:
+    if os.path.exists(_DEFAULT_PATH):
+        os.remove(_DEFAULT_PATH)
+    os.environ["DATABASE_URL"] = f"sqlite:///{_DEFAULT_PATH}"
+
+from alembic import command  # noqa: E402
+from alembic.autogenerate import compare_metadata  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from alembic.migration import MigrationContext  # noqa: E402
+from sqlalchemy import inspect, text  # noqa: E402
+from benchmarks.harness import AsgiClient, auth_headers, engine, seed, Base  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.main import app  # noqa: E402
+
+# What create_all built before migrations existed: table -> indexes
+BASELINE = {
+    "users": {"ix_users_email", "ix_users_id"},
+    "user_roles": {"ix_user_roles_id"},
+    "categories": {"ix_categories_id"},
+    "foods": {"ix_foods_id"},
+    "orders": {"ix_orders_id"},
+    "order_items": {"ix_order_items_id"},
+}
+# Schema differences that matter to the app; type and default differences
+# between dialects are left to review
+CHECKED_DIFFS = {"add_table", "remove_table", "add_column", "remove_column", "add_index", "remove_index"}
+
+
+def alembic_config() -> Config:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    config = Config(os.path.join(root, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(root, "migrations"))
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+    return config
+
+
+def schema() -> dict:
+    inspector = inspect(engine)
+    return {
+        table: {index["name"] for index in inspector.get_indexes(table)}
+        for table in inspector.get_table_names() if table != "alembic_version"
+    }
+
+
+def schema_diffs() -> list:
+    with engine.connect() as conn:
+        diffs = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+    # Index changes come as tuples, column changes as lists of tuples
+    flat = [diff for entry in diffs for diff in (entry if isinstance(entry, list) else [entry])]
+    return [
+        diff for diff in flat
+        # The search column is maintained by PostgreSQL and not mapped
+        if diff[0] in CHECKED_DIFFS and not (diff[0] == "remove_column" and diff[3].name == "search_vector")
+    ]
+
+
+def smoke(failures: list) -> None:
+    ids = seed(users=3, foods=20, orders=30)
+    client = AsgiClient(app)
+    user = auth_headers(ids["user_ids"][1], ["user"])
+    admin = auth_headers(ids["admin_id"], ["admin", "user"])
+
+    def expect(status: int, method: str, path: str, **kwargs):
+        response = client.request(method, path, **kwargs)
+        if response.status_code != status:
+            failures.append(f"{method} {path}: {response.status_code} {response.content[:200]!r}")
+        return response
+
+    expect(200, "GET", "/api/foods/", params={"limit": 10})
+    expect(200, "GET", "/api/foods/", params={"search": "Food 1"})
+    expect(200, "GET", "/api/foods/autocomplete", params={"q": "Fo"})
+    order = expect(201, "POST", "/api/orders/", headers=user, json_body={
+        "delivery_address": "1 Check Street",
+        "delivery_city": "Benchville",
+        "delivery_zip": "00000",
+        "delivery_phone": "+1 555-000-0000",
+        "items": [{"food_id": ids["food_ids"][0], "quantity": 2}],
+    })
+    if order.status_code == 201:
+        expect(200, "POST", f"/api/orders/{order.json()['id']}/cancel", headers=user)
+    expect(200, "GET", "/api/orders/", headers=user)
+    expect(200, "GET", "/api/admin/dashboard", headers=admin)
+    expect(200, "GET", "/api/admin/analytics/sales", headers=admin)
+
+
+def main() -> int:
+    if schema():
+        print(f"{settings.DATABASE_URL.split('@')[-1]} is not empty, point DATABASE_URL at an empty database")
+        return 1
+    config = alembic_config()
+    failures = []
+
+    # A database from before migrations, marked as the docs describe
+    command.upgrade(config, "0001")
+    baseline = schema()
+    if baseline != BASELINE:
+        failures.append(f"revision 0001 is not the pre-migration schema: {baseline} != {BASELINE}")
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE alembic_version"))
+    command.stamp(config, "0001")
+
+    command.upgrade(config, "head")
+    failures.extend(f"schema differs from the models: {diff}" for diff in schema_diffs())
+    smoke(failures)
+
+    engine.dispose()
+    command.downgrade(config, "base")
+    left = schema()
+    if left:
+        failures.append(f"tables left after downgrading to base: {sorted(left)}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print("OK" if not failures else f"{len(failures)} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
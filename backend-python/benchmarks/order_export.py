@@ -0,0 +1,148 @@
+"""
+Order export for accounting: paging the admin list vs the streaming export.
+
+Seeds N orders with their line items, then reads every order in a date
+range as finance did before (GET /api/admin/orders, 200 per page, following
+X-Next-Cursor) and through GET /api/admin/orders/export in each format.
+For each it reports total time, time to the first body byte and rows per
+second, then, in a second run under tracemalloc (which slows allocation
+down too much to time with), the peak memory of one request. The client
+only counts the bytes it receives, so the memory figure is the server's.
+
+Run: python -m benchmarks.order_export [--orders 200000] [--items 3]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select
+from benchmarks.harness import AsgiClient, SessionLocal, auth_headers, engine, reset_database, seed
+from app.models.food import Food
+from app.models.order import Order, OrderItem, OrderStatus
+from app.utils.exports import parquet_available
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.main import app
+
+BATCH_SIZE = 10_000
+START = datetime(2022, 1, 1)
+
+
+def insert_orders(count: int, items: int, user_id: int) -> None:
+    """Bulk insert `count` orders, one every 30 seconds, with their items"""
+    rng = random.Random(11)
+    db = SessionLocal()
+    try:
+        foods = db.execute(select(Food.id, Food.price)).all()
+    finally:
+        db.close()
+    statuses = list(OrderStatus)
+    with engine.begin() as conn:
+        first_id = (conn.execute(select(Order.id).order_by(Order.id.desc()).limit(1)).scalar() or 0) + 1
+        for offset in range(0, count, BATCH_SIZE):
+            numbers = range(offset, min(offset + BATCH_SIZE, count))
+            conn.execute(insert(Order), [
+                {
+                    "id": first_id + i,
+                    "order_number": f"TB-EXPORT-{i:09d}",
+                    "user_id": user_id,
+                    "delivery_address": "1 Bench Street",
+                    "delivery_city": "Benchville",
+                    "delivery_zip": "00000",
+                    "delivery_phone": "+1 555-000-0000",
+                    "subtotal": 30.0,
+                    "delivery_fee": 4.99,
+                    "tax": 2.4,
+                    "total": 37.39,
+                    "status": statuses[i % len(statuses)],
+                    "created_at": START + timedelta(seconds=i * 30),
+                }
+                for i in numbers
+            ])
+            conn.execute(insert(OrderItem), [
+                {"order_id": first_id + i, "food_id": food_id, "quantity": 1, "price": price}
+                for i in numbers
+                for food_id, price in rng.sample(foods, k=items)
+            ])
+
+
+def measure(client: AsgiClient, path: str, params: dict, headers: dict):
+    """(seconds, seconds to the first body byte, bytes, response)"""
+    received = {"bytes": 0, "first": None}
+    start = time.perf_counter()
+
+    def on_body(chunk: bytes):
+        if chunk and received["first"] is None:
+            received["first"] = time.perf_counter() - start
+        received["bytes"] += len(chunk)
+
+    response = client.request("GET", path, params=params, headers=headers, on_body=on_body)
+    assert response.status_code == 200, response.status_code
+    return time.perf_counter() - start, received["first"], received["bytes"], response
+
+
+def peak_mib(client: AsgiClient, path: str, params: dict, headers: dict) -> float:
+    """Peak memory traced while serving one request"""
+    tracemalloc.start()
+    try:
+        measure(client, path, params, headers)
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def page_through(client: AsgiClient, headers: dict):
+    """The old way: every page of the admin order list, 200 at a time;
+    (seconds, seconds to the first page's first byte, pages)"""
+    start = time.perf_counter()
+    pages = 0
+    first = None
+    cursor = None
+    while True:
+        _, page_first, _, response = measure(
+            client, "/api/admin/orders", {"limit": 200, **({"cursor": cursor} if cursor else {})}, headers
+        )
+        if first is None:
+            first = page_first
+        pages += 1
+        cursor = response.headers.get(NEXT_CURSOR_HEADER.lower())
+        if not cursor:
+            break
+    return time.perf_counter() - start, first, pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--items", type=int, default=3, help="Line items per order")
+    args = parser.parse_args()
+
+    reset_database()
+    ids = seed(users=2, foods=50, orders=0)
+    insert_orders(args.orders, args.items, ids["user_ids"][1])
+    client = AsgiClient(app)
+    admin = auth_headers(ids["admin_id"], ["admin", "user"])
+    end = START + timedelta(seconds=args.orders * 30)
+    params = {"start": START.isoformat(), "end": end.isoformat()}
+    rows = args.orders * args.items
+    print(f"{args.orders} orders, {rows} line items\n")
+    print(f"{'method':<30} {'total s':>8} {'first byte ms':>14} {'rows/s':>10} {'MiB sent':>9} {'peak MiB':>9}")
+
+    seconds, first, pages = page_through(client, admin)
+    peak = peak_mib(client, "/api/admin/orders", {"limit": 200}, admin)
+    print(f"{'GET /api/admin/orders x' + str(pages):<30} {seconds:>8.2f} {first * 1000:>14.1f} "
+          f"{rows / seconds:>10.0f} {'':>9} {peak:>9.1f}  (per page)")
+
+    for file_format in ("csv", "jsonl", "parquet"):
+        if file_format == "parquet" and not parquet_available():
+            print(f"{'export parquet':<30} skipped (pyarrow is not installed)")
+            continue
+        export_params = {**params, "format": file_format}
+        seconds, first, size, _ = measure(client, "/api/admin/orders/export", export_params, admin)
+        peak = peak_mib(client, "/api/admin/orders/export", export_params, admin)
+        print(f"{'export ' + file_format:<30} {seconds:>8.2f} {first * 1000:>14.1f} "
+              f"{rows / seconds:>10.0f} {size / 2 ** 20:>9.1f} {peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
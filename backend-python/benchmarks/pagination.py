@@ -0,0 +1,101 @@
+"""
+Compare offset and cursor pagination of the admin order list at deep pages.
+
+Offset pages get slower the deeper they go because every skipped row is
+still read; cursor pages seek straight to their start through the
+(created_at, id) index, so page 1000 costs about the same as page 1.
+
+Run: python -m benchmarks.pagination [--orders 1000000] [--limit 50]
+"""
+import argparse
+import statistics
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from benchmarks.harness import AsgiClient, auth_headers, reset_database, seed, timed
+from app.database import SessionLocal, engine
+from app.models.order import Order, OrderStatus
+from app.utils.pagination import encode_cursor
+from app.main import app
+
+PAGES = (1, 10, 100, 1000)
+BATCH_SIZE = 10_000
+
+
+def insert_orders(count: int, user_id: int):
+    """Bulk insert `count` bare orders (no items) through Core executemany"""
+    start = datetime(2020, 1, 1)
+    statuses = list(OrderStatus)
+    with engine.begin() as conn:
+        for offset in range(0, count, BATCH_SIZE):
+            conn.execute(insert(Order), [
+                {
+                    "order_number": f"TB-PAGE-{i:09d}",
+                    "user_id": user_id,
+                    "delivery_address": "1 Bench Street",
+                    "delivery_city": "Benchville",
+                    "delivery_zip": "00000",
+                    "delivery_phone": "+1 555-000-0000",
+                    "subtotal": 10.0,
+                    "delivery_fee": 4.99,
+                    "tax": 0.8,
+                    "total": 15.79,
+                    "status": statuses[i % len(statuses)],
+                    "created_at": start + timedelta(seconds=i * 30),
+                }
+                for i in range(offset, min(offset + BATCH_SIZE, count))
+            ])
+
+
+def cursor_for_page(page: int, limit: int) -> str:
+    """Cursor a client would hold after reading pages 1..page-1"""
+    db = SessionLocal()
+    try:
+        created_at, order_id = (
+            db.query(Order.created_at, Order.id)
+            .order_by(Order.created_at.desc(), Order.id.desc())
+            .offset((page - 1) * limit - 1)
+            .limit(1)
+            .one()
+        )
+        return encode_cursor([created_at, order_id])
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    reset_database()
+    ids = seed(users=2, foods=10, orders=0)
+    print(f"Inserting {args.orders} orders...")
+    insert_orders(args.orders, ids["user_ids"][1])
+
+    client = AsgiClient(app)
+    headers = auth_headers(ids["admin_id"], ["admin"])
+
+    print(f"{'page':>6} {'offset ms':>10} {'cursor ms':>10}")
+    for page in PAGES:
+        if (page - 1) * args.limit >= args.orders:
+            break
+        offset_params = {"limit": args.limit, "skip": (page - 1) * args.limit}
+        cursor_params = {"limit": args.limit}
+        if page > 1:
+            cursor_params["cursor"] = cursor_for_page(page, args.limit)
+
+        results = {}
+        for mode, params in (("offset", offset_params), ("cursor", cursor_params)):
+            timings = []
+            for _ in range(args.repeat):
+                response, elapsed = timed(client.get, "/api/admin/orders", params=params, headers=headers)
+                assert response.status_code == 200, response.content
+                timings.append(elapsed)
+            results[mode] = statistics.median(timings)
+        print(f"{page:>6} {results['offset']:>10.2f} {results['cursor']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
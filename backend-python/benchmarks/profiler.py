@@ -0,0 +1,68 @@
+"""
+Overhead of the sampling profiler on live requests.
+
+Times the same mix of requests (menu listing, order history, admin order
+list) with no profiling session, then with sessions sampling 1% and 100% of
+requests, and prints the median and p95 latency of each, with how many
+stacks the session collected and its top functions at 100%.
+
+Run: python -m benchmarks.profiler [--requests 600] [--interval-ms 5]
+"""
+import argparse
+import statistics
+import time
+from benchmarks.harness import AsgiClient, auth_headers, reset_database, seed
+from app.utils import profiler
+from app.main import app
+
+
+def run_mix(client: AsgiClient, requests: int, admin: dict, user: dict) -> list[float]:
+    paths = (
+        ("/api/foods/", {}, {"limit": 50, "search": "Food"}),
+        ("/api/orders/", user, {"limit": 50}),
+        ("/api/admin/orders", admin, {"limit": 100}),
+    )
+    times = []
+    for i in range(requests):
+        path, headers, params = paths[i % len(paths)]
+        start = time.perf_counter()
+        response = client.get(path, headers=headers, params=params)
+        times.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.status_code
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--interval-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    reset_database()
+    ids = seed(users=20, foods=500, orders=2000)
+    client = AsgiClient(app)
+    admin = auth_headers(ids["admin_id"], ["admin", "user"])
+    user = auth_headers(ids["user_ids"][1], ["user"])
+    run_mix(client, 60, admin, user)  # warm up
+
+    print(f"{args.requests} requests, sampling every {args.interval_ms:g} ms\n")
+    print(f"{'session':<14} {'median ms':>10} {'p95 ms':>8} {'sampled':>8} {'stacks':>7}")
+    for label, percent in (("none", None), ("1%", 1), ("100%", 100)):
+        session = None
+        if percent is not None:
+            session = profiler.start(3600, None, percent, args.interval_ms)
+        times = run_mix(client, args.requests, admin, user)
+        if session is not None:
+            session.stop()
+        p95 = statistics.quantiles(times, n=20)[-1]
+        sampled = session.requests_sampled if session else 0
+        samples = session.samples if session else 0
+        print(f"{label:<14} {statistics.median(times):>10.2f} {p95:>8.2f} {sampled:>8} {samples:>7}")
+
+    print("\nTop functions by total samples at 100%:")
+    for row in profiler.session.summary(top=15)["top_total"]:
+        print(f"{row['percent']:>6.1f}%  {row['frame']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Check that listing endpoints issue a bounded number of SQL statements.
+
+Each endpoint is called against a seeded dataset and the statements it sends
+are counted. The budget includes the auth dependency query (AUTH_MODE=database,
+the default) and must not grow with page size, so a 200-order page costs the same as a 5-order page.
+
+Run: python -m benchmarks.query_budget
+"""
+import sys
+from benchmarks.harness import (
+    AsgiClient, auth_headers, count_statements, reset_database, seed
+)
+from app.main import app
+from app.utils.cache import menu_cache
+
+# endpoint -> maximum statements per request
+BUDGETS = {
+    ("GET", "/api/foods/", "anonymous"): 1,
+    ("GET", "/api/foods/{food_id}", "anonymous"): 1,
+    ("GET", "/api/orders/", "user"): 3,
+    ("GET", "/api/orders/{order_id}", "user"): 3,
+    ("GET", "/api/admin/users", "admin"): 3,
+    ("GET", "/api/admin/foods", "admin"): 2,
+    ("GET", "/api/admin/orders", "admin"): 3,
+    ("GET", "/api/admin/dashboard", "admin"): 5,
+    ("GET", "/api/admin/analytics/sales", "admin"): 2,
+    ("GET", "/api/admin/analytics/foods", "admin"): 2,
+    ("GET", "/api/admin/analytics/categories", "admin"): 2,
+}
+
+
+def main() -> int:
+    reset_database()
+    ids = seed(users=5, foods=100, orders=400, items_per_order=4)
+    client = AsgiClient(app)
+    headers = {
+        "anonymous": {},
+        "user": auth_headers(ids["user_ids"][1], ["user"]),
+        "admin": auth_headers(ids["admin_id"], ["admin", "user"]),
+    }
+    own_order_id = client.get("/api/orders/", headers=headers["user"]).json()[0]["id"]
+    path_params = {"food_id": ids["food_ids"][0], "order_id": own_order_id}
+
+    failures = 0
+    for (method, path, who), budget in BUDGETS.items():
+        url = path.format(**path_params)
+        for limit in (5, 100):
+            menu_cache.invalidate()
+            with count_statements() as statements:
+                response = client.request(method, url, params={"limit": limit}, headers=headers[who])
+            ok = response.status_code == 200 and len(statements) <= budget
+            failures += not ok
+            print(f"{'OK  ' if ok else 'FAIL'} {method} {url:<28} limit={limit:<4} "
+                  f"status={response.status_code} statements={len(statements)} budget={budget}")
+            if not ok:
+                for statement in statements:
+                    print(f"       {' '.join(statement.split())[:120]}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
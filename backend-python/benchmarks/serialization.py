@@ -0,0 +1,131 @@
+"""
+Cost of turning a page of ORM rows into a JSON body.
+
+Loads one 200-row page of foods (with categories) and of orders (with
+items and their foods), then encodes it each way, with the database out of
+the picture:
+
+- before: a pydantic model built field by field per row, validated again
+  against response_model by FastAPI and encoded with json.dumps
+  (JSONResponse), as the routers did,
+- orjson: the same, encoded by ORJSONResponse, the new default class,
+- to_json: app.utils.serialization.to_json, one validation from the ORM
+  attributes and pydantic's compiled encoder.
+
+It checks the bodies decode to the same JSON, then times the endpoints
+serving those pages end to end.
+
+Run: python -m benchmarks.serialization [--rows 200] [--repeat 50]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from benchmarks.harness import AsgiClient, SessionLocal, auth_headers, reset_database, seed
+from app.schemas.food import FoodResponse, CategoryResponse
+from app.schemas.order import OrderResponse, OrderItemResponse
+from app.utils.queries import foods_query, orders_query
+from app.utils.serialization import to_json
+from app.main import app
+
+
+def hand_built_food(food) -> FoodResponse:
+    return FoodResponse(
+        id=food.id, name=food.name, description=food.description, price=food.price,
+        original_price=food.original_price, image=food.image, category_id=food.category_id,
+        prep_time=food.prep_time, is_special=food.is_special, is_available=food.is_available,
+        rating=food.rating, reviews_count=food.reviews_count, created_at=food.created_at,
+        category=CategoryResponse(
+            id=food.category.id, name=food.category.name,
+            description=food.category.description, created_at=food.category.created_at
+        ) if food.category else None
+    )
+
+
+def hand_built_order(order) -> OrderResponse:
+    return OrderResponse(
+        id=order.id, order_number=order.order_number, user_id=order.user_id,
+        delivery_address=order.delivery_address, delivery_city=order.delivery_city,
+        delivery_zip=order.delivery_zip, delivery_phone=order.delivery_phone,
+        subtotal=order.subtotal, delivery_fee=order.delivery_fee, tax=order.tax, total=order.total,
+        payment_method=order.payment_method, notes=order.notes, status=order.status,
+        created_at=order.created_at, updated_at=order.updated_at, delivered_at=order.delivered_at,
+        items=[
+            OrderItemResponse(
+                id=item.id, food_id=item.food_id, quantity=item.quantity, price=item.price,
+                food_name=item.food.name if item.food else None
+            )
+            for item in order.items
+        ]
+    )
+
+
+def fastapi_path(schema, build, response_class):
+    """How FastAPI answers an endpoint returning hand-built models"""
+    field = create_response_field(name="response", type_=schema, mode="serialization")
+
+    def encode(rows) -> bytes:
+        content = asyncio.run(serialize_response(field=field, response_content=[build(row) for row in rows]))
+        return response_class(content).body
+    return encode
+
+
+def best_ms(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    reset_database()
+    ids = seed(users=5, foods=args.rows, orders=args.rows)
+    db = SessionLocal()
+    foods = foods_query(db).limit(args.rows).all()
+    orders = orders_query(db).limit(args.rows).all()
+
+    print(f"in process, {args.rows} rows, best of {args.repeat} (ms)")
+    print(f"{'':<8} {'before':>8} {'orjson':>8} {'to_json':>8} {'speedup':>8}")
+    for label, rows, schema, build in (
+        ("foods", foods, list[FoodResponse], hand_built_food),
+        ("orders", orders, list[OrderResponse], hand_built_order),
+    ):
+        paths = {
+            "before": fastapi_path(schema, build, JSONResponse),
+            "orjson": fastapi_path(schema, build, ORJSONResponse),
+            "to_json": lambda rows, schema=schema: to_json(schema, rows),
+        }
+        bodies = {name: json.loads(encode(rows)) for name, encode in paths.items()}
+        assert bodies["before"] == bodies["orjson"] == bodies["to_json"], f"{label} bodies differ"
+        ms = {name: best_ms(lambda encode=encode: encode(rows), args.repeat) for name, encode in paths.items()}
+        print(f"{label:<8} {ms['before']:>8.2f} {ms['orjson']:>8.2f} {ms['to_json']:>8.2f} "
+              f"{ms['before'] / ms['to_json']:>7.1f}x")
+    db.close()
+
+    client = AsgiClient(app)
+    admin = auth_headers(ids["admin_id"], ["admin", "user"])
+    limit = min(args.rows, 200)
+    print(f"\nend to end, limit={limit}, median of {args.repeat} (ms)")
+    for path in ("/api/admin/foods", "/api/admin/orders"):
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.get(path, headers=admin, params={"limit": limit})
+            times.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.status_code
+        print(f"GET {path:<20} {statistics.median(times) * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Cold start of a worker: import-time profile and time to first response.
+
+1. Import profile: `python -X importtime -c "import app.main"` in a fresh
+   interpreter, with the self time of each module summed per app module or
+   third-party package, largest first.
+2. Time to first response: uvicorn serving app.main is started from scratch
+   and polled until GET /health answers; then GET /api/foods/ is timed as
+   the first real request. Both are measured from process spawn.
+
+Each is run for STARTUP_MODE=eager and STARTUP_MODE=lean.
+
+Run: python -m benchmarks.startup [--runs 5] [--top 15]
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from benchmarks.harness import reset_database, seed
+
+MODES = ("eager", "lean")
+
+
+def mode_env(mode: str) -> dict:
+    return {**os.environ, "STARTUP_MODE": mode}
+
+
+def import_profile(mode: str) -> tuple[float, Counter]:
+    """Total import ms of app.main and self ms per module group"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=mode_env(mode), capture_output=True, text=True, check=True
+    )
+    groups: Counter = Counter()
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        module = name.strip()
+        group = module if module.startswith("app.") or module == "app" else module.split(".")[0]
+        groups[group] += int(self_us) / 1000
+        if module == "app.main":
+            total = int(cumulative_us) / 1000
+    return total, groups
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get(port: int, path: str) -> int:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def first_responses(mode: str) -> tuple[float, float]:
+    """ms from spawning uvicorn to the first /health and /api/foods/ responses"""
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=mode_env(mode)
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {server.returncode}")
+            try:
+                if get(port, "/health") == 200:
+                    break
+            except OSError:
+                time.sleep(0.005)
+        health_ms = (time.perf_counter() - start) * 1000
+        status = get(port, "/api/foods/")
+        assert status == 200, status
+        menu_ms = (time.perf_counter() - start) * 1000
+        return health_ms, menu_ms
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Module groups shown in the import profile")
+    args = parser.parse_args()
+
+    reset_database()
+    seed(users=5, foods=50, orders=100)
+
+    for mode in MODES:
+        total, groups = import_profile(mode)
+        print(f"import app.main ({mode}): {total:.0f} ms")
+        for group, ms in groups.most_common(args.top):
+            print(f"  {group:<32} {ms:>8.1f} ms")
+
+    print(f"\n{'mode':<6} {'first /health ms':>17} {'first /api/foods ms':>20}   (median of {args.runs})")
+    for mode in MODES:
+        runs = [first_responses(mode) for _ in range(args.runs)]
+        print(f"{mode:<6} {statistics.median(r[0] for r in runs):>17.0f} {statistics.median(r[1] for r in runs):>20.0f}")
+
+
+if __name__ == "__main__":
+    main()
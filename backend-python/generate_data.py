@@ -0,0 +1,413 @@
+"""
+Generate synthetic users, orders and order items for capacity testing
+Run: alembic upgrade head && python seed_data.py
+     python generate_data.py --users 1000000 --orders 5000000 [--foods 500] [--workers 8] [--seed 42]
+
+Rows are generated in worker processes, a chunk at a time, and written by
+this process in chunk order: COPY on PostgreSQL, DB-API executemany on
+other databases, one transaction per chunk. Every chunk draws from its own
+random generator derived from --seed, so the same arguments and database
+produce the same rows whatever the number of workers. Orders span --days
+days up to --end (default: today), which pins the dataset for replays.
+
+Distributions:
+- a few foods sell most (Zipf-like popularity), 1-5 lines per order,
+- orders peak at lunch and dinner, on Friday to Sunday, and grow over the
+  period; a small share of users places most of them,
+- old orders are delivered or cancelled, the last two hours' are in
+  progress.
+
+Generated foods go into the existing categories, and users get the
+password --password. The dashboard rollups and sales buckets are rebuilt
+at the end (see rebuild_rollups.py).
+"""
+import argparse
+import bisect
+import csv
+import io
+import itertools
+import multiprocessing
+import os
+import random
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, select, text
+from app.database import SessionLocal, engine
+from app.models.user import User, Role, UserRole
+from app.models.food import Food, Category
+from app.models.order import Order, OrderItem, OrderStatus, PaymentMethod
+from app.utils.security import get_password_hash
+from app.utils import rollups
+
+FIRST_NAMES = ("James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David",
+               "Elizabeth", "William", "Barbara", "Priya", "Wei", "Fatima", "Carlos", "Aisha", "Yuki",
+               "Olga", "Mateo", "Amara", "Noah", "Sofia", "Omar")
+LAST_NAMES = ("Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez",
+              "Martinez", "Patel", "Chen", "Khan", "Kim", "Nguyen", "Ivanova", "Okafor", "Silva", "Tanaka",
+              "Cohen")
+CITIES = (("New York", "100"), ("Brooklyn", "112"), ("Jersey City", "073"), ("Hoboken", "070"),
+          ("Newark", "071"), ("Yonkers", "107"))
+STREETS = ("Main Street", "Oak Avenue", "Park Place", "Elm Street", "Maple Drive", "Cedar Lane",
+           "Broadway", "Washington Street", "Lake Road", "Hill Street")
+FOOD_ADJECTIVES = ("Spicy", "Classic", "Smoky", "Garlic", "Crispy", "Creamy", "Grilled", "Loaded",
+                   "Truffle", "Honey", "Double", "Tandoori", "Lemon", "Herb", "BBQ", "Sweet Chili")
+FOOD_NOUNS = ("Pizza", "Burger", "Biryani", "Wrap", "Bowl", "Salad", "Noodles", "Tacos", "Curry",
+              "Sandwich", "Smoothie", "Cheesecake", "Wings", "Risotto", "Dumplings", "Brownie")
+
+# Share of a day's orders by hour (UTC): breakfast, lunch and dinner peaks
+HOUR_WEIGHTS = (1, 0.5, 0.3, 0.2, 0.2, 0.3, 1, 2, 3, 2.5, 3, 6, 10, 9, 5, 3, 3, 5, 9, 11, 10, 7, 4, 2)
+# Monday to Sunday
+WEEKDAY_WEIGHTS = (0.85, 0.85, 0.9, 1.0, 1.25, 1.35, 1.2)
+ITEM_COUNT_WEIGHTS = (45, 30, 15, 7, 3)  # 1 to 5 lines
+QUANTITY_WEIGHTS = (70, 20, 7, 3)  # 1 to 4 of a food
+REGULARS_SHARE = 0.2
+REGULARS_ORDER_SHARE = 0.6  # plus their share of the rest
+PAYMENT_WEIGHTS = {PaymentMethod.CARD: 60, PaymentMethod.PAYPAL: 15, PaymentMethod.COD: 25}
+COMPLETED_STATUS_WEIGHTS = {OrderStatus.DELIVERED: 91, OrderStatus.CANCELLED: 9}
+IN_PROGRESS_STATUS_WEIGHTS = {
+    OrderStatus.PENDING: 25, OrderStatus.CONFIRMED: 25, OrderStatus.PREPARING: 30,
+    OrderStatus.OUT_FOR_DELIVERY: 15, OrderStatus.CANCELLED: 5,
+}
+IN_PROGRESS_WINDOW = timedelta(hours=2)
+DELIVERY_FEE = 4.99
+TAX_RATE = 0.08
+
+USER_COLUMNS = ("id", "email", "hashed_password", "first_name", "last_name", "phone", "address", "city",
+                "zip_code", "is_active", "created_at")
+ROLE_COLUMNS = ("user_id", "role")
+FOOD_COLUMNS = ("name", "description", "price", "category_id", "rating", "reviews_count",
+                "prep_time", "is_special", "is_available", "created_at")
+ORDER_COLUMNS = ("id", "order_number", "user_id", "delivery_address", "delivery_city", "delivery_zip",
+                 "delivery_phone", "subtotal", "delivery_fee", "tax", "total", "payment_method", "status",
+                 "created_at", "updated_at", "delivered_at")
+ITEM_COLUMNS = ("order_id", "food_id", "quantity", "price")
+
+# Set in each worker by _init_worker
+_context: dict = {}
+
+
+def _cumulative(weights) -> list[float]:
+    return list(itertools.accumulate(weights))
+
+
+def _rng(seed: int, kind: str, chunk: int) -> random.Random:
+    return random.Random(f"{seed}:{kind}:{chunk}")
+
+
+# ==================== Encoding ====================
+
+def _copy_value(value):
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        # Generated times are naive UTC
+        return value.isoformat(sep=" ") + "+00"
+    return value
+
+
+def _encode(table, columns: tuple, rows: list[tuple], copy: bool):
+    """Rows as CSV for COPY, or as DB-API parameters for executemany,
+    converted the way SQLAlchemy binds them (enum names, SQLite dates)"""
+    dialect = engine.dialect
+    processors = [table.c[name].type.dialect_impl(dialect).bind_processor(dialect) for name in columns]
+    if any(processors):
+        rows = [
+            tuple(value if process is None or value is None else process(value)
+                  for process, value in zip(processors, row))
+            for row in rows
+        ]
+    if not copy:
+        return rows
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for row in rows:
+        writer.writerow([_copy_value(value) for value in row])
+    return buffer.getvalue()
+
+
+def _write(raw, table, columns: tuple, payload) -> None:
+    cursor = raw.cursor()
+    try:
+        if isinstance(payload, str):
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                               io.StringIO(payload))
+        else:
+            placeholder = "?" if engine.dialect.paramstyle == "qmark" else "%s"
+            cursor.executemany(
+                f"INSERT INTO {table.name} ({', '.join(columns)}) "
+                f"VALUES ({', '.join([placeholder] * len(columns))})",
+                payload
+            )
+    finally:
+        cursor.close()
+
+
+# ==================== Generators (run in workers) ====================
+
+def _init_worker(context: dict) -> None:
+    # Forked workers must not touch the parent's pooled connections
+    engine.dispose(close=False)
+    _context.update(context)
+
+
+def _user_chunk(task: tuple) -> tuple:
+    chunk, first_id, count = task
+    ctx = _context
+    rng = _rng(ctx["seed"], "users", chunk)
+    start, span = ctx["start"], (ctx["end"] - ctx["start"]).total_seconds()
+    users, roles = [], []
+    for user_id in range(first_id, first_id + count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        city, zip_prefix = rng.choice(CITIES)
+        users.append((
+            user_id, f"{first}.{last}.{user_id}@example.com".lower(), ctx["password_hash"], first, last,
+            f"+1 555-{rng.randrange(1000):03d}-{rng.randrange(10000):04d}",
+            f"{rng.randint(1, 999)} {rng.choice(STREETS)}", city, f"{zip_prefix}{rng.randrange(100):02d}",
+            True, start + timedelta(seconds=rng.random() * span),
+        ))
+        roles.append((user_id, UserRole.USER))
+    copy = ctx["copy"]
+    return count, [
+        (User.__table__, USER_COLUMNS, _encode(User.__table__, USER_COLUMNS, users, copy)),
+        (Role.__table__, ROLE_COLUMNS, _encode(Role.__table__, ROLE_COLUMNS, roles, copy)),
+    ]
+
+
+def _order_chunk(task: tuple) -> tuple:
+    """Orders of whole days, in time order, with consecutive ids"""
+    chunk, first_id, days = task
+    ctx = _context
+    rng = _rng(ctx["seed"], "orders", chunk)
+    user_ids, food_ids, food_prices = ctx["user_ids"], ctx["food_ids"], ctx["food_prices"]
+    food_weights, hour_weights = ctx["food_weights"], _cumulative(HOUR_WEIGHTS)
+    in_progress_from = ctx["end"] - IN_PROGRESS_WINDOW
+    payments, payment_weights = list(PAYMENT_WEIGHTS), _cumulative(PAYMENT_WEIGHTS.values())
+
+    times = []
+    for day, count in days:
+        day_times = []
+        for _ in range(count):
+            hour = rng.choices(range(24), cum_weights=hour_weights)[0]
+            day_times.append(day + timedelta(hours=hour, seconds=rng.random() * 3600))
+        times.extend(sorted(day_times))
+
+    orders, items = [], []
+    for order_id, created_at in enumerate(times, first_id):
+        # Regulars (the first fifth of the shuffled users) place most orders
+        share = REGULARS_SHARE if rng.random() < REGULARS_ORDER_SHARE else 1.0
+        user_id = user_ids[int(len(user_ids) * share * rng.random())]
+        lines = rng.choices(range(1, 6), weights=ITEM_COUNT_WEIGHTS)[0]
+        chosen = dict.fromkeys(rng.choices(range(len(food_ids)), cum_weights=food_weights, k=lines))
+        subtotal = 0.0
+        for index in chosen:
+            quantity = rng.choices(range(1, 5), weights=QUANTITY_WEIGHTS)[0]
+            items.append((order_id, food_ids[index], quantity, food_prices[index]))
+            subtotal += food_prices[index] * quantity
+        subtotal = round(subtotal, 2)
+        tax = round(subtotal * TAX_RATE, 2)
+
+        statuses = IN_PROGRESS_STATUS_WEIGHTS if created_at >= in_progress_from else COMPLETED_STATUS_WEIGHTS
+        status = rng.choices(list(statuses), weights=list(statuses.values()))[0]
+        delivered_at = created_at + timedelta(minutes=rng.uniform(20, 60)) if status == OrderStatus.DELIVERED else None
+        city, zip_prefix = rng.choice(CITIES)
+        orders.append((
+            order_id, f"TB-{created_at:%Y%m%d%H%M}-{order_id:08d}", user_id,
+            f"{rng.randint(1, 999)} {rng.choice(STREETS)}", city, f"{zip_prefix}{rng.randrange(100):02d}",
+            f"+1 555-{rng.randrange(1000):03d}-{rng.randrange(10000):04d}",
+            subtotal, DELIVERY_FEE, tax, round(subtotal + tax + DELIVERY_FEE, 2),
+            rng.choices(payments, cum_weights=payment_weights)[0], status,
+            created_at, delivered_at or created_at, delivered_at,
+        ))
+    copy = ctx["copy"]
+    return len(orders), [
+        (Order.__table__, ORDER_COLUMNS, _encode(Order.__table__, ORDER_COLUMNS, orders, copy)),
+        (OrderItem.__table__, ITEM_COLUMNS, _encode(OrderItem.__table__, ITEM_COLUMNS, items, copy)),
+    ]
+
+
+# ==================== Planning ====================
+
+def _food_rows(rng: random.Random, count: int, category_ids: list[int], start: datetime) -> list[tuple]:
+    rows = []
+    for i in range(count):
+        adjective, noun = rng.choice(FOOD_ADJECTIVES), rng.choice(FOOD_NOUNS)
+        rows.append((
+            f"{adjective} {noun} No. {rng.randrange(10**8):08d}",
+            f"{adjective} {noun.lower()} made to order",
+            round(min(rng.lognormvariate(2.4, 0.4), 60), 2), rng.choice(category_ids),
+            round(rng.uniform(3.5, 5), 1), rng.randint(0, 500), f"{rng.choice((10, 15, 20, 25, 30, 40))} min",
+            rng.random() < 0.05, True, start,
+        ))
+    return rows
+
+
+def _order_days(rng: random.Random, orders: int, start: datetime, days: int) -> list[tuple]:
+    """(day, order count) over the period: busier weekends, steady growth"""
+    weights = [WEEKDAY_WEIGHTS[(start + timedelta(days=d)).weekday()] * (0.6 + 0.4 * d / max(days - 1, 1))
+               for d in range(days)]
+    total = sum(weights)
+    counts = [int(orders * w / total) for w in weights]
+    cumulative = _cumulative(weights)
+    for _ in range(orders - sum(counts)):
+        counts[bisect.bisect(cumulative, rng.random() * total)] += 1
+    return [(start + timedelta(days=d), count) for d, count in enumerate(counts)]
+
+
+def _order_tasks(day_counts: list[tuple], first_id: int, chunk_size: int) -> list[tuple]:
+    """Consecutive days grouped into chunks of about chunk_size orders"""
+    tasks, days, size = [], [], 0
+    for day, count in day_counts:
+        days.append((day, count))
+        size += count
+        if size >= chunk_size:
+            tasks.append((len(tasks), first_id, days))
+            first_id += size
+            days, size = [], 0
+    if size:
+        tasks.append((len(tasks), first_id, days))
+    return tasks
+
+
+def _ordered(pool, fn, tasks: list, window: int):
+    """Results of fn over tasks in task order, with at most `window` chunks
+    generated ahead of the writer"""
+    if pool is None:
+        yield from map(fn, tasks)
+        return
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.apply_async(fn, (task,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def _load(raw, pool, fn, tasks: list, window: int, label: str) -> dict:
+    """Write every chunk; row counts per table"""
+    written, started, done = {}, time.perf_counter(), 0
+    for count, tables in _ordered(pool, fn, tasks, window):
+        for table, columns, payload in tables:
+            _write(raw, table, columns, payload)
+            written[table.name] = written.get(table.name, 0) + (
+                payload.count("\n") if isinstance(payload, str) else len(payload)
+            )
+        raw.commit()
+        done += count
+        elapsed = time.perf_counter() - started
+        print(f"  … {label}: {done:,} ({done / elapsed:,.0f}/s)", end="\r", flush=True)
+    print(" " * 60, end="\r")
+    return written
+
+
+def _report(written: dict, seconds: float) -> int:
+    rows = sum(written.values())
+    tables = ", ".join(f"{count:,} {table}" for table, count in written.items())
+    print(f"  ✅ {tables} in {seconds:.1f}s ({rows / max(seconds, 1e-9):,.0f} rows/s)")
+    return rows
+
+
+def _reset_sequences(db) -> None:
+    """Ids were written explicitly; move PostgreSQL's sequences past them"""
+    if db.bind.dialect.name != "postgresql":
+        return
+    for table in ("users", "orders"):
+        db.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--foods", type=int, default=0, help="foods to add to the existing menu")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--end", type=date.fromisoformat, default=datetime.utcnow().date(),
+                        help="last day of orders, YYYY-MM-DD (default: today)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="orders or users per chunk")
+    parser.add_argument("--password", default="password123", help="password of every generated user")
+    parser.add_argument("--skip-rollups", action="store_true", help="don't rebuild rollups afterwards")
+    args = parser.parse_args()
+
+    end = datetime.combine(args.end, datetime.min.time()) + timedelta(days=1)
+    start = end - timedelta(days=args.days)
+    rng = random.Random(args.seed)
+    copy = engine.dialect.name == "postgresql"
+    db = SessionLocal()
+    raw = engine.raw_connection()
+    pool = None
+    try:
+        print(f"🌱 Generating data ({'COPY' if copy else 'executemany'}, {args.workers} workers)...")
+        total_rows, started = 0, time.perf_counter()
+
+        category_ids = db.scalars(select(Category.id).order_by(Category.id)).all()
+        if args.foods:
+            if not category_ids:
+                raise SystemExit("❌ No categories, run seed_data.py first")
+            phase = time.perf_counter()
+            rows = _food_rows(rng, args.foods, category_ids, start)
+            _write(raw, Food.__table__, FOOD_COLUMNS, _encode(Food.__table__, FOOD_COLUMNS, rows, copy))
+            raw.commit()
+            total_rows += _report({"foods": args.foods}, time.perf_counter() - phase)
+
+        foods = db.execute(select(Food.id, Food.price).where(Food.is_available == True).order_by(Food.id)).all()
+        if args.orders and not foods:
+            raise SystemExit("❌ No foods to order, run seed_data.py first or pass --foods")
+        # Popularity follows a shuffled Zipf-like ranking of the menu
+        ranked = rng.sample(list(foods), k=len(foods))
+        password_hash = get_password_hash(args.password)
+        first_user = (db.scalar(select(func.max(User.id))) or 0) + 1
+        first_order = (db.scalar(select(func.max(Order.id))) or 0) + 1
+        existing_users = db.scalars(select(User.id).order_by(User.id)).all()
+        user_ids = [*existing_users, *range(first_user, first_user + args.users)]
+        rng.shuffle(user_ids)
+        db.rollback()
+
+        context = {
+            "seed": args.seed, "copy": copy, "start": start, "end": end, "password_hash": password_hash,
+            "user_ids": user_ids, "food_ids": [food.id for food in ranked],
+            "food_prices": [food.price for food in ranked],
+            "food_weights": _cumulative(1 / (rank + 1) ** 1.1 for rank in range(len(ranked))),
+        }
+        if args.workers > 1:
+            pool = multiprocessing.Pool(args.workers, initializer=_init_worker, initargs=(context,))
+        else:
+            _init_worker(context)
+        window = max(args.workers, 1) * 2
+
+        phase = time.perf_counter()
+        user_tasks = [
+            (chunk, first_id, min(args.chunk_size, first_user + args.users - first_id))
+            for chunk, first_id in enumerate(range(first_user, first_user + args.users, args.chunk_size))
+        ]
+        written = _load(raw, pool, _user_chunk, user_tasks, window, "users")
+        total_rows += _report(written, time.perf_counter() - phase)
+
+        if args.orders:
+            phase = time.perf_counter()
+            order_tasks = _order_tasks(_order_days(rng, args.orders, start, args.days), first_order, args.chunk_size)
+            written = _load(raw, pool, _order_chunk, order_tasks, window, "orders")
+            total_rows += _report(written, time.perf_counter() - phase)
+
+        _reset_sequences(db)
+        db.commit()
+        if not args.skip_rollups:
+            phase = time.perf_counter()
+            rollups.rebuild(db)
+            db.commit()
+            print(f"  ✅ Rollups rebuilt in {time.perf_counter() - phase:.1f}s")
+        elapsed = time.perf_counter() - started
+        print(f"\n🎉 {total_rows:,} rows in {elapsed:.1f}s ({total_rows / elapsed:,.0f} rows/s)")
+    finally:
+        if pool is not None:
+            pool.terminate()
+        raw.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Alembic environment: migrates the database at DATABASE_URL to the models
+in app.models. SQLite runs ALTERs in batch mode (table copies), since it
+cannot alter most of a table in place.
+
+On PostgreSQL every run holds an advisory lock, so deploys that start
+`alembic upgrade head` on several hosts at once apply each revision once,
+and sets lock_timeout (see migrations/online.py).
+"""
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine, pool
+from app.config import settings
+from app.database import Base
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+
+if context.config.config_file_name is not None:
+    fileConfig(context.config.config_file_name)
+
+target_metadata = Base.metadata
+
+# pg_advisory_lock key serializing concurrent migration runs
+MIGRATION_LOCK_KEY = 7_366_001
+
+
+def database_url() -> str:
+    return context.config.get_main_option("sqlalchemy.url") or settings.DATABASE_URL
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL to stdout (alembic upgrade head --sql)"""
+    url = database_url()
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=url.startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Apply the migrations over a dedicated, unpooled connection"""
+    connectable = create_engine(database_url(), poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            # Session level, so both survive commits and autocommit blocks
+            connection.exec_driver_sql(f"SET lock_timeout = {settings.MIGRATION_LOCK_TIMEOUT_MS}")
+            connection.exec_driver_sql(f"SELECT pg_advisory_lock({MIGRATION_LOCK_KEY})")
+            connection.commit()
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
+            # Each revision commits on its own; online.py helpers commit
+            # mid-revision anyway
+            transaction_per_migration=True,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,78 @@
+"""
+Helpers for migrations that run while the API serves traffic.
+
+- Index builds and drops on PostgreSQL use CONCURRENTLY, which doesn't
+  block writes but can't run in a transaction. A failed concurrent build
+  leaves an INVALID index behind; create_index drops it first, so the
+  migration can simply be rerun.
+- backfill() updates rows in primary key ranges, committing each batch, so
+  no long transaction holds row locks on a hot table like orders.
+- env.py sets lock_timeout (MIGRATION_LOCK_TIMEOUT_MS) for every migration.
+  A statement that can't get its lock in time fails instead of queueing
+  all of the table's traffic behind it; rerun it later.
+
+Adding a column to orders, for example: add it nullable (no table
+rewrite), backfill() it, then create_index() on it and set NOT NULL in a
+later revision. Other DDL that rewrites the table (changing a column type,
+adding a volatile default) needs a new column and a backfill instead.
+"""
+import time
+from typing import Optional
+from alembic import op
+from sqlalchemy import text
+from app.config import settings
+
+
+def _concurrently() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def create_index(name: str, table: str, columns: list, **kw) -> None:
+    """op.create_index, CONCURRENTLY on PostgreSQL"""
+    if not _concurrently():
+        op.create_index(name, table, columns, **kw)
+        return
+    with op.get_context().autocommit_block():
+        if not op.get_context().as_sql:
+            invalid = op.get_bind().execute(text(
+                "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+                "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+            ), {"name": name}).first()
+            if invalid:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        op.create_index(name, table, columns, postgresql_concurrently=True, **kw)
+
+
+def drop_index(name: str, table: str) -> None:
+    """op.drop_index, CONCURRENTLY on PostgreSQL"""
+    if not _concurrently():
+        op.drop_index(name, table_name=table)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def backfill(
+    table: str,
+    assignments: str,
+    where: Optional[str] = None,
+    key: str = "id",
+    batch_size: Optional[int] = None
+) -> None:
+    """UPDATE `table` SET `assignments` [WHERE `where`], one committed batch
+    per `batch_size` range of the integer key"""
+    condition = f" AND ({where})" if where else ""
+    if op.get_context().as_sql:
+        op.execute(f"UPDATE {table} SET {assignments}" + (f" WHERE {where}" if where else ""))
+        return
+    batch_size = batch_size or settings.MIGRATION_BATCH_SIZE
+    bind = op.get_bind()
+    low, high = bind.execute(text(f"SELECT min({key}), max({key}) FROM {table}")).one()
+    if low is None:
+        return
+    update = text(f"UPDATE {table} SET {assignments} WHERE {key} >= :low AND {key} < :high{condition}")
+    with op.get_context().autocommit_block():
+        for start in range(low, high + 1, batch_size):
+            bind.execute(update, {"low": start, "high": start + batch_size})
+            # Leave room for replication and autovacuum to keep up
+            time.sleep(settings.MIGRATION_BATCH_PAUSE_SECONDS)
@@ -0,0 +1,48 @@
+"""secondary indexes
+
+Indexes for the filters and joins the API runs on every request (roles
+of the caller, foods by category and availability, order items by food).
+On PostgreSQL they are built with CREATE INDEX CONCURRENTLY, so writes to
+the tables continue during the build (see migrations/online.py).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 14:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from migrations import online
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+AVAILABLE = {
+    'postgresql_where': sa.text('is_available = true'),
+    'sqlite_where': sa.text('is_available = 1'),
+}
+
+# name -> (table, columns, options)
+INDEXES = {
+    'ix_user_roles_user_id_role': ('user_roles', ['user_id', 'role'], {}),
+    'ix_foods_category_id': ('foods', ['category_id'], {}),
+    'ix_foods_available_id': ('foods', ['id'], AVAILABLE),
+    'ix_foods_available_category_id_id': ('foods', ['category_id', 'id'], AVAILABLE),
+    'ix_foods_available_is_special_id': ('foods', ['is_special', 'id'], AVAILABLE),
+    'ix_order_items_food_id': ('order_items', ['food_id'], {}),
+}
+
+
+def upgrade() -> None:
+    for name, (table, columns, options) in INDEXES.items():
+        online.create_index(name, table, columns, **options)
+
+
+def downgrade() -> None:
+    for name, (table, _, _) in INDEXES.items():
+        online.drop_index(name, table)
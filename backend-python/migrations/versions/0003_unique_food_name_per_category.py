@@ -0,0 +1,34 @@
+"""unique food name per category
+
+Bulk food imports upsert on (category_id, name). The unique index replaces
+ix_foods_category_id, which is its prefix. Building it fails if a category
+already has two foods with the same name; rename or merge those first:
+
+    SELECT category_id, name, count(*) FROM foods
+    GROUP BY category_id, name HAVING count(*) > 1;
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 15:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from migrations import online
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    online.create_index('uq_foods_category_id_name', 'foods', ['category_id', 'name'], unique=True)
+    online.drop_index('ix_foods_category_id', 'foods')
+
+
+def downgrade() -> None:
+    online.create_index('ix_foods_category_id', 'foods', ['category_id'])
+    online.drop_index('uq_foods_category_id_name', 'foods')
@@ -0,0 +1,40 @@
+"""order keyset indexes
+
+Indexes matching the (created_at, id) cursor of the order lists: all
+orders, a user's history and orders by status, plus order items by order
+for loading an order's lines. Built with CREATE INDEX CONCURRENTLY on
+PostgreSQL (see migrations/online.py).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from migrations import online
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name -> (table, columns)
+INDEXES = {
+    'ix_orders_created_at_id': ('orders', ['created_at', 'id']),
+    'ix_orders_user_id_created_at_id': ('orders', ['user_id', 'created_at', 'id']),
+    'ix_orders_status_created_at_id': ('orders', ['status', 'created_at', 'id']),
+    'ix_order_items_order_id': ('order_items', ['order_id']),
+}
+
+
+def upgrade() -> None:
+    for name, (table, columns) in INDEXES.items():
+        online.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, (table, _) in INDEXES.items():
+        online.drop_index(name, table)
@@ -0,0 +1,99 @@
+"""dashboard rollups and sales buckets
+
+Tables the API keeps current on every order change: lifetime counters,
+orders and revenue per day and status, units sold per food, and the sales
+analytics buckets per time bucket, food and category. They start empty;
+on a database that already has orders run `python rebuild_rollups.py`
+once after upgrading. Tables that already exist (created by create_all
+before migrations were the only schema path) are left alone.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 09:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ORDER_STATUSES = ('PENDING', 'CONFIRMED', 'PREPARING', 'OUT_FOR_DELIVERY', 'DELIVERED', 'CANCELLED')
+TABLES = (
+    'stat_counters', 'daily_order_stats', 'food_sales',
+    'order_sales_buckets', 'food_sales_buckets', 'category_sales_buckets',
+)
+
+
+def _existing_tables() -> set:
+    if op.get_context().as_sql:
+        return set()
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    existing = _existing_tables()
+    if 'stat_counters' not in existing:
+        op.create_table('stat_counters',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('value', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+        )
+    if 'daily_order_stats' not in existing:
+        op.create_table('daily_order_stats',
+        sa.Column('day', sa.Date(), nullable=False),
+        # The orderstatus type already exists, created with orders
+        sa.Column('status', postgresql.ENUM(*ORDER_STATUSES, name='orderstatus', create_type=False), nullable=False),
+        sa.Column('orders', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'status')
+        )
+    if 'food_sales' not in existing:
+        op.create_table('food_sales',
+        sa.Column('food_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('food_id')
+        )
+        op.create_index('ix_food_sales_quantity', 'food_sales', ['quantity'])
+    if 'order_sales_buckets' not in existing:
+        op.create_table('order_sales_buckets',
+        sa.Column('granularity', sa.String(length=8), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('orders', sa.Integer(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('granularity', 'bucket_start')
+        )
+    if 'food_sales_buckets' not in existing:
+        op.create_table('food_sales_buckets',
+        sa.Column('granularity', sa.String(length=8), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('food_id', sa.Integer(), nullable=False),
+        sa.Column('orders', sa.Integer(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('granularity', 'bucket_start', 'food_id')
+        )
+        op.create_index('ix_food_sales_buckets_food', 'food_sales_buckets', ['granularity', 'food_id', 'bucket_start'])
+    if 'category_sales_buckets' not in existing:
+        op.create_table('category_sales_buckets',
+        sa.Column('granularity', sa.String(length=8), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('orders', sa.Integer(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('granularity', 'bucket_start', 'category_id')
+        )
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_table(table)
@@ -0,0 +1,45 @@
+"""food search
+
+PostgreSQL menu search (app/utils/search.py): a generated tsvector over
+name (weight A) and description (weight B), its GIN index and a trigram
+index on name for typo tolerance. Adding the generated column rewrites
+foods, which is small; the indexes are built CONCURRENTLY. Objects that
+already exist, installed at startup before migrations were the only schema
+path, are left alone. Nothing to do on other databases. The definitions
+come from app/models/food.py, which builds the same objects for create_all.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from app.models.food import FOOD_SEARCH_INDEXES, FOOD_SEARCH_VECTOR_TYPE
+from migrations import online
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(f"ALTER TABLE foods ADD COLUMN IF NOT EXISTS search_vector {FOOD_SEARCH_VECTOR_TYPE}")
+    for name, (column, ops) in FOOD_SEARCH_INDEXES.items():
+        online.create_index(name, 'foods', [column], postgresql_using='gin',
+                            postgresql_ops={column: ops} if ops else {}, if_not_exists=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name in reversed(FOOD_SEARCH_INDEXES):
+        online.drop_index(name, 'foods')
+    op.execute("ALTER TABLE foods DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,24 @@
+"""
+Recompute the dashboard rollups and sales analytics buckets from the orders,
+order_items and users tables.
+Needed after data is loaded without going through the API (imports, restores,
+manual SQL); the API keeps the rollups current on its own.
+Run: python rebuild_rollups.py
+"""
+import time
+from app.database import SessionLocal
+from app.utils import rollups
+
+db = SessionLocal()
+
+try:
+    print("🔄 Rebuilding dashboard rollups and sales buckets...")
+    start = time.perf_counter()
+    rollups.rebuild(db)
+    db.commit()
+    print(f"🎉 Rollups rebuilt in {time.perf_counter() - start:.2f}s")
+except Exception as e:
+    print(f"❌ Error rebuilding rollups: {e}")
+    db.rollback()
+finally:
+    db.close()
@@ -1,14 +1,14 @@
 """
 Seed script to populate the database with initial data
-Run: python seed_data.py
+Run: alembic upgrade head && python seed_data.py
 """
-from app.database import SessionLocal, engine, Base
+from app.database import SessionLocal
 from app.models.user import User, Role, UserRole
-from app.models.food import Food, Category
+from app.models.food import Category
+from app.schemas.food import FoodImportMode
 from app.utils.security import get_password_hash
-
-# Create tables
-Base.metadata.create_all(bind=engine)
+from app.utils import rollups
+from app.utils.food_import import category_ids, upsert_foods
 
 db = SessionLocal()
 
@@ -24,20 +24,14 @@ try:
         {"name": "Dessert", "description": "Sweet treats and desserts"},
     ]
 
-    categories = {}
-    for cat_data in categories_data:
-        existing = db.query(Category).filter(Category.name == cat_data["name"]).first()
-        if not existing:
-            category = Category(**cat_data)
-            db.add(category)
-            db.flush()
-            categories[cat_data["name"]] = category
-            print(f"  ✅ Created category: {cat_data['name']}")
-        else:
-            categories[cat_data["name"]] = existing
-            print(f"  ⏭️  Category exists: {cat_data['name']}")
-
+    # One statement per table; rows that already exist are left alone
+    created = db.execute(
+        rollups.dialect_insert(db)(Category.__table__).values(categories_data)
+        .on_conflict_do_nothing(index_elements=["name"])
+    ).rowcount
     db.commit()
+    categories = category_ids(db)
+    print(f"  ✅ Categories: {created} created, {len(categories_data) - created} existing")
 
     # Create foods
     foods_data = [
@@ -125,17 +119,15 @@ try:
         },
     ]
 
+    # A multi-row insert needs the same columns in every row
+    food_defaults = {"original_price": None, "is_special": False, "is_available": True}
+    food_rows = []
     for food_data in foods_data:
-        existing = db.query(Food).filter(Food.name == food_data["name"]).first()
-        if not existing:
-            category = categories.get(food_data.pop("category_name"))
-            food = Food(**food_data, category_id=category.id)
-            db.add(food)
-            print(f"  ✅ Created food: {food.name}")
-        else:
-            print(f"  ⏭️  Food exists: {food_data['name']}")
-
+        category_id = categories[food_data.pop("category_name")]
+        food_rows.append({**food_defaults, **food_data, "category_id": category_id})
+    created = upsert_foods(db, food_rows, FoodImportMode.INSERT)
     db.commit()
+    print(f"  ✅ Foods: {created} created, {len(food_rows) - created} existing")
 
     # Create admin user
     admin_email = "admin@tastybites.com"
@@ -193,6 +185,10 @@ try:
         print(f"  ⏭️  Demo user exists: {demo_email}")
 
     db.commit()
+    
+    # Users were inserted directly, recount the dashboard rollups
+    rollups.rebuild(db)
+    db.commit()
     print("\n🎉 Database seeding completed!")
 
 except Exception as e: